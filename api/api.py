@@ -2,6 +2,8 @@ from dotenv import load_dotenv
 
 load_dotenv()
 from api.db import db, app
+from api.cache import create_document_cache, LocalBackend
+from api.limiter import AttemptLimiter
 
 from passlib.context import CryptContext
 from jose import JWTError, jwt
@@ -14,7 +16,10 @@ from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
 from fastapi import HTTPException
 import os
-from fastapi import Depends, HTTPException, status
+import hmac
+import asyncio
+from fastapi import Depends, HTTPException, status, Request
+from starlette.concurrency import run_in_threadpool
 
 SECRET_KEY = os.environ["API_SECRET_KEY"]
 ALGORITHM = "HS256"
@@ -23,6 +28,12 @@ ACCESS_TOKEN_EXPIRE_DAYS = 365
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = HTTPBearer()
 
+# user records of authenticated requests, so auth is a signature check and a lookup
+user_cache = LocalBackend(
+    int(os.environ.get("API_USER_CACHE_MAXSIZE", 1024)),
+    int(os.environ.get("API_USER_CACHE_TTL", 300)),
+)
+
 
 class TokenData(BaseModel):
     username: str = None
@@ -36,6 +47,57 @@ def get_password_hash(password):
     return pwd_context.hash(password)
 
 
+# bcrypt costs hundreds of ms of cpu by design, it runs in the threadpool and only a
+# few hashes are computed at once, so auth requests can not saturate a worker
+password_semaphore = asyncio.Semaphore(int(os.environ.get("API_AUTH_CONCURRENCY", 2)))
+
+# every attempt of a client on a username counts against its limit, until one succeeds
+auth_limiter = AttemptLimiter(
+    int(os.environ.get("API_AUTH_MAX_ATTEMPTS", 10)),
+    int(os.environ.get("API_AUTH_WINDOW", 300)),
+)
+
+# addresses of the reverse proxies in front of the api, whose X-Forwarded-For is trusted
+TRUSTED_PROXIES = {
+    address.strip()
+    for address in os.environ.get("API_TRUSTED_PROXIES", "").split(",")
+    if address.strip()
+}
+
+# the admin password is hashed once, or given already hashed in ADMIN_PASSWORD_HASH
+ADMIN_USERNAME = os.getenv("ADMIN_USERNAME")
+ADMIN_PASSWORD_HASH = os.getenv("ADMIN_PASSWORD_HASH", None)
+if ADMIN_PASSWORD_HASH is None and os.getenv("ADMIN_PASSWORD"):
+    ADMIN_PASSWORD_HASH = get_password_hash(os.getenv("ADMIN_PASSWORD"))
+
+
+async def verify_password_async(plain_password, hashed_password):
+    async with password_semaphore:
+        return await run_in_threadpool(verify_password, plain_password, hashed_password)
+
+
+def get_client_address(request: Request):
+    address = request.client.host if request.client else ""
+    # the first address not added by a trusted proxy, from the right, is the client
+    forwarded = request.headers.get("x-forwarded-for", "")
+    hops = [hop.strip() for hop in forwarded.split(",") if hop.strip()]
+    while address in TRUSTED_PROXIES and hops:
+        address = hops.pop()
+    return address
+
+
+def check_auth_attempts(request: Request, username: str):
+    # clients sharing an address only lock each other out of the same username
+    key = f"{request.url.path}#{get_client_address(request)}#{username}"
+    if not auth_limiter.hit(key):
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many attempts, try again later.",
+            headers={"Retry-After": str(auth_limiter.window)},
+        )
+    return key
+
+
 def create_access_token(data: dict, expires_delta: timedelta = None):
     to_encode = data.copy()
     if expires_delta:
@@ -63,11 +125,17 @@ async def get_current_user(
         token_data = TokenData(username=username)
     except JWTError:
         raise credentials_exception
-    user = db.collection("users").document(username).get()
-    if user:
-        return user.to_dict()
-    else:
-        raise credentials_exception
+    user = await user_cache.get(username)
+    if user is None:
+        user = (await db.collection("users").document(username).get()).to_dict()
+        if user is None:
+            raise credentials_exception
+        await user_cache.set(username, user)
+    return dict(user)
+
+
+# widget documents served by the routers, invalidated when a protocol is updated
+document_cache = create_document_cache(db)
 
 
 tags_metadata = [
@@ -117,30 +185,62 @@ from api.routers import (
     misc,
 )
 
+from api.http_cache import conditional_request, HttpCacheMiddleware
+
+# conditional requests are answered before the endpoints read any document
+router_dependencies = [Depends(conditional_request)]
+
 app.include_router(
-    github_project.router, prefix="/github-project", tags=[tags_metadata[1]["name"]]
+    github_project.router,
+    prefix="/github-project",
+    tags=[tags_metadata[1]["name"]],
+    dependencies=router_dependencies,
 )
 app.include_router(
-    github_ecosystem.router, prefix="/github-ecosystem", tags=[tags_metadata[2]["name"]]
+    github_ecosystem.router,
+    prefix="/github-ecosystem",
+    tags=[tags_metadata[2]["name"]],
+    dependencies=router_dependencies,
 )
 app.include_router(
     github_leaderboard.router,
     prefix="/github-leaderboard",
     tags=[tags_metadata[3]["name"]],
+    dependencies=router_dependencies,
+)
+app.include_router(
+    discourse.router,
+    prefix="/discourse",
+    tags=[tags_metadata[4]["name"]],
+    dependencies=router_dependencies,
+)
+app.include_router(
+    developers.router,
+    prefix="/developers",
+    tags=[tags_metadata[5]["name"]],
+    dependencies=router_dependencies,
 )
 app.include_router(
-    discourse.router, prefix="/discourse", tags=[tags_metadata[4]["name"]]
+    governance.router,
+    prefix="/governance",
+    tags=[tags_metadata[6]["name"]],
+    dependencies=router_dependencies,
 )
 app.include_router(
-    developers.router, prefix="/developers", tags=[tags_metadata[5]["name"]]
+    messari.router,
+    prefix="/messari",
+    tags=[tags_metadata[7]["name"]],
+    dependencies=router_dependencies,
 )
 app.include_router(
-    governance.router, prefix="/governance", tags=[tags_metadata[6]["name"]]
+    misc.router,
+    prefix="/misc",
+    tags=[tags_metadata[8]["name"]],
+    dependencies=router_dependencies,
 )
-app.include_router(messari.router, prefix="/messari", tags=[tags_metadata[7]["name"]])
-app.include_router(misc.router, prefix="/misc", tags=[tags_metadata[8]["name"]])
 
 
+app.add_middleware(HttpCacheMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -171,18 +271,21 @@ def read_root():
     return "Welcome to Flowana API!"
 
 
-async def verify_admin_credentials(admin_in: AdminIn):
+async def verify_admin_credentials(admin_in: AdminIn, request: Request):
+    attempts_key = check_auth_attempts(request, admin_in.admin_username)
     if not (
-        admin_in.admin_username == os.getenv("ADMIN_USERNAME")
-        and verify_password(
-            admin_in.admin_password,
-            get_password_hash(os.getenv("ADMIN_PASSWORD")),
+        ADMIN_USERNAME is not None
+        and ADMIN_PASSWORD_HASH is not None
+        and hmac.compare_digest(
+            admin_in.admin_username.encode(), ADMIN_USERNAME.encode()
         )
+        and await verify_password_async(admin_in.admin_password, ADMIN_PASSWORD_HASH)
     ):
         raise HTTPException(
             status_code=403,
             detail="Not enough permissions",
         )
+    auth_limiter.reset(attempts_key)
 
 
 class UserOut(BaseModel):
@@ -197,7 +300,7 @@ async def admin_create_user(
     """
     Create a new user with admin credentials.
     """
-    user = db.collection("users").document(user_in.username).get()
+    user = await db.collection("users").document(user_in.username).get()
 
     if user.exists:
         raise HTTPException(
@@ -205,23 +308,27 @@ async def admin_create_user(
             detail="Username already exists",
         )
 
-    hashed_password = get_password_hash(user_in.password)
+    async with password_semaphore:
+        hashed_password = await run_in_threadpool(get_password_hash, user_in.password)
 
-    db.collection("users").document(user_in.username).set(
+    await db.collection("users").document(user_in.username).set(
         {
             "username": user_in.username,
             "password": hashed_password,
         }
     )
+    await user_cache.delete(user_in.username)
 
     return UserOut(username=user_in.username, message="User successfully created")
 
 
 @app.post("/get-token/", response_model=UserToken, tags=["Auth"])
-async def login_for_access_token(user_in: UserIn):
-    user = db.collection("users").document(user_in.username).get().to_dict()
+async def login_for_access_token(user_in: UserIn, request: Request):
+    attempts_key = check_auth_attempts(request, user_in.username)
+    user = (await db.collection("users").document(user_in.username).get()).to_dict()
     if user:
-        if verify_password(user_in.password, user.get("password")):
+        if await verify_password_async(user_in.password, user.get("password")):
+            auth_limiter.reset(attempts_key)
             access_token_expires = timedelta(days=ACCESS_TOKEN_EXPIRE_DAYS)
             access_token = create_access_token(
                 data={"sub": user_in.username},
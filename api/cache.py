@@ -0,0 +1,291 @@
+import os
+import time
+import asyncio
+from datetime import datetime, timezone
+import pickle
+import hashlib
+import threading
+import logging
+from collections import OrderedDict
+
+try:
+    from redis import asyncio as aioredis
+except ImportError:
+    aioredis = None
+
+logger = logging.getLogger(__name__)
+
+
+def parse_last_updated(doc_dict):
+    # written by helpers.write_last_updated as an isoformat string ending with "Z"
+    try:
+        value = doc_dict["data"].removesuffix("Z")
+        return datetime.fromisoformat(value).astimezone(timezone.utc)
+    except (TypeError, KeyError, AttributeError, ValueError):
+        return None
+
+
+class LocalBackend:
+    """In-process LRU cache with expiring entries. Stand-in for the shared backend."""
+
+    def __init__(self, maxsize=2048, ttl=3600):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+
+    async def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key, None)
+            if entry is None:
+                return None
+
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self.entries[key]
+                return None
+
+            self.entries.move_to_end(key)
+            return value
+
+    async def set(self, key, value):
+        with self.lock:
+            self.entries[key] = (value, time.monotonic() + self.ttl)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    async def delete(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+class RedisBackend:
+    """Cache shared by every api worker."""
+
+    def __init__(self, url, ttl=3600):
+        if aioredis is None:
+            raise ImportError("redis package is required for the shared api cache.")
+        self.client = aioredis.Redis.from_url(url)
+        self.ttl = ttl
+
+    async def get(self, key):
+        return await self.client.get(key)
+
+    async def set(self, key, value):
+        await self.client.set(key, value, ex=self.ttl)
+
+    async def delete(self, key):
+        await self.client.delete(key)
+
+    def clear(self):
+        pass
+
+
+class DocumentCache:
+    """
+    Read-through cache of the documents served by the api, keyed by
+    (protocol, collection, document).
+
+    Keys carry the version of the `{protocol}-last-updated` collection, which is
+    checked every `version_interval` seconds, so a finished pipeline stage
+    invalidates the cached documents of its protocol. Values are stored pickled,
+    every hit returns a fresh copy that the endpoints are free to modify.
+
+    Concurrent misses of the same key wait for a single read of the database.
+    """
+
+    def __init__(self, db, backends, version_interval=30):
+        self.db = db
+        self.backends = backends
+        self.version_interval = version_interval
+        self.versions = {}
+        self.versions_lock = threading.Lock()
+        self.pending_reads = {}
+
+    def coalesce(self, key, read):
+        """Returns the pending read of key, or starts read() if there is none."""
+        task = self.pending_reads.get(key, None)
+        if task is None:
+            task = asyncio.ensure_future(read())
+            self.pending_reads[key] = task
+            task.add_done_callback(lambda _: self.pending_reads.pop(key, None))
+        # a cancelled request does not cancel the read the others are waiting for
+        return asyncio.shield(task)
+
+    async def read_version_info(self, protocol_name):
+        docs = await self.db.collection(f"{protocol_name}-last-updated").get()
+        last_updated = sorted((doc.id, doc.to_dict()) for doc in docs)
+        version = hashlib.sha1(repr(last_updated).encode("utf-8")).hexdigest()[:16]
+        last_modified = max(
+            filter(None, [parse_last_updated(data) for _, data in last_updated]),
+            default=None,
+        )
+
+        with self.versions_lock:
+            self.versions[protocol_name] = (version, last_modified, time.monotonic())
+        return version, last_modified
+
+    async def get_version_info(self, protocol_name):
+        """Returns the version and the last modification datetime of a protocol."""
+        with self.versions_lock:
+            version, last_modified, checked_at = self.versions.get(
+                protocol_name, (None, None, 0)
+            )
+        is_fresh = time.monotonic() - checked_at < self.version_interval
+        if version is not None and is_fresh:
+            return version, last_modified
+
+        return await self.coalesce(
+            ("version", protocol_name),
+            lambda: self.read_version_info(protocol_name),
+        )
+
+    async def get_version(self, protocol_name):
+        return (await self.get_version_info(protocol_name))[0]
+
+    async def get_etag(self, protocol_name, version, url):
+        key = "|".join(["flowana-etag", protocol_name, version, url])
+        etag = await self.cache_get(key)
+        return etag.decode("utf-8") if etag is not None else None
+
+    async def set_etag(self, protocol_name, version, url, etag):
+        key = "|".join(["flowana-etag", protocol_name, version, url])
+        await self.cache_set(key, etag.encode("utf-8"))
+
+    async def cache_get(self, key):
+        for i, backend in enumerate(self.backends):
+            value = await backend.get(key)
+            if value is not None:
+                # faster backends in front are filled from the slower ones
+                for front_backend in self.backends[:i]:
+                    await front_backend.set(key, value)
+                return value
+        return None
+
+    async def cache_set(self, key, value):
+        for backend in self.backends:
+            await backend.set(key, value)
+
+    def get_key(self, protocol_name, version, key_parts):
+        return "|".join(["flowana", protocol_name, version, *key_parts])
+
+    async def read_through(self, protocol_name, key_parts, read):
+        version = await self.get_version(protocol_name)
+        key = self.get_key(protocol_name, version, key_parts)
+        value = await self.cache_get(key)
+        if value is None:
+
+            async def read_and_store():
+                value = pickle.dumps(await read())
+                await self.cache_set(key, value)
+                return value
+
+            value = await self.coalesce(key, read_and_store)
+
+        return pickle.loads(value)
+
+    def get_collection_ref(self, protocol_name, collection, repository=None):
+        collection_ref = self.db.collection(f"{protocol_name}-{collection}")
+        if repository is not None:
+            collection_ref = collection_ref.document("repositories").collection(
+                repository
+            )
+        return collection_ref
+
+    async def get_document(self, protocol_name, collection, document, repository=None):
+        """
+        Returns the document as a dictionary, or None if it does not exist.
+        Documents of a repository are read from its subcollection.
+        """
+
+        async def read():
+            collection_ref = self.get_collection_ref(
+                protocol_name, collection, repository
+            )
+            doc = await collection_ref.document(document).get(field_paths=["data"])
+            return doc.to_dict()
+
+        return await self.read_through(
+            protocol_name, [collection, repository or "", document], read
+        )
+
+    async def get_documents(
+        self, protocol_name, collection, documents, repository=None
+    ):
+        """
+        Returns a dictionary of document -> dictionary, or None if it does not exist.
+        Documents missing from the cache are read with a single get_all.
+        """
+        version = await self.get_version(protocol_name)
+        keys = {
+            document: self.get_key(
+                protocol_name, version, [collection, repository or "", document]
+            )
+            for document in documents
+        }
+
+        results = {}
+        for document, key in keys.items():
+            value = await self.cache_get(key)
+            if value is not None:
+                results[document] = pickle.loads(value)
+
+        missing = [document for document in keys if document not in results]
+        if missing:
+            collection_ref = self.get_collection_ref(
+                protocol_name, collection, repository
+            )
+            doc_refs = [collection_ref.document(document) for document in missing]
+            async for doc in self.db.get_all(doc_refs, field_paths=["data"]):
+                # snapshots of documents that do not exist return None
+                results[doc.id] = doc.to_dict()
+                await self.cache_set(keys[doc.id], pickle.dumps(results[doc.id]))
+
+        return {document: results.get(document, None) for document in keys}
+
+    async def get_chunked_documents(
+        self, protocol_name, collection, document_prefix, repository=None
+    ):
+        """Returns the concatenated `data` of the documents named document_prefix*."""
+
+        async def read():
+            collection_ref = self.get_collection_ref(
+                protocol_name, collection, repository
+            )
+            doc_refs = [
+                doc_ref
+                async for doc_ref in collection_ref.list_documents()
+                if document_prefix in doc_ref.id
+            ]
+            docs = await asyncio.gather(*[doc_ref.get() for doc_ref in doc_refs])
+
+            data = []
+            for doc in docs:
+                doc_dict = doc.to_dict()
+                if doc_dict and "data" in doc_dict:
+                    data.extend(doc_dict["data"])
+            return data
+
+        return await self.read_through(
+            protocol_name,
+            [collection, repository or "", f"{document_prefix}*"],
+            read,
+        )
+
+
+def create_document_cache(db):
+    ttl = int(os.environ.get("API_CACHE_TTL", 3600))
+    backends = [LocalBackend(int(os.environ.get("API_CACHE_MAXSIZE", 2048)), ttl)]
+
+    redis_url = os.environ.get("API_CACHE_REDIS_URL", None)
+    if redis_url:
+        backends.append(RedisBackend(redis_url, ttl))
+        logger.info("[*] Api cache is shared through redis.")
+
+    version_interval = int(os.environ.get("API_CACHE_VERSION_INTERVAL", 30))
+    return DocumentCache(db, backends, version_interval)
@@ -22,4 +22,5 @@ app = firebase_admin.initialize_app(
     cred, {"projectId": os.environ["FIREBASE_PROJECT_ID"]}, name="flowana_api"
 )
 
-db = firestore.Client()
+# async client, so the handlers never block the event loop of the workers
+db = firestore.AsyncClient()
@@ -0,0 +1,92 @@
+import os
+import hashlib
+from email.utils import format_datetime, parsedate_to_datetime
+
+from fastapi import Depends, HTTPException, Request, Response
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from api.api import document_cache, get_current_user
+
+CACHE_CONTROL = f"private, max-age={os.environ.get('API_HTTP_CACHE_MAX_AGE', 60)}"
+
+
+def get_url_key(request):
+    return f"{request.url.path}?{request.url.query}"
+
+
+def get_validator_headers(etag, last_modified):
+    headers = {"Cache-Control": CACHE_CONTROL}
+    if etag is not None:
+        headers["ETag"] = etag
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(last_modified, usegmt=True)
+    return headers
+
+
+def is_not_modified(request, etag, last_modified):
+    if_none_match = request.headers.get("if-none-match", None)
+    if if_none_match is not None:
+        # If-None-Match takes precedence over If-Modified-Since
+        if etag is None:
+            return False
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return "*" in tags or etag in tags
+
+    if_modified_since = request.headers.get("if-modified-since", None)
+    if if_modified_since is None or last_modified is None:
+        return False
+    try:
+        return last_modified.replace(microsecond=0) <= parsedate_to_datetime(
+            if_modified_since
+        )
+    except (TypeError, ValueError):
+        return False
+
+
+async def conditional_request(request: Request, user=Depends(get_current_user)):
+    """
+    Answers conditional requests of an authenticated user with 304 before the endpoint reads
+    any document, using the ETag stored for the current version of the protocol.
+    """
+    protocol_name = request.path_params.get("protocol_name", None)
+    if protocol_name is None or request.method != "GET":
+        return
+
+    version, last_modified = await document_cache.get_version_info(protocol_name)
+    etag = await document_cache.get_etag(protocol_name, version, get_url_key(request))
+    request.state.http_cache = (protocol_name, version, last_modified)
+
+    if is_not_modified(request, etag, last_modified):
+        raise HTTPException(
+            status_code=304, headers=get_validator_headers(etag, last_modified)
+        )
+
+
+class HttpCacheMiddleware(BaseHTTPMiddleware):
+    """Adds ETag, Last-Modified and Cache-Control to the responses of the routers."""
+
+    async def dispatch(self, request, call_next):
+        response = await call_next(request)
+        http_cache = getattr(request.state, "http_cache", None)
+        if http_cache is None or response.status_code != 200:
+            return response
+
+        protocol_name, version, last_modified = http_cache
+        body = b"".join([chunk async for chunk in response.body_iterator])
+        etag = f'"{hashlib.sha1(body).hexdigest()}"'
+        await document_cache.set_etag(
+            protocol_name, version, get_url_key(request), etag
+        )
+
+        validator_headers = get_validator_headers(etag, last_modified)
+        if is_not_modified(request, etag, last_modified):
+            return Response(status_code=304, headers=validator_headers)
+
+        headers = dict(response.headers)
+        headers.update(validator_headers)
+        return Response(
+            content=body,
+            status_code=response.status_code,
+            headers=headers,
+            media_type=response.media_type,
+        )
@@ -0,0 +1,40 @@
+import time
+import threading
+from collections import OrderedDict, deque
+
+
+class AttemptLimiter:
+    """
+    Sliding window limit of the attempts of every client.
+
+    At most `maxsize` clients are tracked, the least recently seen ones are forgotten
+    first, so the memory used stays bounded however many addresses a client uses.
+    """
+
+    def __init__(self, max_attempts=10, window=300, maxsize=10000):
+        self.max_attempts = max_attempts
+        self.window = window
+        self.maxsize = maxsize
+        self.lock = threading.Lock()
+        self.attempts = OrderedDict()
+
+    def hit(self, key):
+        """Records an attempt of key, returns False if it is over the limit."""
+        now = time.monotonic()
+        with self.lock:
+            attempts = self.attempts.pop(key, None) or deque()
+            while attempts and attempts[0] <= now - self.window:
+                attempts.popleft()
+
+            allowed = len(attempts) < self.max_attempts
+            if allowed:
+                attempts.append(now)
+
+            self.attempts[key] = attempts
+            while len(self.attempts) > self.maxsize:
+                self.attempts.popitem(last=False)
+            return allowed
+
+    def reset(self, key):
+        with self.lock:
+            self.attempts.pop(key, None)
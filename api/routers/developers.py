@@ -6,7 +6,7 @@ from fastapi import Path, HTTPException
 from google.cloud import exceptions
 from fastapi import HTTPException, Depends
 
-from ..api import db, get_current_user
+from ..api import document_cache, get_current_user
 
 router = APIRouter()
 
@@ -40,7 +40,7 @@ router = APIRouter()
         },
     },
 )
-def full_time(
+async def full_time(
     protocol_name: str = Path(..., description="Protocol name"),
 ):
     """
@@ -49,11 +49,8 @@ def full_time(
     """
 
     try:
-        ref = (
-            db.collection(f"{protocol_name}-developers")
-            .document("full_time")
-            .get(field_paths=["data"])
-            .to_dict()
+        ref = await document_cache.get_document(
+            protocol_name, "developers", "full_time"
         )
 
         if ref is None:
@@ -103,7 +100,7 @@ def full_time(
         },
     },
 )
-def developers_monthly_active_devs(
+async def developers_monthly_active_devs(
     protocol_name: str = Path(..., description="Protocol name"),
 ):
     """
@@ -112,11 +109,8 @@ def developers_monthly_active_devs(
     """
 
     try:
-        ref = (
-            db.collection(f"{protocol_name}-developers")
-            .document("monthly_active_devs")
-            .get(field_paths=["data"])
-            .to_dict()
+        ref = await document_cache.get_document(
+            protocol_name, "developers", "monthly_active_devs"
         )
 
         if ref is None:
@@ -166,7 +160,7 @@ def developers_monthly_active_devs(
         },
     },
 )
-def developers_total_repos(
+async def developers_total_repos(
     protocol_name: str = Path(..., description="Protocol name"),
 ):
     """
@@ -175,11 +169,8 @@ def developers_total_repos(
     """
 
     try:
-        ref = (
-            db.collection(f"{protocol_name}-developers")
-            .document("total_repos")
-            .get(field_paths=["data"])
-            .to_dict()
+        ref = await document_cache.get_document(
+            protocol_name, "developers", "total_repos"
         )
 
         if ref is None:
@@ -229,7 +220,7 @@ def developers_total_repos(
         },
     },
 )
-def developers_total_commits(
+async def developers_total_commits(
     protocol_name: str = Path(..., description="Protocol name"),
 ):
     """
@@ -238,11 +229,8 @@ def developers_total_commits(
     """
 
     try:
-        ref = (
-            db.collection(f"{protocol_name}-developers")
-            .document("total_commits")
-            .get(field_paths=["data"])
-            .to_dict()
+        ref = await document_cache.get_document(
+            protocol_name, "developers", "total_commits"
         )
 
         if ref is None:
@@ -305,7 +293,7 @@ def developers_total_commits(
         },
     },
 )
-def developers_monthly_active_dev_chart(
+async def developers_monthly_active_dev_chart(
     protocol_name: str = Path(..., description="Protocol name"),
 ):
     """
@@ -314,11 +302,8 @@ def developers_monthly_active_dev_chart(
     """
 
     try:
-        ref = (
-            db.collection(f"{protocol_name}-developers")
-            .document("monthly_active_dev_chart")
-            .get(field_paths=["data"])
-            .to_dict()
+        ref = await document_cache.get_document(
+            protocol_name, "developers", "monthly_active_dev_chart"
         )
 
         if ref is None:
@@ -373,7 +358,7 @@ def developers_monthly_active_dev_chart(
         },
     },
 )
-def developers_total_monthly_active_dev_chart(
+async def developers_total_monthly_active_dev_chart(
     protocol_name: str = Path(..., description="Protocol name"),
 ):
     """
@@ -382,11 +367,8 @@ def developers_total_monthly_active_dev_chart(
     """
 
     try:
-        ref = (
-            db.collection(f"{protocol_name}-developers")
-            .document("total_monthly_active_dev_chart")
-            .get(field_paths=["data"])
-            .to_dict()
+        ref = await document_cache.get_document(
+            protocol_name, "developers", "total_monthly_active_dev_chart"
         )
 
         if ref is None:
@@ -456,7 +438,7 @@ def developers_total_monthly_active_dev_chart(
         },
     },
 )
-def developers_dev_type_table(
+async def developers_dev_type_table(
     protocol_name: str = Path(..., description="Protocol name"),
 ):
     """
@@ -465,11 +447,8 @@ def developers_dev_type_table(
     """
 
     try:
-        ref = (
-            db.collection(f"{protocol_name}-developers")
-            .document("dev_type_table")
-            .get(field_paths=["data"])
-            .to_dict()
+        ref = await document_cache.get_document(
+            protocol_name, "developers", "dev_type_table"
         )
 
         if ref is None:
@@ -532,7 +511,7 @@ def developers_dev_type_table(
         },
     },
 )
-def developers_monthly_commits_by_dev_type_chart(
+async def developers_monthly_commits_by_dev_type_chart(
     protocol_name: str = Path(..., description="Protocol name"),
 ):
     """
@@ -541,11 +520,8 @@ def developers_monthly_commits_by_dev_type_chart(
     """
 
     try:
-        ref = (
-            db.collection(f"{protocol_name}-developers")
-            .document("monthly_commits_by_dev_type_chart")
-            .get(field_paths=["data"])
-            .to_dict()
+        ref = await document_cache.get_document(
+            protocol_name, "developers", "monthly_commits_by_dev_type_chart"
         )
 
         if ref is None:
@@ -600,7 +576,7 @@ def developers_monthly_commits_by_dev_type_chart(
         },
     },
 )
-def developers_monthly_commits_chart(
+async def developers_monthly_commits_chart(
     protocol_name: str = Path(..., description="Protocol name"),
 ):
     """
@@ -609,11 +585,8 @@ def developers_monthly_commits_chart(
     """
 
     try:
-        ref = (
-            db.collection(f"{protocol_name}-developers")
-            .document("monthly_commits_chart")
-            .get(field_paths=["data"])
-            .to_dict()
+        ref = await document_cache.get_document(
+            protocol_name, "developers", "monthly_commits_chart"
         )
 
         if ref is None:
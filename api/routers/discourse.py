@@ -7,7 +7,7 @@ from fastapi import HTTPException
 from fastapi import Query, Path, HTTPException
 from google.cloud import exceptions
 from fastapi import Depends, HTTPException
-from ..api import get_current_user, db
+from ..api import get_current_user, document_cache
 
 router = APIRouter()
 
@@ -56,7 +56,7 @@ class TopicActivityInterval(str, Enum):
         },
     },
 )
-def discourse_topic_activity(
+async def discourse_topic_activity(
     protocol_name: str = Path(..., description="Protocol name"),
     interval: TopicActivityInterval = Query(..., description="Interval"),
 ):
@@ -66,11 +66,8 @@ def discourse_topic_activity(
     """
 
     try:
-        ref = (
-            db.collection(f"{protocol_name}-discourse")
-            .document("topic_activity")
-            .get(field_paths=["data"])
-            .to_dict()
+        ref = await document_cache.get_document(
+            protocol_name, "discourse", "topic_activity"
         )
 
         if ref is None:
@@ -163,7 +160,7 @@ def discourse_topic_activity(
         },
     },
 )
-def discourse_topic_metrics(
+async def discourse_topic_metrics(
     protocol_name: str = Path(..., description="Protocol name"),
 ):
     """
@@ -172,11 +169,8 @@ def discourse_topic_metrics(
     """
 
     try:
-        ref = (
-            db.collection(f"{protocol_name}-discourse")
-            .document("topic_metrics")
-            .get(field_paths=["data"])
-            .to_dict()
+        ref = await document_cache.get_document(
+            protocol_name, "discourse", "topic_metrics"
         )
 
         if ref is None:
@@ -238,7 +232,7 @@ def discourse_topic_metrics(
         },
     },
 )
-def discourse_user_metrics(
+async def discourse_user_metrics(
     protocol_name: str = Path(..., description="Protocol name"),
 ):
     """
@@ -247,11 +241,8 @@ def discourse_user_metrics(
     """
 
     try:
-        ref = (
-            db.collection(f"{protocol_name}-discourse")
-            .document("user_metrics")
-            .get(field_paths=["data"])
-            .to_dict()
+        ref = await document_cache.get_document(
+            protocol_name, "discourse", "user_metrics"
         )
 
         if ref is None:
@@ -316,7 +307,7 @@ def discourse_user_metrics(
         },
     },
 )
-def discourse_categories(
+async def discourse_categories(
     protocol_name: str = Path(..., description="Protocol name"),
 ):
     """
@@ -325,11 +316,8 @@ def discourse_categories(
     """
 
     try:
-        ref = (
-            db.collection(f"{protocol_name}-discourse")
-            .document("categories")
-            .get(field_paths=["data"])
-            .to_dict()
+        ref = await document_cache.get_document(
+            protocol_name, "discourse", "categories"
         )
 
         if ref is None:
@@ -383,7 +371,7 @@ def discourse_categories(
         },
     },
 )
-def discourse_tags(
+async def discourse_tags(
     protocol_name: str = Path(..., description="Protocol name"),
 ):
     """
@@ -392,12 +380,7 @@ def discourse_tags(
     """
 
     try:
-        ref = (
-            db.collection(f"{protocol_name}-discourse")
-            .document("tags")
-            .get(field_paths=["data"])
-            .to_dict()
-        )
+        ref = await document_cache.get_document(protocol_name, "discourse", "tags")
 
         if ref is None:
             raise exceptions.NotFound("Collection or document not found")
@@ -465,7 +448,7 @@ class DiscourseTopTopicsInterval(str, Enum):
         },
     },
 )
-def discourse_top_topics(
+async def discourse_top_topics(
     protocol_name: str = Path(..., description="Protocol name"),
     interval: DiscourseTopTopicsInterval = Query(..., description="Interval"),
 ):
@@ -475,11 +458,8 @@ def discourse_top_topics(
     """
 
     try:
-        ref = (
-            db.collection(f"{protocol_name}-discourse")
-            .document("top_topics")
-            .get(field_paths=["data"])
-            .to_dict()
+        ref = await document_cache.get_document(
+            protocol_name, "discourse", "top_topics"
         )
 
         if ref is None:
@@ -571,7 +551,7 @@ class LatestTopicsOrder(str, Enum):
         },
     },
 )
-def discourse_latest_topics(
+async def discourse_latest_topics(
     protocol_name: str = Path(..., description="Protocol name"),
     order: LatestTopicsOrder = Query(..., description="Order"),
 ):
@@ -581,11 +561,8 @@ def discourse_latest_topics(
     """
 
     try:
-        ref = (
-            db.collection(f"{protocol_name}-discourse")
-            .document("latest_topics")
-            .get(field_paths=["data"])
-            .to_dict()
+        ref = await document_cache.get_document(
+            protocol_name, "discourse", "latest_topics"
         )
 
         if ref is None:
@@ -675,7 +652,7 @@ def discourse_latest_topics(
         },
     },
 )
-def discourse_latest_posts(
+async def discourse_latest_posts(
     protocol_name: str = Path(..., description="Protocol name"),
 ):
     """
@@ -684,11 +661,8 @@ def discourse_latest_posts(
     """
 
     try:
-        ref = (
-            db.collection(f"{protocol_name}-discourse")
-            .document("latest_posts")
-            .get(field_paths=["data"])
-            .to_dict()
+        ref = await document_cache.get_document(
+            protocol_name, "discourse", "latest_posts"
         )
 
         if ref is None:
@@ -768,7 +742,7 @@ class TopUsersOrder(str, Enum):
         },
     },
 )
-def discourse_top_users(
+async def discourse_top_users(
     protocol_name: str = Path(..., description="Protocol name"),
     interval: TopUsersInterval = Query(..., description="Interval"),
     order: TopUsersOrder = Query(..., description="Order"),
@@ -781,12 +755,7 @@ def discourse_top_users(
     """
 
     try:
-        ref = (
-            db.collection(f"{protocol_name}-discourse")
-            .document("top_users")
-            .get(field_paths=["data"])
-            .to_dict()
-        )
+        ref = await document_cache.get_document(protocol_name, "discourse", "top_users")
 
         if ref is None:
             raise exceptions.NotFound("Collection or document not found")
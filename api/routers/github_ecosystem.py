@@ -1,11 +1,12 @@
 from fastapi import APIRouter
 from fastapi import Depends, HTTPException
 from enum import Enum
+from typing import List
 from fastapi import HTTPException
 from fastapi import Query, Path, HTTPException
 from google.cloud import exceptions
 from fastapi import Depends, HTTPException
-from ..api import get_current_user, db
+from ..api import get_current_user, document_cache
 from .github_project import RecentIssuesOrder, RecentPullRequestOrder
 
 router = APIRouter()
@@ -49,7 +50,7 @@ router = APIRouter()
         },
     },
 )
-def stats(
+async def stats(
     protocol_name: str = Path(..., description="Protocol name"),
 ):
     """
@@ -58,11 +59,8 @@ def stats(
     """
 
     try:
-        ref = (
-            db.collection(f"{protocol_name}-cumulative")
-            .document("cumulative_info")
-            .get(field_paths=["data"])
-            .to_dict()
+        ref = await document_cache.get_document(
+            protocol_name, "cumulative", "cumulative_info"
         )
 
         if ref is None:
@@ -114,7 +112,7 @@ def stats(
         },
     },
 )
-def commit_activity(
+async def commit_activity(
     protocol_name: str = Path(..., description="Protocol name"),
 ):
     """
@@ -123,11 +121,8 @@ def commit_activity(
     """
 
     try:
-        ref = (
-            db.collection(f"{protocol_name}-cumulative")
-            .document("cumulative_commit_activity")
-            .get(field_paths=["data"])
-            .to_dict()
+        ref = await document_cache.get_document(
+            protocol_name, "cumulative", "cumulative_commit_activity"
         )
 
         if ref is None:
@@ -195,7 +190,7 @@ def commit_activity(
         },
     },
 )
-def participation(
+async def participation(
     protocol_name: str = Path(..., description="Protocol name"),
 ):
     """
@@ -204,11 +199,8 @@ def participation(
     """
 
     try:
-        ref = (
-            db.collection(f"{protocol_name}-cumulative")
-            .document("cumulative_participation")
-            .get(field_paths=["data"])
-            .to_dict()
+        ref = await document_cache.get_document(
+            protocol_name, "cumulative", "cumulative_participation"
         )
 
         if ref is None:
@@ -276,7 +268,7 @@ def participation(
         },
     },
 )
-def code_frequency(
+async def code_frequency(
     protocol_name: str = Path(..., description="Protocol name"),
 ):
     """
@@ -285,11 +277,8 @@ def code_frequency(
     """
 
     try:
-        ref = (
-            db.collection(f"{protocol_name}-cumulative")
-            .document("cumulative_code_frequency")
-            .get(field_paths=["data"])
-            .to_dict()
+        ref = await document_cache.get_document(
+            protocol_name, "cumulative", "cumulative_code_frequency"
         )
 
         if ref is None:
@@ -338,7 +327,7 @@ def code_frequency(
         },
     },
 )
-def punch_card(
+async def punch_card(
     protocol_name: str = Path(..., description="Protocol name"),
 ):
     """
@@ -347,11 +336,8 @@ def punch_card(
     """
 
     try:
-        ref = (
-            db.collection(f"{protocol_name}-cumulative")
-            .document("cumulative_punch_card")
-            .get(field_paths=["data"])
-            .to_dict()
+        ref = await document_cache.get_document(
+            protocol_name, "cumulative", "cumulative_punch_card"
         )
 
         if ref is None:
@@ -399,7 +385,7 @@ def punch_card(
         },
     },
 )
-def language_breakdown(
+async def language_breakdown(
     protocol_name: str = Path(..., description="Protocol name"),
 ):
     """
@@ -408,11 +394,8 @@ def language_breakdown(
     """
 
     try:
-        ref = (
-            db.collection(f"{protocol_name}-cumulative")
-            .document("cumulative_language_breakdown")
-            .get(field_paths=["data"])
-            .to_dict()
+        ref = await document_cache.get_document(
+            protocol_name, "cumulative", "cumulative_language_breakdown"
         )
 
         if ref is None:
@@ -454,7 +437,7 @@ def language_breakdown(
         },
     },
 )
-def issue_count(
+async def issue_count(
     protocol_name: str = Path(..., description="Protocol name"),
 ):
     """
@@ -463,11 +446,8 @@ def issue_count(
     """
 
     try:
-        ref = (
-            db.collection(f"{protocol_name}-cumulative")
-            .document("cumulative_issue_count")
-            .get(field_paths=["data"])
-            .to_dict()
+        ref = await document_cache.get_document(
+            protocol_name, "cumulative", "cumulative_issue_count"
         )
 
         if ref is None:
@@ -535,7 +515,7 @@ class CumulativeMostActiveIssuesInterval(str, Enum):
         },
     },
 )
-def most_active_issues(
+async def most_active_issues(
     protocol_name: str = Path(..., description="Protocol name"),
     interval: CumulativeMostActiveIssuesInterval = Query(
         ...,
@@ -550,11 +530,8 @@ def most_active_issues(
     """
 
     try:
-        ref = (
-            db.collection(f"{protocol_name}-cumulative")
-            .document("cumulative_most_active_issues")
-            .get(field_paths=["data"])
-            .to_dict()
+        ref = await document_cache.get_document(
+            protocol_name, "cumulative", "cumulative_most_active_issues"
         )
 
         if ref is None:
@@ -600,7 +577,7 @@ def most_active_issues(
         },
     },
 )
-def pull_request_count(
+async def pull_request_count(
     protocol_name: str = Path(..., description="Protocol name"),
 ):
     """
@@ -609,11 +586,8 @@ def pull_request_count(
     """
 
     try:
-        ref = (
-            db.collection(f"{protocol_name}-cumulative")
-            .document("cumulative_pull_request_count")
-            .get(field_paths=["data"])
-            .to_dict()
+        ref = await document_cache.get_document(
+            protocol_name, "cumulative", "cumulative_pull_request_count"
         )
 
         if ref is None:
@@ -677,7 +651,7 @@ class CumulativeRecentIssuesOrder(str, Enum):
         },
     },
 )
-def recent_issues(
+async def recent_issues(
     protocol_name: str = Path(..., description="Protocol name"),
     order_by: CumulativeRecentIssuesOrder = Query(..., description="Order by field"),
 ):
@@ -696,11 +670,8 @@ def recent_issues(
         field_name = "recent_updated_issues"
 
     try:
-        ref = (
-            db.collection(f"{protocol_name}-cumulative")
-            .document(f"cumulative_{field_name}")
-            .get(field_paths=["data"])
-            .to_dict()
+        ref = await document_cache.get_document(
+            protocol_name, "cumulative", f"cumulative_{field_name}"
         )
 
         if ref is None:
@@ -759,7 +730,7 @@ def recent_issues(
         },
     },
 )
-def recent_pull_requests(
+async def recent_pull_requests(
     protocol_name: str = Query(..., description="Protocol name"),
     order_by: RecentPullRequestOrder = Query(..., description="Order by field"),
 ):
@@ -778,11 +749,8 @@ def recent_pull_requests(
         field_name = "recent_updated_pull_requests"
 
     try:
-        ref = (
-            db.collection(f"{protocol_name}-cumulative")
-            .document(f"cumulative_{field_name}")
-            .get(field_paths=["data"])
-            .to_dict()
+        ref = await document_cache.get_document(
+            protocol_name, "cumulative", f"cumulative_{field_name}"
         )
 
         if ref is None:
@@ -838,7 +806,7 @@ def recent_pull_requests(
         },
     },
 )
-def recent_commits(
+async def recent_commits(
     protocol_name: str = Path(..., description="Protocol name"),
 ):
     """
@@ -847,11 +815,8 @@ def recent_commits(
     """
 
     try:
-        ref = (
-            db.collection(f"{protocol_name}-cumulative")
-            .document("cumulative_recent_commits")
-            .get(field_paths=["data"])
-            .to_dict()
+        ref = await document_cache.get_document(
+            protocol_name, "cumulative", "cumulative_recent_commits"
         )
 
         if ref is None:
@@ -906,7 +871,7 @@ def recent_commits(
         },
     },
 )
-def recent_releases(
+async def recent_releases(
     protocol_name: str = Path(..., description="Protocol name"),
 ):
     """
@@ -915,11 +880,8 @@ def recent_releases(
     """
 
     try:
-        ref = (
-            db.collection(f"{protocol_name}-cumulative")
-            .document("cumulative_recent_releases")
-            .get(field_paths=["data"])
-            .to_dict()
+        ref = await document_cache.get_document(
+            protocol_name, "cumulative", "cumulative_recent_releases"
         )
 
         if ref is None:
@@ -938,3 +900,81 @@ def recent_releases(
         raise HTTPException(status_code=204, detail="Content is empty.")
 
     return data
+
+
+class EcosystemWidget(str, Enum):
+    info = "info"
+    commit_activity = "commit_activity"
+    participation = "participation"
+    code_frequency = "code_frequency"
+    punch_card = "punch_card"
+    language_breakdown = "language_breakdown"
+    issue_count = "issue_count"
+    most_active_issues = "most_active_issues"
+    pull_request_count = "pull_request_count"
+    recent_created_issues = "recent_created_issues"
+    recent_updated_issues = "recent_updated_issues"
+    recent_created_pull_requests = "recent_created_pull_requests"
+    recent_updated_pull_requests = "recent_updated_pull_requests"
+    recent_commits = "recent_commits"
+    recent_releases = "recent_releases"
+
+
+@router.get(
+    "/{protocol_name}/batch",
+    dependencies=[Depends(get_current_user)],
+    tags=["Github - Ecosystem"],
+    responses={
+        200: {
+            "description": "Cumulative widgets of the protocol",
+            "content": {
+                "application/json": {
+                    "example": {
+                        "info": {"fork_count": 2174, "issue_count": 1302},
+                        "recent_releases": None,
+                    }
+                }
+            },
+        },
+        404: {
+            "description": "Not found",
+            "content": {
+                "application/json": {"example": {"error": "Error description"}}
+            },
+        },
+    },
+)
+async def batch(
+    protocol_name: str = Path(..., description="Protocol name"),
+    widgets: List[EcosystemWidget] = Query(..., description="Widgets to return"),
+):
+    """
+    Returns the data of several cumulative widgets of the protocol in one response, keyed by
+    widget name, so a dashboard page is loaded with a single request. Widgets that are not found
+    are null.
+
+    The data is returned as stored, the endpoints of the widgets may filter or reshape it.
+    """
+
+    names = list(dict.fromkeys(widget.value for widget in widgets))
+
+    try:
+        refs = await document_cache.get_documents(
+            protocol_name, "cumulative", [f"cumulative_{name}" for name in names]
+        )
+        data = {
+            name: (refs[f"cumulative_{name}"] or {}).get("data", None) for name in names
+        }
+
+        if all(value is None for value in data.values()):
+            raise exceptions.NotFound("Collection or document not found")
+
+    except exceptions.NotFound as ex:
+        # Handle case where document or collection does not exist
+        raise HTTPException(status_code=404, detail=str(ex))
+
+    except Exception as e:
+        # Handle other exceptions
+        raise HTTPException(status_code=500, detail=f"An error occurred {str(e)}")
+
+    return data
@@ -4,7 +4,7 @@ from fastapi import HTTPException
 from fastapi import Path, HTTPException
 from google.cloud import exceptions
 from fastapi import Depends, HTTPException
-from ..api import get_current_user, db
+from ..api import get_current_user, document_cache
 
 router = APIRouter()
 
@@ -90,7 +90,7 @@ router = APIRouter()
         },
     },
 )
-def project_leaderboard(
+async def project_leaderboard(
     protocol_name: str = Path(..., description="Protocol name"),
 ):
     """
@@ -99,11 +99,8 @@ def project_leaderboard(
     """
 
     try:
-        ref = (
-            db.collection(f"{protocol_name}-leaderboard")
-            .document("project_leaderboard")
-            .get(field_paths=["data"])
-            .to_dict()
+        ref = await document_cache.get_document(
+            protocol_name, "leaderboard", "project_leaderboard"
         )
 
         if ref is None:
@@ -166,7 +163,7 @@ def project_leaderboard(
         },
     },
 )
-def project_contributors(
+async def project_contributors(
     protocol_name: str = Path(..., description="Protocol name"),
 ):
     """
@@ -175,11 +172,8 @@ def project_contributors(
     """
 
     try:
-        ref = (
-            db.collection(f"{protocol_name}-leaderboard")
-            .document("contributor_leaderboard")
-            .get(field_paths=["data"])
-            .to_dict()
+        ref = await document_cache.get_document(
+            protocol_name, "leaderboard", "contributor_leaderboard"
         )
 
         if ref is None:
@@ -1,11 +1,12 @@
 from fastapi import APIRouter
 from fastapi import Depends, HTTPException
 from enum import Enum
+from typing import List
 from fastapi import HTTPException
 from fastapi import Query, Path, HTTPException
 from google.cloud import exceptions
 from fastapi import Depends, HTTPException
-from ..api import get_current_user, db
+from ..api import get_current_user, document_cache
 
 router = APIRouter()
 
@@ -78,7 +79,7 @@ router = APIRouter()
         },
     },
 )
-def repository_info(
+async def repository_info(
     protocol_name: str = Path(..., description="Protocol name"),
     owner: str = Query(..., description="Project owner name"),
     repo: str = Query(..., description="Project repository name"),
@@ -91,13 +92,8 @@ def repository_info(
     """
 
     try:
-        ref = (
-            db.collection(f"{protocol_name}-widgets")
-            .document("repositories")
-            .collection(f"{owner}#{repo}")
-            .document("repository_info")
-            .get(field_paths=["data"])
-            .to_dict()
+        ref = await document_cache.get_document(
+            protocol_name, "widgets", "repository_info", f"{owner}#{repo}"
         )
 
         if ref is None:
@@ -150,7 +146,7 @@ def repository_info(
         },
     },
 )
-def health_score(
+async def health_score(
     protocol_name: str = Path(..., description="Protocol name"),
     owner: str = Query(..., description="Project owner name"),
     repo: str = Query(..., description="Project repository name"),
@@ -171,13 +167,8 @@ def health_score(
     """
 
     try:
-        ref = (
-            db.collection(f"{protocol_name}-widgets")
-            .document("repositories")
-            .collection(f"{owner}#{repo}")
-            .document("health_score")
-            .get(field_paths=["data"])
-            .to_dict()
+        ref = await document_cache.get_document(
+            protocol_name, "widgets", "health_score", f"{owner}#{repo}"
         )
 
         if ref is None:
@@ -229,7 +220,7 @@ def health_score(
         },
     },
 )
-def commit_activity(
+async def commit_activity(
     protocol_name: str = Path(..., description="Protocol name"),
     owner: str = Query(..., description="Project owner name"),
     repo: str = Query(..., description="Project repository name"),
@@ -242,13 +233,8 @@ def commit_activity(
     """
 
     try:
-        ref = (
-            db.collection(f"{protocol_name}-widgets")
-            .document("repositories")
-            .collection(f"{owner}#{repo}")
-            .document("commit_activity")
-            .get(field_paths=["data"])
-            .to_dict()
+        ref = await document_cache.get_document(
+            protocol_name, "widgets", "commit_activity", f"{owner}#{repo}"
         )
 
         if ref is None:
@@ -313,7 +299,7 @@ def commit_activity(
         },
     },
 )
-def participation(
+async def participation(
     protocol_name: str = Path(..., description="Protocol name"),
     owner: str = Query(..., description="Project owner name"),
     repo: str = Query(..., description="Project repository name"),
@@ -328,13 +314,8 @@ def participation(
     """
 
     try:
-        ref = (
-            db.collection(f"{protocol_name}-widgets")
-            .document("repositories")
-            .collection(f"{owner}#{repo}")
-            .document("participation")
-            .get(field_paths=["data"])
-            .to_dict()
+        ref = await document_cache.get_document(
+            protocol_name, "widgets", "participation", f"{owner}#{repo}"
         )
 
         if ref is None:
@@ -383,7 +364,7 @@ def participation(
         },
     },
 )
-def participation_count(
+async def participation_count(
     protocol_name: str = Path(..., description="Protocol name"),
     owner: str = Query(..., description="Project owner name"),
     repo: str = Query(..., description="Project repository name"),
@@ -395,13 +376,8 @@ def participation_count(
     """
 
     try:
-        ref = (
-            db.collection(f"{protocol_name}-widgets")
-            .document("repositories")
-            .collection(f"{owner}#{repo}")
-            .document("participation_count")
-            .get(field_paths=["data"])
-            .to_dict()
+        ref = await document_cache.get_document(
+            protocol_name, "widgets", "participation_count", f"{owner}#{repo}"
         )
 
         if ref is None:
@@ -462,7 +438,7 @@ def participation_count(
         },
     },
 )
-def code_frequency(
+async def code_frequency(
     protocol_name: str = Path(..., description="Protocol name"),
     owner: str = Query(..., description="Project owner name"),
     repo: str = Query(..., description="Project repository name"),
@@ -475,13 +451,8 @@ def code_frequency(
     """
 
     try:
-        ref = (
-            db.collection(f"{protocol_name}-widgets")
-            .document("repositories")
-            .collection(f"{owner}#{repo}")
-            .document("code_frequency")
-            .get(field_paths=["data"])
-            .to_dict()
+        ref = await document_cache.get_document(
+            protocol_name, "widgets", "code_frequency", f"{owner}#{repo}"
         )
 
         if ref is None:
@@ -530,7 +501,7 @@ def code_frequency(
         },
     },
 )
-def punch_card(
+async def punch_card(
     protocol_name: str = Path(..., description="Protocol name"),
     owner: str = Query(..., description="Project owner name"),
     repo: str = Query(..., description="Project repository name"),
@@ -550,13 +521,8 @@ def punch_card(
     """
 
     try:
-        ref = (
-            db.collection(f"{protocol_name}-widgets")
-            .document("repositories")
-            .collection(f"{owner}#{repo}")
-            .document("punch_card")
-            .get(field_paths=["data"])
-            .to_dict()
+        ref = await document_cache.get_document(
+            protocol_name, "widgets", "punch_card", f"{owner}#{repo}"
         )
 
         if ref is None:
@@ -627,7 +593,7 @@ def punch_card(
         },
     },
 )
-def contributors(
+async def contributors(
     protocol_name: str = Path(..., description="Protocol name"),
     owner: str = Query(..., description="Project owner name"),
     repo: str = Query(..., description="Project repository name"),
@@ -651,24 +617,11 @@ def contributors(
         # if ref is None:
         #     raise exceptions.NotFound('Collection or document not found')
 
-        doc_base = (
-            db.collection(f"{protocol_name}-widgets")
-            .document("repositories")
-            .collection(f"{owner}#{repo}")
+        # Contributors are chunked in documents that start with 'contributors' in their name
+        data = await document_cache.get_chunked_documents(
+            protocol_name, "widgets", "contributors", f"{owner}#{repo}"
         )
 
-        # Initialize an empty list to hold all contributors
-        data = []
-
-        # Fetch all documents that start with 'contributors' in their name
-        all_docs = doc_base.list_documents()
-        for doc in all_docs:
-            if "contributors" in doc.id:
-                # Get 'data' field from each 'contributors' document and extend the all_contributors list
-                doc_dict = doc.get().to_dict()
-                if doc_dict and "data" in doc_dict:
-                    data.extend(doc_dict["data"])
-
     except exceptions.NotFound as ex:
         # Handle case where document or collection does not exist
         raise HTTPException(status_code=404, detail=str(ex))
@@ -751,7 +704,7 @@ def contributors(
         },
     },
 )
-def community_profile(
+async def community_profile(
     protocol_name: str = Path(..., description="Protocol name"),
     owner: str = Query(..., description="Project owner name"),
     repo: str = Query(..., description="Project repository name"),
@@ -770,13 +723,8 @@ def community_profile(
     """
 
     try:
-        ref = (
-            db.collection(f"{protocol_name}-widgets")
-            .document("repositories")
-            .collection(f"{owner}#{repo}")
-            .document("community_profile")
-            .get(field_paths=["data"])
-            .to_dict()
+        ref = await document_cache.get_document(
+            protocol_name, "widgets", "community_profile", f"{owner}#{repo}"
         )
 
         if ref is None:
@@ -824,7 +772,7 @@ def community_profile(
         },
     },
 )
-def language_breakdown(
+async def language_breakdown(
     protocol_name: str = Path(..., description="Protocol name"),
     owner: str = Query(..., description="Project owner name"),
     repo: str = Query(..., description="Project repository name"),
@@ -836,13 +784,8 @@ def language_breakdown(
     """
 
     try:
-        ref = (
-            db.collection(f"{protocol_name}-widgets")
-            .document("repositories")
-            .collection(f"{owner}#{repo}")
-            .document("language_breakdown")
-            .get(field_paths=["data"])
-            .to_dict()
+        ref = await document_cache.get_document(
+            protocol_name, "widgets", "language_breakdown", f"{owner}#{repo}"
         )
 
         if ref is None:
@@ -892,7 +835,7 @@ def language_breakdown(
         },
     },
 )
-def issue_count(
+async def issue_count(
     protocol_name: str = Path(..., description="Protocol name"),
     owner: str = Query(..., description="Project owner name"),
     repo: str = Query(..., description="Project repository name"),
@@ -904,26 +847,19 @@ def issue_count(
     """
 
     try:
-        ref = (
-            db.collection(f"{protocol_name}-widgets")
-            .document("repositories")
-            .collection(f"{owner}#{repo}")
-            .document("issue_count")
-            .get(field_paths=["data"])
-            .to_dict()
+        ref = await document_cache.get_document(
+            protocol_name, "widgets", "issue_count", f"{owner}#{repo}"
         )
 
         if ref is None:
             raise exceptions.NotFound("Collection or document not found")
 
         try:
-            ref2 = (
-                db.collection(f"{protocol_name}-widgets")
-                .document("repositories")
-                .collection(f"{owner}#{repo}")
-                .document("average_days_to_close_issues")
-                .get(field_paths=["data"])
-                .to_dict()
+            ref2 = await document_cache.get_document(
+                protocol_name,
+                "widgets",
+                "average_days_to_close_issues",
+                f"{owner}#{repo}",
             )
 
         except Exception:
@@ -994,7 +930,7 @@ class MostActiveIssuesInterval(str, Enum):
         },
     },
 )
-def most_active_issues(
+async def most_active_issues(
     protocol_name: str = Path(..., description="Protocol name"),
     owner: str = Query(..., description="Project owner name"),
     repo: str = Query(..., description="Project repository name"),
@@ -1012,13 +948,8 @@ def most_active_issues(
     """
 
     try:
-        ref = (
-            db.collection(f"{protocol_name}-widgets")
-            .document("repositories")
-            .collection(f"{owner}#{repo}")
-            .document("most_active_issues")
-            .get(field_paths=["data"])
-            .to_dict()
+        ref = await document_cache.get_document(
+            protocol_name, "widgets", "most_active_issues", f"{owner}#{repo}"
         )
 
         if ref is None:
@@ -1074,7 +1005,7 @@ def most_active_issues(
         },
     },
 )
-def pull_request_count(
+async def pull_request_count(
     protocol_name: str = Path(..., description="Protocol name"),
     owner: str = Query(..., description="Project owner name"),
     repo: str = Query(..., description="Project repository name"),
@@ -1086,26 +1017,19 @@ def pull_request_count(
     """
 
     try:
-        ref = (
-            db.collection(f"{protocol_name}-widgets")
-            .document("repositories")
-            .collection(f"{owner}#{repo}")
-            .document("pull_request_count")
-            .get(field_paths=["data"])
-            .to_dict()
+        ref = await document_cache.get_document(
+            protocol_name, "widgets", "pull_request_count", f"{owner}#{repo}"
         )
 
         if ref is None:
             raise exceptions.NotFound("Collection or document not found")
 
         try:
-            ref2 = (
-                db.collection(f"{protocol_name}-widgets")
-                .document("repositories")
-                .collection(f"{owner}#{repo}")
-                .document("average_days_to_close_pull_requests")
-                .get(field_paths=["data"])
-                .to_dict()
+            ref2 = await document_cache.get_document(
+                protocol_name,
+                "widgets",
+                "average_days_to_close_pull_requests",
+                f"{owner}#{repo}",
             )
 
         except Exception:
@@ -1173,7 +1097,7 @@ class RecentIssuesOrder(str, Enum):
         },
     },
 )
-def recent_issues(
+async def recent_issues(
     protocol_name: str = Path(..., description="Protocol name"),
     owner: str = Query(..., description="Project owner name"),
     repo: str = Query(..., description="Project repository name"),
@@ -1198,13 +1122,8 @@ def recent_issues(
         field_name = "recent_updated_issues"
 
     try:
-        collection_ref = (
-            db.collection(f"{protocol_name}-widgets")
-            .document("repositories")
-            .collection(f"{owner}#{repo}")
-            .document(field_name)
-            .get(field_paths=["data"])
-            .to_dict()
+        collection_ref = await document_cache.get_document(
+            protocol_name, "widgets", field_name, f"{owner}#{repo}"
         )
 
         if collection_ref is None:
@@ -1272,7 +1191,7 @@ class RecentPullRequestOrder(str, Enum):
         },
     },
 )
-def recent_pull_requests(
+async def recent_pull_requests(
     protocol_name: str = Path(..., description="Protocol name"),
     owner: str = Query(..., description="Project owner name"),
     repo: str = Query(..., description="Project repository name"),
@@ -1291,13 +1210,8 @@ def recent_pull_requests(
         field_name = "recent_updated_pull_requests"
 
     try:
-        collection_ref = (
-            db.collection(f"{protocol_name}-widgets")
-            .document("repositories")
-            .collection(f"{owner}#{repo}")
-            .document(field_name)
-            .get(field_paths=["data"])
-            .to_dict()
+        collection_ref = await document_cache.get_document(
+            protocol_name, "widgets", field_name, f"{owner}#{repo}"
         )
 
         if collection_ref is None:
@@ -1360,7 +1274,7 @@ def recent_pull_requests(
         },
     },
 )
-def recent_stargazing_activity(
+async def recent_stargazing_activity(
     protocol_name: str = Path(..., description="Protocol name"),
     owner: str = Query(..., description="Project owner name"),
     repo: str = Query(..., description="Project repository name"),
@@ -1372,13 +1286,8 @@ def recent_stargazing_activity(
     """
 
     try:
-        ref = (
-            db.collection(f"{protocol_name}-widgets")
-            .document("repositories")
-            .collection(f"{owner}#{repo}")
-            .document("recent_stargazing_activity")
-            .get(field_paths=["data"])
-            .to_dict()
+        ref = await document_cache.get_document(
+            protocol_name, "widgets", "recent_stargazing_activity", f"{owner}#{repo}"
         )
 
         if ref is None:
@@ -1436,7 +1345,7 @@ class IssueActivityInterval(str, Enum):
         },
     },
 )
-def issue_activity(
+async def issue_activity(
     protocol_name: str = Path(..., description="Protocol name"),
     owner: str = Query(..., description="Project owner name"),
     repo: str = Query(..., description="Project repository name"),
@@ -1450,13 +1359,8 @@ def issue_activity(
     """
 
     try:
-        ref = (
-            db.collection(f"{protocol_name}-widgets")
-            .document("repositories")
-            .collection(f"{owner}#{repo}")
-            .document(f"issue_chart_{interval.value}")
-            .get(field_paths=["data"])
-            .to_dict()
+        ref = await document_cache.get_document(
+            protocol_name, "widgets", f"issue_chart_{interval.value}", f"{owner}#{repo}"
         )
 
         if ref is None:
@@ -1582,7 +1486,7 @@ class PullRequestActivityInterval(str, Enum):
         },
     },
 )
-def pull_request_activity(
+async def pull_request_activity(
     protocol_name: str = Path(..., description="Protocol name"),
     owner: str = Query(..., description="Project owner name"),
     repo: str = Query(..., description="Project repository name"),
@@ -1596,13 +1500,11 @@ def pull_request_activity(
     """
 
     try:
-        ref = (
-            db.collection(f"{protocol_name}-widgets")
-            .document("repositories")
-            .collection(f"{owner}#{repo}")
-            .document(f"pull_request_chart_{interval.value}")
-            .get(field_paths=["data"])
-            .to_dict()
+        ref = await document_cache.get_document(
+            protocol_name,
+            "widgets",
+            f"pull_request_chart_{interval.value}",
+            f"{owner}#{repo}",
         )
 
         if ref is None:
@@ -1731,7 +1633,7 @@ def pull_request_activity(
         },
     },
 )
-def recent_commits(
+async def recent_commits(
     protocol_name: str = Path(..., description="Protocol name"),
     owner: str = Query(..., description="Project owner name"),
     repo: str = Query(..., description="Project repository name"),
@@ -1743,13 +1645,8 @@ def recent_commits(
     """
 
     try:
-        ref = (
-            db.collection(f"{protocol_name}-widgets")
-            .document("repositories")
-            .collection(f"{owner}#{repo}")
-            .document("recent_commits")
-            .get(field_paths=["data"])
-            .to_dict()
+        ref = await document_cache.get_document(
+            protocol_name, "widgets", "recent_commits", f"{owner}#{repo}"
         )
 
         if ref is None:
@@ -1804,7 +1701,7 @@ def recent_commits(
         },
     },
 )
-def recent_releases(
+async def recent_releases(
     protocol_name: str = Path(..., description="Protocol name"),
     owner: str = Query(..., description="Project owner name"),
     repo: str = Query(..., description="Project repository name"),
@@ -1815,13 +1712,8 @@ def recent_releases(
     """
 
     try:
-        ref = (
-            db.collection(f"{protocol_name}-widgets")
-            .document("repositories")
-            .collection(f"{owner}#{repo}")
-            .document("recent_releases")
-            .get(field_paths=["data"])
-            .to_dict()
+        ref = await document_cache.get_document(
+            protocol_name, "widgets", "recent_releases", f"{owner}#{repo}"
         )
 
         if ref is None:
@@ -1840,3 +1732,104 @@ def recent_releases(
         raise HTTPException(status_code=204, detail="Content is empty.")
 
     return data[-10:]
+
+
+class ProjectWidget(str, Enum):
+    repository_info = "repository_info"
+    health_score = "health_score"
+    commit_activity = "commit_activity"
+    participation = "participation"
+    participation_count = "participation_count"
+    code_frequency = "code_frequency"
+    punch_card = "punch_card"
+    contributors = "contributors"
+    community_profile = "community_profile"
+    language_breakdown = "language_breakdown"
+    issue_count = "issue_count"
+    average_days_to_close_issue = "average_days_to_close_issue"
+    most_active_issues = "most_active_issues"
+    pull_request_count = "pull_request_count"
+    average_days_to_close_pull_request = "average_days_to_close_pull_request"
+    recent_created_issues = "recent_created_issues"
+    recent_updated_issues = "recent_updated_issues"
+    recent_created_pull_requests = "recent_created_pull_requests"
+    recent_updated_pull_requests = "recent_updated_pull_requests"
+    recent_stargazing_activity = "recent_stargazing_activity"
+    issue_chart_week = "issue_chart_week"
+    issue_chart_month = "issue_chart_month"
+    issue_chart_year = "issue_chart_year"
+    pull_request_chart_week = "pull_request_chart_week"
+    pull_request_chart_month = "pull_request_chart_month"
+    pull_request_chart_year = "pull_request_chart_year"
+    recent_commits = "recent_commits"
+    recent_releases = "recent_releases"
+
+
+@router.get(
+    "/{protocol_name}/batch",
+    dependencies=[Depends(get_current_user)],
+    tags=["Github - Project"],
+    responses={
+        200: {
+            "description": "Widgets of the repository",
+            "content": {
+                "application/json": {
+                    "example": {
+                        "health_score": {"total": 82},
+                        "issue_count": {"open": 12, "closed": 204},
+                        "recent_releases": None,
+                    }
+                }
+            },
+        },
+        404: {
+            "description": "Not found",
+            "content": {
+                "application/json": {"example": {"error": "Error description"}}
+            },
+        },
+    },
+)
+async def batch(
+    protocol_name: str = Path(..., description="Protocol name"),
+    owner: str = Query(..., description="Project owner name"),
+    repo: str = Query(..., description="Project repository name"),
+    widgets: List[ProjectWidget] = Query(..., description="Widgets to return"),
+):
+    """
+    Returns the data of several widgets of the repository in one response, keyed by widget name,
+    so a dashboard page is loaded with a single request. Widgets that are not found are null.
+
+    The data is returned as stored, the endpoints of the widgets may filter or reshape it.
+    """
+
+    names = list(dict.fromkeys(widget.value for widget in widgets))
+    documents = [name for name in names if name != ProjectWidget.contributors.value]
+
+    try:
+        refs = await document_cache.get_documents(
+            protocol_name, "widgets", documents, f"{owner}#{repo}"
+        )
+        data = {name: (ref or {}).get("data", None) for name, ref in refs.items()}
+
+        if ProjectWidget.contributors.value in names:
+            # contributors are chunked in several documents
+            data[ProjectWidget.contributors.value] = (
+                await document_cache.get_chunked_documents(
+                    protocol_name, "widgets", "contributors", f"{owner}#{repo}"
+                )
+                or None
+            )
+
+        if all(value is None for value in data.values()):
+            raise exceptions.NotFound("Collection or document not found")
+
+    except exceptions.NotFound as ex:
+        # Handle case where document or collection does not exist
+        raise HTTPException(status_code=404, detail=str(ex))
+
+    except Exception as e:
+        # Handle other exceptions
+        raise HTTPException(status_code=500, detail=f"An error occurred {str(e)}")
+
+    return {name: data[name] for name in names}
@@ -5,7 +5,7 @@ from fastapi import HTTPException
 from fastapi import Query, Path, HTTPException
 from google.cloud import exceptions
 from fastapi import Depends
-from ..api import get_current_user, db
+from ..api import get_current_user, document_cache
 
 router = APIRouter()
 
@@ -63,7 +63,7 @@ class VotingPowerInterval(Enum):
         },
     },
 )
-def voting_power_chart(
+async def voting_power_chart(
     protocol_name: str = Path(..., description="Protocol name"),
     interval: VotingPowerInterval = Query(
         VotingPowerInterval.WEEK, description="Interval to group by"
@@ -75,11 +75,8 @@ def voting_power_chart(
     """
 
     try:
-        ref = (
-            db.collection(f"{protocol_name}-governance")
-            .document(f"voting_power_chart_{interval.value.lower()}")
-            .get(field_paths=["data"])
-            .to_dict()
+        ref = await document_cache.get_document(
+            protocol_name, "governance", f"voting_power_chart_{interval.value.lower()}"
         )
 
         if ref is None:
@@ -172,7 +169,7 @@ class DelegateSortField(Enum):
         },
     },
 )
-def delegates(
+async def delegates(
     protocol_name: str = Path(..., description="Protocol name"),
     sort_by: DelegateSortField = Query(
         DelegateSortField.VOTING_WEIGHT, description="Sort by"
@@ -184,11 +181,8 @@ def delegates(
     """
 
     try:
-        ref = (
-            db.collection(f"{protocol_name}-governance")
-            .document(f"delegates_{sort_by.value.lower()}")
-            .get(field_paths=["data"])
-            .to_dict()
+        ref = await document_cache.get_document(
+            protocol_name, "governance", f"delegates_{sort_by.value.lower()}"
         )
 
         if ref is None:
@@ -376,7 +370,7 @@ def delegates(
         },
     },
 )
-def proposals(
+async def proposals(
     protocol_name: str = Path(..., description="Protocol name"),
 ):
     """
@@ -385,11 +379,8 @@ def proposals(
     """
 
     try:
-        ref = (
-            db.collection(f"{protocol_name}-governance")
-            .document("proposals")
-            .get(field_paths=["data"])
-            .to_dict()
+        ref = await document_cache.get_document(
+            protocol_name, "governance", "proposals"
         )
 
         if ref is None:
@@ -501,7 +492,7 @@ def proposals(
         },
     },
 )
-def info(
+async def info(
     protocol_name: str = Path(..., description="Protocol name"),
 ):
     """
@@ -510,11 +501,8 @@ def info(
     """
 
     try:
-        ref = (
-            db.collection(f"{protocol_name}-governance")
-            .document("governance_info")
-            .get(field_paths=["data"])
-            .to_dict()
+        ref = await document_cache.get_document(
+            protocol_name, "governance", "governance_info"
         )
 
         if ref is None:
@@ -596,7 +584,7 @@ def info(
         },
     },
 )
-def safes(
+async def safes(
     protocol_name: str = Path(..., description="Protocol name"),
 ):
     """
@@ -605,12 +593,7 @@ def safes(
     """
 
     try:
-        ref = (
-            db.collection(f"{protocol_name}-governance")
-            .document("safes")
-            .get(field_paths=["data"])
-            .to_dict()
-        )
+        ref = await document_cache.get_document(protocol_name, "governance", "safes")
 
         if ref is None:
             raise exceptions.NotFound("Collection or document not found")
@@ -4,7 +4,7 @@ from fastapi import HTTPException
 from fastapi import Query, Path, HTTPException
 from google.cloud import exceptions
 from fastapi import Depends, HTTPException
-from ..api import get_current_user, db
+from ..api import get_current_user, document_cache
 
 router = APIRouter()
 
@@ -85,7 +85,7 @@ router = APIRouter()
         },
     },
 )
-def asset(
+async def asset(
     protocol_name: str = Path(..., description="Protocol name"),
 ):
     """
@@ -94,12 +94,7 @@ def asset(
     """
 
     try:
-        ref = (
-            db.collection(f"{protocol_name}-messari")
-            .document("asset")
-            .get(field_paths=["data"])
-            .to_dict()
-        )
+        ref = await document_cache.get_document(protocol_name, "messari", "asset")
 
         if ref is None:
             raise exceptions.NotFound("Collection or document not found")
@@ -354,7 +349,7 @@ def asset(
         },
     },
 )
-def asset_profile(
+async def asset_profile(
     protocol_name: str = Path(..., description="Protocol name"),
 ):
     """
@@ -363,11 +358,8 @@ def asset_profile(
     """
 
     try:
-        ref = (
-            db.collection(f"{protocol_name}-messari")
-            .document("asset_profile")
-            .get(field_paths=["data"])
-            .to_dict()
+        ref = await document_cache.get_document(
+            protocol_name, "messari", "asset_profile"
         )
 
         if ref is None:
@@ -841,7 +833,7 @@ def asset_profile(
         },
     },
 )
-def asset_metrics(
+async def asset_metrics(
     protocol_name: str = Path(..., description="Protocol name"),
 ):
     """
@@ -850,11 +842,8 @@ def asset_metrics(
     """
 
     try:
-        ref = (
-            db.collection(f"{protocol_name}-messari")
-            .document("asset_metrics")
-            .get(field_paths=["data"])
-            .to_dict()
+        ref = await document_cache.get_document(
+            protocol_name, "messari", "asset_metrics"
         )
 
         if ref is None:
@@ -906,7 +895,7 @@ def asset_metrics(
         },
     },
 )
-def indexed_timeseries_list(
+async def indexed_timeseries_list(
     protocol_name: str = Path(..., description="Protocol name"),
 ):
     """
@@ -915,11 +904,8 @@ def indexed_timeseries_list(
     """
 
     try:
-        ref = (
-            db.collection(f"{protocol_name}-messari")
-            .document("indexed_timeseries_list")
-            .get(field_paths=["data"])
-            .to_dict()
+        ref = await document_cache.get_document(
+            protocol_name, "messari", "indexed_timeseries_list"
         )
 
         if ref is None:
@@ -965,7 +951,7 @@ def indexed_timeseries_list(
         },
     },
 )
-def timeseries(
+async def timeseries(
     protocol_name: str = Path(..., description="Protocol name"),
     timeseries_name: str = Query(..., description="Timeseries name"),
 ):
@@ -975,11 +961,8 @@ def timeseries(
     """
 
     try:
-        ref = (
-            db.collection(f"{protocol_name}-messari")
-            .document(timeseries_name)
-            .get(field_paths=["data"])
-            .to_dict()
+        ref = await document_cache.get_document(
+            protocol_name, "messari", timeseries_name
         )
 
         if ref is None:
@@ -4,7 +4,7 @@ from fastapi import HTTPException
 from fastapi import Query, Path, HTTPException
 from google.cloud import exceptions
 from fastapi import Depends
-from ..api import get_current_user, db
+from ..api import get_current_user, document_cache
 from tools.helpers import PipelineType
 
 router = APIRouter()
@@ -31,7 +31,7 @@ router = APIRouter()
         },
     },
 )
-def get_last_updated(
+async def get_last_updated(
     protocol_name: str = Path(..., description="Protocol name"),
     page_type: PipelineType = Query(
         PipelineType.GITHUB_PROJECTS, description="Page type"
@@ -43,11 +43,8 @@ def get_last_updated(
     """
 
     try:
-        ref = (
-            db.collection(f"{protocol_name}-last-updated")
-            .document(page_type.value)
-            .get(field_paths=["data"])
-            .to_dict()
+        ref = await document_cache.get_document(
+            protocol_name, "last-updated", page_type.value
         )
 
         if ref is None:
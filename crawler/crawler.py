@@ -1,20 +1,49 @@
-import toml
-import requests
 import logging
+import os
 from github.github_actor import GithubActor
+from github.github_graphql_batch import GithubGraphqlBatcher
+from tools.write_buffer import WriteBuffer
 from .flow_adapter import FlowAdapter
+from .ecosystem_source import EcosystemSource
 import re
 
 logger = logging.getLogger(__name__)
 
 
 class Crawler:
+    # fields of a repository needed for its project metadata
+    REPOSITORY_SELECTION = """
+                    description
+                    repositoryTopics(first: 100) {
+                        nodes {
+                            topic {
+                                name
+                            }
+                        }
+                    }
+                    url
+                    stargazerCount
+                    owner {
+                        avatarUrl
+                    }
+                    createdAt
+                    updatedAt
+                    isFork
+                    isArchived
+                    isEmpty
+    """
+    REPOSITORY_SELECTION_NODES = 101
+
     def __init__(self, app, db, actor: GithubActor):
         self.base_url = "https://raw.githubusercontent.com/electric-capital/crypto-ecosystems/master/data/ecosystems/"
         self.app = app
         self.db = db
         self.actor = actor
         self.adapters = []
+        # repositories are looked up with batched graphql queries, several of them in flight
+        self.batcher = GithubGraphqlBatcher(
+            actor, max_aliases=100, concurrency=int(os.environ.get("CRAWLER_WORKERS", 8))
+        )
 
     def check_adapters(self, protocol_name):
         # adaptors for custom rules for crawler per protocol
@@ -59,38 +88,106 @@ class Crawler:
 
         return name
 
-    def fetch_toml(self, toml_name):
-        toml_url = self.base_url + f"{toml_name[0:1]}/{toml_name}"
-
-        # Download the file from the URL
-        response = requests.get(toml_url)
-        content = response.content.decode("utf-8")
+    def get_source(self, crawler_config):
+        # a local checkout of crypto-ecosystems can be used instead of downloading the tomls
+        local_path = crawler_config.get("local_path", None) or os.environ.get("CRYPTO_ECOSYSTEMS_PATH", None)
+        return EcosystemSource(
+            self.base_url,
+            local_path=local_path,
+            cache_dir=os.environ.get("CRAWLER_CACHE_DIR", ".cache/ecosystems"),
+        )
 
-        # Parse the TOML file
-        data = toml.loads(content)
+    def collect_repos(self, source, toml_names, include_sub_ecosystem):
+        """Collects the repositories of the tomls, walking their sub ecosystems breadth first."""
+        repos = set()
+        visited = set()
+        level = list(toml_names)
+        while level:
+            # sub ecosystems shared by several parents are fetched once
+            level = [toml_name for toml_name in dict.fromkeys(level) if toml_name not in visited]
+            visited.update(level)
+            if not level:
+                break
+
+            logger.info(f"[*] Fetching {len(level)} ecosystem tomls")
+            next_level = []
+            for toml_name, data in source.fetch_all(level).items():
+                if data is None:
+                    continue
+
+                repos = repos.union(set([repo["url"] for repo in data.get("repo", [])]))
+                if include_sub_ecosystem:
+                    for sub_ecosystem in data.get("sub_ecosystems", []):
+                        logger.info(f"[*] Sub ecosystem: {sub_ecosystem}")
+                        next_level.append(self._transform_ecosystem_name(sub_ecosystem))
+
+            level = next_level
+
+        logger.info(f"[*] Collected repositories of {len(visited)} ecosystem tomls")
+        return repos
 
-        logger.info(f"Fetched {toml_name}")
-        return data
+    def fetch_repositories(self, repositories):
+        """Looks up (owner, repo) pairs, returns a dictionary of (owner, repo) -> repository data or None."""
+        selections = [
+            ((owner, repo), owner, repo, self.REPOSITORY_SELECTION, self.REPOSITORY_SELECTION_NODES)
+            for owner, repo in repositories
+        ]
+        results = self.batcher.fetch(selections)
+
+        # selections of failed batches are retried once in smaller batches
+        missing = [selection for selection in selections if selection[0] not in results]
+        if missing:
+            logger.warning(f"[!] Looking up {len(missing)} repositories again in smaller batches.")
+            retry_batcher = GithubGraphqlBatcher(
+                self.actor, max_aliases=10, concurrency=self.batcher.concurrency
+            )
+            results.update(retry_batcher.fetch(missing))
 
-    def collect_repos(self, toml_name, include_sub_ecosystem, repos=None, data=None):
-        if repos is None:
-            repos = set()
+        return results
 
+    def get_repository_metadata(self, owner, repo_name, data):
         if data is None:
-            logger.info(f"[*] Main toml file: {toml_name}")
-            data = self.fetch_toml(toml_name)
-            repos = repos.union(set([repo["url"] for repo in data["repo"]]))
-
-        if include_sub_ecosystem:
-            for sub_ecosystem in data["sub_ecosystems"]:
-                logger.info(f"[*] Sub ecosystem: {sub_ecosystem}")
-                toml_name = self._transform_ecosystem_name(sub_ecosystem)
-                data = self.fetch_toml(toml_name)
-                if data["sub_ecosystems"]:
-                    repos = self.collect_repos(toml_name, repos, data)
-                else:
-                    repos = repos.union(set([repo["url"] for repo in data["repo"]]))
-        return repos
+            logger.warning(
+                f"[-] {owner}/{repo_name} is not accessible. Will be added to project metadata list, but will not be included in statistics."
+            )
+            return {
+                "owner": owner,
+                "repo": repo_name,
+                "is_closed": True,
+                "valid": False,
+                "categories.lvl0": [],
+                "url": f"https://github.com/{owner}/{repo_name}",
+                "stargazers_count": 0,
+            }
+
+        repo_metadata = {
+            "owner": owner,
+            "repo": repo_name,
+            "description": data["description"],
+            "categories.lvl0": [
+                node["topic"]["name"] for node in data["repositoryTopics"]["nodes"]
+            ],
+            "url": data["url"],
+            "stargazers_count": data["stargazerCount"],
+            "avatar_url": data["owner"]["avatarUrl"],
+            "created_at": data["createdAt"],
+            "updated_at": data["updatedAt"],
+            "is_fork": data["isFork"],
+            "is_archived": data["isArchived"],
+            "is_empty": data["isEmpty"],
+            "is_closed": False,
+        }
+        if (
+            repo_metadata["is_empty"]
+            or repo_metadata["is_archived"]
+            or repo_metadata["is_fork"]
+        ):
+            repo_metadata["valid"] = False
+
+        else:
+            repo_metadata["valid"] = True
+
+        return repo_metadata
 
     def run(self, protocol_name, crawler_config):
         logger.info(f"[*] Running crawler for {protocol_name} protocol")
@@ -101,59 +198,27 @@ class Crawler:
             [toml_name.lower() for toml_name in crawler_config["tomls"]]
         )
 
-        repos = set()
-        for crawler_toml in crawler_tomls:
-            repos = repos.union(
-                self.collect_repos(crawler_toml, include_sub_ecosystem, repos=repos)
-            )
+        repos = self.collect_repos(
+            self.get_source(crawler_config), crawler_tomls, include_sub_ecosystem
+        )
 
         logger.info(f"[*] Found {len(repos)} repos for {protocol_name} protocol")
 
-        repo_metadata_list = []
+        repositories = []
         for repo in repos:
             url_parts = repo.split("/")
-            owner = url_parts[-2]
-            repo_name = url_parts[-1]
-
-            data = self.actor.check_repo_validity(owner, repo_name)
-            if data is False:
-                logger.warning(
-                    f"[-] {owner}/{repo_name} is not accessible. Will be added to project metadata list, but will not be included in statistics."
-                )
-                repo_metadata = {
-                    "owner": owner,
-                    "repo": repo_name,
-                    "is_closed": True,
-                    "valid": False,
-                    "categories.lvl0": [],
-                    "url": f"https://github.com/{owner}/{repo_name}",
-                    "stargazers_count": 0,
-                }
-            else:
-                repo_metadata = {
-                    "owner": owner,
-                    "repo": repo_name,
-                    "description": data["description"],
-                    "categories.lvl0": [] if data["topics"] is None else data["topics"],
-                    "url": data["html_url"],
-                    "stargazers_count": data["stargazers_count"],
-                    "avatar_url": data["owner"]["avatar_url"],
-                    "created_at": data["created_at"],
-                    "updated_at": data["updated_at"],
-                    "is_fork": data["fork"],
-                    "is_archived": data["archived"],
-                    "is_empty": data["size"] == 0,
-                    "is_closed": False,
-                }
-                if (
-                    repo_metadata["is_empty"]
-                    or repo_metadata["is_archived"]
-                    or repo_metadata["is_fork"]
-                ):
-                    repo_metadata["valid"] = False
-
-                else:
-                    repo_metadata["valid"] = True
+            repositories.append((url_parts[-2], url_parts[-1]))
+
+        results = self.fetch_repositories(repositories)
+
+        repo_metadata_list = []
+        for owner, repo_name in repositories:
+            if (owner, repo_name) not in results:
+                # lookup failed, the stored metadata is left as it is
+                logger.warning(f"[!] Could not look up {owner}/{repo_name}, skipping.")
+                continue
+
+            repo_metadata = self.get_repository_metadata(owner, repo_name, results[(owner, repo_name)])
 
             for adapter in self.adapters:
                 adapter.run(repo_metadata)
@@ -166,16 +231,19 @@ class Crawler:
             repo_metadata_list, key=lambda x: x["stargazers_count"], reverse=True
         )
 
+        write_buffer = WriteBuffer(self.db)
         for repo_metadata in repo_metadata_list:
-            self.db.collection(f"{protocol_name}-projects").document(
-                f"{repo_metadata['owner']}#{repo_metadata['repo']}"
-            ).set(
+            write_buffer.set(
+                self.db.collection(f"{protocol_name}-projects").document(
+                    f"{repo_metadata['owner']}#{repo_metadata['repo']}"
+                ),
                 repo_metadata,
                 merge=True,
             )
-            logger.info(
-                f"[./] Added {repo_metadata['owner']}/{repo_metadata['repo']} to Firestore Database."
-            )
+        write_buffer.flush()
+        logger.info(
+            f"[./] Added {len(repo_metadata_list)} repositories of {protocol_name} protocol to Firestore Database."
+        )
 
         logger.info(f"[*] Crawler for {protocol_name} protocol finished.")
 
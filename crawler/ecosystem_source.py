@@ -0,0 +1,111 @@
+import os
+import json
+import asyncio
+import hashlib
+import logging
+import httpx
+import toml
+import tools.async_http as async_http
+
+logger = logging.getLogger(__name__)
+
+
+class EcosystemSource:
+    """
+    Loads the ecosystem TOMLs of crypto-ecosystems, either from GitHub or from a local checkout
+    of the repository.
+
+    Parsed TOMLs are kept on disk, addressed by the hash of their content, so a file is only
+    parsed again when it changes. Downloads send the ETag of the last response, and unchanged
+    files are answered from the cache.
+    """
+
+    def __init__(self, base_url, local_path=None, cache_dir=".cache/ecosystems", concurrency=16):
+        self.base_url = base_url
+        self.local_path = local_path
+        self.cache_dir = cache_dir
+        self.concurrency = concurrency
+        os.makedirs(os.path.join(cache_dir, "objects"), exist_ok=True)
+        os.makedirs(os.path.join(cache_dir, "names"), exist_ok=True)
+
+    def get_relative_path(self, toml_name):
+        return f"{toml_name[0:1]}/{toml_name}"
+
+    def read_json(self, path):
+        try:
+            with open(path, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def write_json(self, path, data):
+        # written to a temporary file first, so a crash never leaves a truncated file behind
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(data, f, default=str)
+        os.replace(tmp_path, path)
+
+    def get_object_path(self, digest):
+        return os.path.join(self.cache_dir, "objects", f"{digest}.json")
+
+    def get_index_path(self, toml_name):
+        return os.path.join(self.cache_dir, "names", f"{toml_name}.json")
+
+    def load(self, toml_name, content, etag=None):
+        digest = hashlib.sha256(content).hexdigest()
+        data = self.read_json(self.get_object_path(digest))
+        if data is None:
+            data = toml.loads(content.decode("utf-8"))
+            self.write_json(self.get_object_path(digest), data)
+
+        self.write_json(self.get_index_path(toml_name), {"etag": etag, "digest": digest})
+        return data
+
+    async def fetch_async(self, toml_name):
+        if self.local_path:
+            path = os.path.join(self.local_path, "data", "ecosystems", self.get_relative_path(toml_name))
+            try:
+                with open(path, "rb") as f:
+                    return self.load(toml_name, f.read())
+            except OSError as e:
+                logger.warning(f"[!] Could not read {path}: {e}")
+                return None
+
+        url = self.base_url + self.get_relative_path(toml_name)
+        entry = self.read_json(self.get_index_path(toml_name))
+        cached = self.read_json(self.get_object_path(entry["digest"])) if entry else None
+
+        headers = {}
+        if cached is not None and entry.get("etag", None):
+            headers["If-None-Match"] = entry["etag"]
+
+        try:
+            response = await async_http.get_client().get(url, headers=headers)
+        except httpx.HTTPError as e:
+            logger.warning(f"[!] Could not fetch {toml_name}: {e}")
+            return cached
+
+        if response.status_code == 304:
+            logger.info(f"Not modified {toml_name}")
+            return cached
+
+        if response.status_code != 200:
+            logger.warning(f"[!] Could not fetch {toml_name}. Status code: {response.status_code}")
+            return None
+
+        logger.info(f"Fetched {toml_name}")
+        return self.load(toml_name, response.content, response.headers.get("etag", None))
+
+    async def fetch_all_async(self, toml_names):
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def fetch(toml_name):
+            async with semaphore:
+                return await self.fetch_async(toml_name)
+
+        results = await asyncio.gather(*[fetch(toml_name) for toml_name in toml_names])
+        return dict(zip(toml_names, results))
+
+    def fetch_all(self, toml_names):
+        """Returns a dictionary of toml name -> parsed toml, or None if it could not be loaded."""
+        return async_http.run_sync(self.fetch_all_async(list(toml_names)))
@@ -1,28 +1,29 @@
-import requests
-import time
+import asyncio
 import logging
+import tools.async_http as async_http
 import tools.log_config as log_config
 
 logger = logging.getLogger(__name__)
 
 
 class DevelopersActor:
-    @property
-    def get_session(self):
-        return self.session
-
-    def __init__(self, session=None):
+    def __init__(self, client=None):
         self.developer_api_endpoint = "https://www.developerreport.com"
 
         self.developer_rest_headers = {
             "Accept": "application/json",
         }
 
-        self.session = session
-        if not self.session:
-            self.session = requests.Session()
+        # shared pooled client of the running event loop is used when no client is given
+        self.client = client
+
+    def get_client(self):
+        return self.client or async_http.get_client()
 
     def developer_rest_make_request(self, url, variables=None, max_page_fetch=float("inf")):
+        return async_http.run_sync(self.developer_rest_make_request_async(url, variables, max_page_fetch))
+
+    async def developer_rest_make_request_async(self, url, variables=None, max_page_fetch=float("inf")):
         url = f"{self.developer_api_endpoint}{url}"
         result = []
 
@@ -30,8 +31,7 @@ class DevelopersActor:
         logger.info(f". [=] Fetching data from Graphql API from {self.developer_api_endpoint}")
         while url and (current_fetch_count < max_page_fetch):
             logger.info(f". page {current_fetch_count + 1}/{max_page_fetch} of {url}")
-            self.session.headers.update(self.developer_rest_headers)
-            response = self.session.get(url, params=variables)
+            response = await self.get_client().get(url, params=variables, headers=self.developer_rest_headers)
 
             if response.status_code == 200:
                 json_response = response.json()
@@ -39,7 +39,7 @@ class DevelopersActor:
 
             elif response.status_code == 429:
                 logger.warning(". [!] Rate limit exceeded. Waiting for 10 seconds.")
-                time.sleep(10)
+                await asyncio.sleep(10)
                 continue
 
             else:
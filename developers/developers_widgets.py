@@ -2,14 +2,22 @@ from .developers_actor import DevelopersActor
 import logging
 import tools.log_config as log_config
 import datetime
+from tools.write_buffer import WriteBuffer
 
 logger = logging.getLogger(__name__)
 
 
 class DevelopersWidget:
-    def __init__(self, actor: DevelopersActor, collection_refs, developer_ecosystem):
+    def __init__(
+        self,
+        actor: DevelopersActor,
+        collection_refs,
+        developer_ecosystem,
+        write_buffer=None,
+    ):
         self.actor = actor
         self.collection_refs = collection_refs
+        self.write_buffer = write_buffer or WriteBuffer()
         self.developer_ecosystem = developer_ecosystem
 
     def is_valid(self, response):
@@ -39,7 +47,10 @@ class DevelopersWidget:
             "count": int(data["title"].replace(",", "")),
             "subtitle": data["footnote"],
         }
-        self.collection_refs["developers"].document("full_time").set({"data": formatted_data})
+        self.write_buffer.set(
+            self.collection_refs["developers"].document("full_time"),
+            {"data": formatted_data},
+        )
 
     def monthly_active_devs(self, **kwargs):
         data = self.actor.developer_rest_make_request(url=f"/api/stats/mau/{self.developer_ecosystem}", variables={})
@@ -53,7 +64,10 @@ class DevelopersWidget:
             "count": int(data["title"].replace(",", "")),
             "subtitle": data["footnote"],
         }
-        self.collection_refs["developers"].document("monthly_active_devs").set({"data": formatted_data})
+        self.write_buffer.set(
+            self.collection_refs["developers"].document("monthly_active_devs"),
+            {"data": formatted_data},
+        )
 
     def total_repos(self, **kwargs):
         data = self.actor.developer_rest_make_request(
@@ -70,7 +84,10 @@ class DevelopersWidget:
             "count": int(data["title"].replace(",", "")),
             "subtitle": data["footnote"],
         }
-        self.collection_refs["developers"].document("total_repos").set({"data": formatted_data})
+        self.write_buffer.set(
+            self.collection_refs["developers"].document("total_repos"),
+            {"data": formatted_data},
+        )
 
     def total_commits(self, **kwargs):
         data = self.actor.developer_rest_make_request(
@@ -87,7 +104,10 @@ class DevelopersWidget:
             "count": int(data["title"].replace(",", "")),
             "subtitle": data["footnote"],
         }
-        self.collection_refs["developers"].document("total_commits").set({"data": formatted_data})
+        self.write_buffer.set(
+            self.collection_refs["developers"].document("total_commits"),
+            {"data": formatted_data},
+        )
 
     def monthly_active_dev_chart(self, **kwargs):
         data = self.actor.developer_rest_make_request(
@@ -107,7 +127,10 @@ class DevelopersWidget:
             "yAxis": {},
             "series": data["series"],
         }
-        self.collection_refs["developers"].document("monthly_active_dev_chart").set({"data": formatted_data})
+        self.write_buffer.set(
+            self.collection_refs["developers"].document("monthly_active_dev_chart"),
+            {"data": formatted_data},
+        )
 
     def total_monthly_active_dev_chart(self, **kwargs):
         data = self.actor.developer_rest_make_request(
@@ -126,7 +149,12 @@ class DevelopersWidget:
             "yAxis": {},
             "series": data["series"],
         }
-        self.collection_refs["developers"].document("total_monthly_active_dev_chart").set({"data": formatted_data})
+        self.write_buffer.set(
+            self.collection_refs["developers"].document(
+                "total_monthly_active_dev_chart"
+            ),
+            {"data": formatted_data},
+        )
 
     def dev_type_table(self, **kwargs):
         data = self.actor.developer_rest_make_request(
@@ -144,7 +172,10 @@ class DevelopersWidget:
             "header": header,
             "rows": data["dataSource"],
         }
-        self.collection_refs["developers"].document("dev_type_table").set({"data": data})
+        self.write_buffer.set(
+            self.collection_refs["developers"].document("dev_type_table"),
+            {"data": data},
+        )
 
     def monthly_commits_by_dev_type_chart(self, **kwargs):
         data = self.actor.developer_rest_make_request(
@@ -164,7 +195,12 @@ class DevelopersWidget:
             "yAxis": {},
             "series": data["series"],
         }
-        self.collection_refs["developers"].document("monthly_commits_by_dev_type_chart").set({"data": formatted_data})
+        self.write_buffer.set(
+            self.collection_refs["developers"].document(
+                "monthly_commits_by_dev_type_chart"
+            ),
+            {"data": formatted_data},
+        )
 
     def monthly_commits_chart(self, **kwargs):
         data = self.actor.developer_rest_make_request(
@@ -184,4 +220,7 @@ class DevelopersWidget:
             "yAxis": {},
             "series": data["series"],
         }
-        self.collection_refs["developers"].document("monthly_commits_chart").set({"data": formatted_data})
+        self.write_buffer.set(
+            self.collection_refs["developers"].document("monthly_commits_chart"),
+            {"data": formatted_data},
+        )
@@ -1,17 +1,13 @@
-import requests
 import os
-import time
+import asyncio
 import logging
+import tools.async_http as async_http
 
 logger = logging.getLogger(__name__)
 
 
 class DiscourseActor:
-    @property
-    def get_session(self):
-        return self.session
-
-    def __init__(self, base_url, session=None):
+    def __init__(self, base_url, client=None):
         self.api_username = os.environ.get("DISCOURSE_API_USERNAME", None)
         self.api_key = os.environ.get("DISCOURSE_API_KEY", None)
         self.discourse_api_endpoint = base_url  # https://forum.onflow.org
@@ -23,12 +19,21 @@ class DiscourseActor:
             self.discourse_rest_headers["Api-Username"] = self.api_username
             self.discourse_rest_headers["Api-Key"] = self.api_key
 
-        self.session = session
-        if not self.session:
-            self.session = requests.Session()
+        # shared pooled client of the running event loop is used when no client is given
+        self.client = client
+
+    def get_client(self):
+        return self.client or async_http.get_client()
 
     def discourse_rest_make_request(
         self, url, variables=None, max_page_fetch=float("inf")
+    ):
+        return async_http.run_sync(
+            self.discourse_rest_make_request_async(url, variables, max_page_fetch)
+        )
+
+    async def discourse_rest_make_request_async(
+        self, url, variables=None, max_page_fetch=float("inf")
     ):
         url = f"{self.discourse_api_endpoint}{url}"
         result = []
@@ -37,8 +42,9 @@ class DiscourseActor:
         logger.info(f". [=] Fetching data from REST API from {url}")
         while url and (current_fetch_count < max_page_fetch):
             logger.info(f". page {current_fetch_count + 1}/{max_page_fetch} of {url}")
-            self.session.headers.update(self.discourse_rest_headers)
-            response = self.session.get(url, params=variables)
+            response = await self.get_client().get(
+                url, params=variables, headers=self.discourse_rest_headers
+            )
 
             if response.status_code == 200:
                 json_response = response.json()
@@ -46,7 +52,7 @@ class DiscourseActor:
 
             elif response.status_code == 429:
                 logger.warning(". [...] Rate limit reached. Sleeping for 10 seconds.")
-                time.sleep(10)
+                await asyncio.sleep(10)
                 continue
 
             else:
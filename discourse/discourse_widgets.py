@@ -1,14 +1,16 @@
 from .discourse_actor import DiscourseActor
 import logging
 from datetime import datetime
+from tools.write_buffer import WriteBuffer
 
 logger = logging.getLogger(__name__)
 
 
 class DiscourseWidgets:
-    def __init__(self, actor: DiscourseActor, collection_refs):
+    def __init__(self, actor: DiscourseActor, collection_refs, write_buffer=None):
         self.actor = actor
         self.collection_refs = collection_refs
+        self.write_buffer = write_buffer or WriteBuffer()
 
     def is_valid(self, response):
         if response is None:
@@ -72,8 +74,9 @@ class DiscourseWidgets:
             logger.info("[#invalid] No topics for protocol ")
             return
 
-        self.collection_refs["discourse"].document("topic_activity").set(
-            {"data": date_and_count}
+        self.write_buffer.set(
+            self.collection_refs["discourse"].document("topic_activity"),
+            {"data": date_and_count},
         )
 
         data = {
@@ -92,7 +95,9 @@ class DiscourseWidgets:
             if isinstance(v, float):
                 data[k] = round(v, 2)
 
-        self.collection_refs["discourse"].document("topic_metrics").set({"data": data})
+        self.write_buffer.set(
+            self.collection_refs["discourse"].document("topic_metrics"), {"data": data}
+        )
 
     def users(self, **kwargs):
         # Please note that the /directory_items endpoint may not return all users if some of them have very low activity levels. Depending on the Discourse setup, users might need to reach a certain level of activity before they are included in the directory.
@@ -177,7 +182,9 @@ class DiscourseWidgets:
             if isinstance(v, float):
                 data[k] = round(v, 2)
 
-        self.collection_refs["discourse"].document("user_metrics").set({"data": data})
+        self.write_buffer.set(
+            self.collection_refs["discourse"].document("user_metrics"), {"data": data}
+        )
 
     def categories(self, **kwargs):
         # formatting will be in frontend
@@ -226,8 +233,9 @@ class DiscourseWidgets:
                 category_data["subcategories"].append(sub_category_data)
             categories.append(category_data)
 
-        self.collection_refs["discourse"].document("categories").set(
-            {"data": categories}
+        self.write_buffer.set(
+            self.collection_refs["discourse"].document("categories"),
+            {"data": categories},
         )
 
     def tags(self, **kwargs):
@@ -248,7 +256,9 @@ class DiscourseWidgets:
             tags.append(tag_data)
 
         sorted_tags = sorted(tags, key=lambda k: k["count"], reverse=True)
-        self.collection_refs["discourse"].document("tags").set({"data": sorted_tags})
+        self.write_buffer.set(
+            self.collection_refs["discourse"].document("tags"), {"data": sorted_tags}
+        )
 
     def top_topics(self, **kwargs):
         topics = {}
@@ -287,7 +297,9 @@ class DiscourseWidgets:
                 if len(topics[interval]) == 10:
                     break
 
-        self.collection_refs["discourse"].document("top_topics").set({"data": topics})
+        self.write_buffer.set(
+            self.collection_refs["discourse"].document("top_topics"), {"data": topics}
+        )
 
     def latest_topics(self, **kwargs):
         latest_topics = {}
@@ -329,8 +341,9 @@ class DiscourseWidgets:
                 if len(latest_topics[order]) == 10:
                     break
 
-        self.collection_refs["discourse"].document("latest_topics").set(
-            {"data": latest_topics}
+        self.write_buffer.set(
+            self.collection_refs["discourse"].document("latest_topics"),
+            {"data": latest_topics},
         )
 
     def latest_posts(self, **kwargs):
@@ -365,8 +378,9 @@ class DiscourseWidgets:
             if len(latest_posts) == 10:
                 break
 
-        self.collection_refs["discourse"].document("latest_posts").set(
-            {"data": latest_posts}
+        self.write_buffer.set(
+            self.collection_refs["discourse"].document("latest_posts"),
+            {"data": latest_posts},
         )
 
     def top_users(self, **kwargs):
@@ -426,4 +440,6 @@ class DiscourseWidgets:
                     if len(top_users[interval][order]) == 10:
                         break
 
-        self.collection_refs["discourse"].document("top_users").set({"data": top_users})
+        self.write_buffer.set(
+            self.collection_refs["discourse"].document("top_users"), {"data": top_users}
+        )
@@ -7,6 +7,8 @@ import json
 import pyfiglet
 from crawler.crawler import Crawler
 from pipeline import Pipeline
+from tools.run_journal import RunJournal
+from tools.stage_scheduler import StageScheduler
 import tools.log_config as log_config
 import time
 import schedule
@@ -60,7 +62,11 @@ class Flowana:
 
         self.github_actor = GithubActor()
         self.crawler = Crawler(self.app, self.db, self.github_actor)
-        self.pipeline = Pipeline(self.app, self.db, self.github_actor)
+        # completed units of the update run, so a restarted run resumes where it stopped
+        self.journal = RunJournal(
+            os.environ.get("PIPELINE_JOURNAL_PATH", ".cache/run_journal.sqlite3"),
+            int(os.environ.get("PIPELINE_JOURNAL_MAX_AGE", 2 * 24 * 60 * 60)),
+        )
 
     def get_collection_refs(self, protocol_name):
         collection_refs = {
@@ -100,7 +106,11 @@ class Flowana:
     def schedule_tasks(self):
         # Start the jobs immediately upon initialization
         self.crawl_all_protocols(is_first=True)
-        self.update_all_protocols(is_first=True)
+        self.update_all_protocols(
+            is_first=True,
+            force_full_run=os.environ.get("PIPELINE_FORCE_FULL_RUN", "false").lower()
+            == "true",
+        )
 
         # Then schedule the jobs for subsequent runs
         # Schedule crawler to run every 4 weeks
@@ -163,8 +173,13 @@ class Flowana:
                 )
         logger.info("[*] Completed the crawling process for all protocols.")
 
-    def update_all_protocols(self, is_first=False):
+    def update_all_protocols(self, is_first=False, force_full_run=False):
         logger.info("[*] Starting the protocol update process for all protocols...")
+        # an interrupted run is resumed from its first incomplete unit, unless forced
+        self.journal.start_run(force_full_run)
+
+        # stages of all protocols run concurrently, within the limits of their upstreams
+        scheduler = StageScheduler()
         for protocol in self.protocols:
             protocol_name = protocol["name"]
             if is_first and not protocol["updater"]["index_now"]:
@@ -174,8 +189,11 @@ class Flowana:
                 continue
             if protocol["update"] is True:
                 self.run_protocol_update(
-                    protocol, self.get_collection_refs(protocol_name)
+                    protocol, self.get_collection_refs(protocol_name), scheduler
                 )
+
+        scheduler.run()
+        self.journal.finish_run()
         logger.info("[*] Completed the protocol update process for all protocols.")
 
     def run_crawler(self, protocol_name, collection_refs, crawler_config):
@@ -184,14 +202,16 @@ class Flowana:
             collection_refs["last_updated"], PipelineType.CRAWLER.value
         )
 
-    def run_protocol_update(self, protocol, collection_refs):
+    def run_protocol_update(self, protocol, collection_refs, scheduler):
         protocol_name = protocol["name"]
         logger.info(f"Updating protocol {protocol_name}")
         ascii_banner = pyfiglet.figlet_format(protocol_name, font="rectangles")
         print(ascii_banner)
 
-        self.pipeline.construct_pipeline(protocol, collection_refs)
-        self.pipeline.run_pipelines()
+        # every protocol has its own pipeline, so their stages can run at the same time
+        pipeline = Pipeline(self.app, self.db, self.github_actor, self.journal)
+        pipeline.construct_pipeline(protocol, collection_refs)
+        pipeline.add_stages(scheduler)
 
     def check_collection(self, collection_ref):
         # Check if the collection exists
@@ -1,19 +1,42 @@
 import requests
 import os
+import re
 import time
-from time import sleep
+import asyncio
 import logging
+import threading
+import httpx
+from .github_rate_limiter import GithubTokenPool
+from .github_etag_cache import GithubEtagCache
+import tools.async_http as async_http
 
 logger = logging.getLogger(__name__)
 
 
+class GithubStatsPending(Exception):
+    """Raised when GitHub is still computing the statistics of a repository."""
+
+    def __init__(self, url):
+        super().__init__(f"Statistics are being computed: {url}")
+        self.url = url
+
+
 class GithubActor:
-    @property
-    def get_session(self):
-        return self.session
+    # returned by conditional requests when the resource has not changed since the last request
+    NOT_MODIFIED = object()
+
+    def __init__(self, client=None):
+        # several tokens can be given as a comma separated list, their rate limits add up
+        bearer_keys = os.environ.get("GITHUB_BEARER_KEYS", None)
+        if bearer_keys:
+            self.bearer_keys = [key.strip() for key in bearer_keys.split(",") if key.strip()]
+        else:
+            self.bearer_keys = [os.environ["GITHUB_BEARER_KEY"]]
+        self.bearer_key = self.bearer_keys[0]
+        self.token_pool = GithubTokenPool(self.bearer_keys)
+        # graphql point cost of the query shapes, as reported by their last response
+        self.graphql_query_costs = {}
 
-    def __init__(self, session=None):
-        self.bearer_key = os.environ["GITHUB_BEARER_KEY"]
         self.github_graphql_endpoint = "https://api.github.com/graphql"
         self.github_graphql_headers = {"Authorization": f"Bearer {self.bearer_key}"}
 
@@ -23,46 +46,97 @@ class GithubActor:
             "X-GitHub-Api-Version": "2022-11-28",
             "Authorization": f"Bearer {self.bearer_key}",
         }
-        self.session = session
-        if not self.session:
-            self.session = requests.Session()
+        # shared pooled client of the running event loop is used when no client is given
+        self.client = client
 
-    def github_graphql_make_query(self, _query, variables=None, try_val=0):
+        self.etag_cache = GithubEtagCache(
+            os.environ.get("GITHUB_ETAG_CACHE_PATH", ".cache/github_etags.sqlite3"),
+            int(os.environ.get("GITHUB_ETAG_CACHE_MAX_AGE", 7 * 24 * 60 * 60)),
+        )
+        # etags of the responses received, recorded once what was made of them is stored
+        self.received_etags = {}
+        self.received_etags_lock = threading.Lock()
+
+    def get_etag_key(self, url, variables=None, etag_scope=None):
+        # the same resource is stored by every protocol that has the repository, each of them
+        # keeps its own etag
+        key = str(httpx.URL(f"{self.github_rest_endpoint}{url}", params=variables))
+        return f"{etag_scope}|{key}" if etag_scope else key
+
+    def commit_etag(self, cache_key):
+        """Records the etag received for cache_key, once the response has been stored."""
+        with self.received_etags_lock:
+            etag = self.received_etags.pop(cache_key, None)
+        if etag is not None:
+            self.etag_cache.set(cache_key, etag)
+
+    def get_client(self):
+        return self.client or async_http.get_client()
+
+    def get_graphql_headers(self, token):
+        return {**self.github_graphql_headers, "Authorization": f"Bearer {token}"}
+
+    def get_rest_headers(self, token):
+        return {**self.github_rest_headers, "Authorization": f"Bearer {token}"}
+
+    def with_rate_limit(self, _query):
+        # ask for the rate limit status alongside the data, the block is added to the top level selection
+        if "rateLimit" in _query:
+            return _query
+        _query = _query.rstrip()
+        return _query[:-1] + "    rateLimit {\n        cost\n        remaining\n        resetAt\n    }\n}"
+
+    def get_query_shape(self, _query):
+        # owners, names and timestamps are embedded as string literals, the queries differing
+        # only by those cost the same and share an entry, so the costs stay bounded
+        return re.sub(r'"(?:[^"\\]|\\.)*"', '""', _query)
+
+    async def github_graphql_make_query_async(self, _query, variables=None, try_val=0):
         logger.info(
             f". [=] Fetching data from Graphql API from {self.github_graphql_endpoint}"
         )
-        self.session.headers.update(self.github_graphql_headers)
-        response = self.session.post(
+        _query = self.with_rate_limit(_query)
+        query_shape = self.get_query_shape(_query)
+        token = await self.token_pool.acquire_async("graphql", self.graphql_query_costs.get(query_shape, 1))
+        headers = self.get_graphql_headers(token)
+        response = await self.get_client().post(
             self.github_graphql_endpoint,
             json={"query": _query, "variables": variables},
+            headers=headers,
         )
+        self.token_pool.update_from_headers(token, response.headers, "graphql")
 
         if response.status_code == 200:
             json_response = response.json()
+            rate_limit = (json_response.get("data", None) or {}).get("rateLimit", None)
+            if rate_limit:
+                self.token_pool.update_from_graphql(token, rate_limit)
+                self.graphql_query_costs[query_shape] = rate_limit["cost"]
             return json_response
 
         elif response.status_code in [202, 429]:
             logger.info(". [...] Waiting for the data to be ready.")
-            time.sleep(1.5)
-            return self.github_graphql_make_query(_query, variables)  # fetch again!
+            await asyncio.sleep(1.5)
+            return await self.github_graphql_make_query_async(_query, variables)  # fetch again!
 
         elif response.status_code in (301, 302):
-            response = self.session.post(
+            response = await self.get_client().post(
                 response.headers["location"],
                 json={"query": _query, "variables": variables},
+                headers=headers,
             )
 
-        elif response.status_code == 403:
-            self.rate_limit_wait(response.headers)
-            return self.github_graphql_make_query(_query, variables)
+        elif response.status_code == 403 and self.is_rate_limited(response.headers):
+            self.rate_limit_wait(response.headers, token, "graphql")
+            return await self.github_graphql_make_query_async(_query, variables)
 
         elif response.status_code == 502:
             logger.warning(". [-] Bad gateway.")
-            time.sleep(30)  # Wait for 10 second
+            await asyncio.sleep(30)  # Wait for 10 second
             if try_val > 5:
                 logger.warning(". [-] Too many tries. Aborting.")
                 return None
-            return self.github_graphql_make_query(
+            return await self.github_graphql_make_query_async(
                 _query, variables, try_val=try_val + 1
             )  # fetch again!
 
@@ -75,9 +149,21 @@ class GithubActor:
             logger.info(f". [#] Variables: {variables}")
             return None
 
-    def github_rest_make_request(
-        self, url, variables=None, max_page_fetch=float("inf"), try_val=0
+    async def github_rest_make_request_async(
+        self,
+        url,
+        variables=None,
+        max_page_fetch=float("inf"),
+        try_val=0,
+        conditional=False,
+        defer_pending=False,
+        etag_scope=None,
     ):
+        # conditional requests are meant for single page resources, such as the stats endpoints.
+        # NOT_MODIFIED is returned if the first page has not changed since it was last fetched,
+        # the etag of a response is only sent back once it is recorded with commit_etag.
+        # with defer_pending, GithubStatsPending is raised instead of waiting for the stats
+        cache_key = self.get_etag_key(url, variables, etag_scope) if conditional else None
         url = f"{self.github_rest_endpoint}{url}"
         logger.info(f". [=] Fetching data from REST API from {url}")
 
@@ -85,25 +171,43 @@ class GithubActor:
         current_fetch_count = 0
         while url and (current_fetch_count < max_page_fetch):
             logger.info(f". page {current_fetch_count + 1}/{max_page_fetch} of {url}")
-            self.session.headers.update(self.github_rest_headers)
-            response = self.session.get(url, params=variables)
+            token = await self.token_pool.acquire_async("core")
+            headers = self.get_rest_headers(token)
+
+            if cache_key is not None and current_fetch_count == 0:
+                etag = self.etag_cache.get(cache_key)
+                if etag is not None:
+                    headers["If-None-Match"] = etag
+
+            response = await self.get_client().get(url, params=variables, headers=headers)
+            self.token_pool.update_from_headers(token, response.headers, "core")
+
+            if response.status_code == 304:
+                logger.info(f". [*] Not modified since the last request: {url}")
+                return self.NOT_MODIFIED
 
-            if response.status_code in [202, 429]:
+            elif response.status_code == 202 and defer_pending:
+                raise GithubStatsPending(url)
+
+            elif response.status_code in [202, 429]:
                 logger.info(". [...] Waiting for the data to be ready.")
-                time.sleep(1)
+                await asyncio.sleep(1)
                 continue  # fetch again!
 
-            elif response.status_code == 403:
-                self.rate_limit_wait(response.headers)
+            elif response.status_code == 403 and self.is_rate_limited(response.headers):
+                self.rate_limit_wait(response.headers, token, "core")
                 continue
 
             elif response.status_code == 502:
                 logger.warning(". [-] Bad gateway.")
-                sleep(30)
+                await asyncio.sleep(30)
                 continue
 
             elif response.status_code == 200:
                 json_response = response.json()
+                if cache_key is not None and current_fetch_count == 0 and "etag" in response.headers:
+                    with self.received_etags_lock:
+                        self.received_etags[cache_key] = response.headers["etag"]
                 url = response.links.get("next", {}).get("url", None)
                 if max_page_fetch == 1:
                     return json_response
@@ -128,14 +232,87 @@ class GithubActor:
                 break
         return result
 
-    def rate_limit_wait(self, headers):
+    def github_graphql_make_query(self, _query, variables=None, try_val=0):
+        return async_http.run_sync(
+            self.github_graphql_make_query_async(_query, variables, try_val)
+        )
+
+    def github_rest_make_request(
+        self,
+        url,
+        variables=None,
+        max_page_fetch=float("inf"),
+        try_val=0,
+        conditional=False,
+        defer_pending=False,
+        etag_scope=None,
+    ):
+        return async_http.run_sync(
+            self.github_rest_make_request_async(
+                url,
+                variables,
+                max_page_fetch,
+                try_val,
+                conditional,
+                defer_pending,
+                etag_scope,
+            )
+        )
+
+    async def github_rest_prewarm_async(self, urls, concurrency=16, etag_scope=None):
+        # github starts computing the statistics of a repository on the first request, the
+        # responses are dropped and the etag cache is left untouched
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def prewarm(url):
+            async with semaphore:
+                etag = self.etag_cache.get(self.get_etag_key(url, etag_scope=etag_scope))
+                url = f"{self.github_rest_endpoint}{url}"
+                token = await self.token_pool.acquire_async("core")
+                headers = self.get_rest_headers(token)
+                if etag is not None:
+                    # unchanged statistics are answered with a 304, which costs no rate limit
+                    headers["If-None-Match"] = etag
+                try:
+                    response = await self.get_client().get(url, headers=headers)
+                except httpx.HTTPError as e:
+                    logger.warning(f". [-] Failed to prewarm {url}: {e}")
+                    return None
+                self.token_pool.update_from_headers(token, response.headers, "core")
+                return response.status_code
+
+        statuses = await asyncio.gather(*[prewarm(url) for url in urls])
+        logger.info(
+            f". [*] Prewarmed {len(urls)} statistics requests, {statuses.count(202)} of them are being computed."
+        )
+
+    def github_rest_prewarm(self, urls, concurrency=16, etag_scope=None):
+        return async_http.run_sync(
+            self.github_rest_prewarm_async(urls, concurrency, etag_scope)
+        )
+
+    def is_rate_limited(self, headers):
+        # 403 is also returned for forbidden resources, which must not be retried
+        return headers.get("x-ratelimit-remaining", None) == "0" or "retry-after" in headers
+
+    def rate_limit_wait(self, headers, token=None, resource="core"):
         logger.warning(
             ". [-] The user has exceeded the rate limit and needs to wait before making more requests."
         )
-        logger.info(f". [#] Rate limit: {headers['x-ratelimit-limit']}")
-        logger.info(f". [#] Remaining: {headers['x-ratelimit-remaining']}")
-        logger.info(f". [#] Reset time: {headers['x-ratelimit-reset']}")
-        reset_time = int(headers["x-ratelimit-reset"])
+        logger.info(f". [#] Rate limit: {headers.get('x-ratelimit-limit')}")
+        logger.info(f". [#] Remaining: {headers.get('x-ratelimit-remaining')}")
+        logger.info(f". [#] Reset time: {headers.get('x-ratelimit-reset')}")
+        if "retry-after" in headers:
+            # secondary rate limit
+            reset_time = int(time.time()) + int(headers["retry-after"])
+        else:
+            reset_time = int(headers.get("x-ratelimit-reset", time.time() + 60))
+
+        if token is not None:
+            # the token pool moves on to another token, or waits until the reset
+            self.token_pool.exhausted(token, headers.get("x-ratelimit-resource", resource), reset_time)
+            return
+
         time_to_wait = reset_time - int(time.time())
         if time_to_wait <= 0:
             return
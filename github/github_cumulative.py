@@ -7,15 +7,65 @@ from sklearn.preprocessing import RobustScaler
 import datetime
 from datetime import timedelta
 from scipy.stats import norm
+from tools.write_buffer import WriteBuffer
+import threading
 
 
 logger = logging.getLogger(__name__)
 
 
 class GithubCumulative:
-    def __init__(self, actor: GithubActor, collection_refs):
+    # repository documents read by the cumulative widgets
+    SWEEP_DOCUMENTS = [
+        "repository_info",
+        "commit_activity",
+        "raw_health_score",
+        "participation",
+        "code_frequency",
+        "punch_card",
+        "issue_count",
+        "most_active_issues",
+        "pull_request_count",
+        "language_breakdown",
+        "recent_created_issues",
+        "recent_updated_issues",
+        "recent_created_pull_requests",
+        "recent_updated_pull_requests",
+        "recent_commits",
+        "recent_releases",
+    ]
+
+    # fields of the repository documents summed by the cumulative widgets, the documents kept
+    # in memory during the run are cut down to them
+    SWEEP_FIELDS = {
+        "repository_info": [
+            "disk_usage",
+            "commit_comment_count",
+            "default_branch_commit_count",
+            "environment_count",
+            "fork_count",
+            "pull_request_count",
+            "issue_count",
+            "release_count",
+            "stargazers_count",
+            "watcher_count",
+        ],
+    }
+
+    # document references per batched read
+    SWEEP_BATCH_SIZE = 300
+
+    def __init__(self, actor: GithubActor, collection_refs, write_buffer=None, db=None):
         self.actor = actor
         self.collection_refs = collection_refs
+        self.write_buffer = write_buffer or WriteBuffer()
+        self.db = db
+        # document name -> list of (repository, data), read once for the whole cumulative stage
+        self.sweep = None
+        self.sweep_lock = threading.Lock()
+        # (repository, document name) -> data, written by the project pipeline during this run
+        self.observed = {}
+        self.observed_lock = threading.Lock()
 
     def is_valid(self, response):
         if response is None:
@@ -29,6 +79,88 @@ class GithubCumulative:
 
         return True
 
+    def observe(self, doc_ref, document_data, merge=False):
+        """
+        Write listener keeping the repository documents written by the project pipeline, so the
+        cumulative widgets don't read them back. They are kept until the cumulative stage is
+        over, only the fields of SWEEP_FIELDS for the documents listed there.
+        """
+        if merge or doc_ref.id not in self.SWEEP_DOCUMENTS:
+            return
+
+        repository_ref = doc_ref.parent
+        if repository_ref.parent is None or repository_ref.parent.path != self.get_repositories_path():
+            return
+
+        data = document_data.get("data", None)
+        fields = self.SWEEP_FIELDS.get(doc_ref.id, None)
+        if fields is not None and isinstance(data, dict):
+            data = {field: data[field] for field in fields if field in data}
+
+        with self.observed_lock:
+            self.observed[(repository_ref.id, doc_ref.id)] = data
+
+    def get_repositories_path(self):
+        return self.collection_refs["widgets"].document("repositories").path
+
+    def sweep_repositories(self):
+        repo_doc = self.collection_refs["widgets"].document("repositories")
+        repository_names = [subcollection.id for subcollection in repo_doc.collections()]
+
+        with self.observed_lock:
+            observed = dict(self.observed)
+
+        # only the documents which were not written during this run are read
+        refs = [
+            repo_doc.collection(repository_name).document(doc_name)
+            for repository_name in repository_names
+            for doc_name in self.SWEEP_DOCUMENTS
+            if (repository_name, doc_name) not in observed
+        ]
+
+        snapshots = {}
+        if self.db is not None:
+            for i in range(0, len(refs), self.SWEEP_BATCH_SIZE):
+                for snapshot in self.db.get_all(
+                    refs[i : i + self.SWEEP_BATCH_SIZE], field_paths=["data"]
+                ):
+                    snapshots[(snapshot.reference.parent.id, snapshot.reference.id)] = snapshot
+        else:
+            for ref in refs:
+                snapshots[(ref.parent.id, ref.id)] = ref.get(field_paths=["data"])
+
+        # keep the order of the repositories, reducers depend on it for ties
+        sweep = {doc_name: [] for doc_name in self.SWEEP_DOCUMENTS}
+        for repository_name in repository_names:
+            for doc_name in self.SWEEP_DOCUMENTS:
+                key = (repository_name, doc_name)
+                if key in observed:
+                    sweep[doc_name].append((repository_name, observed[key]))
+                    continue
+
+                snapshot = snapshots.get(key, None)
+                if snapshot is None or not snapshot.exists:
+                    continue
+                sweep[doc_name].append((repository_name, snapshot.to_dict().get("data", None)))
+
+        logger.info(
+            f"[#db] Read {len(refs)} documents of {len(repository_names)} repositories for cumulative widgets, {len(observed)} documents were kept from the project pipeline"
+        )
+        return sweep
+
+    def get_documents(self, doc_name):
+        """Returns (repository, data) of every repository having the document."""
+        with self.sweep_lock:
+            if self.sweep is None:
+                self.sweep = self.sweep_repositories()
+        return self.sweep.get(doc_name, [])
+
+    def clear_sweep(self):
+        with self.sweep_lock:
+            self.sweep = None
+        with self.observed_lock:
+            self.observed.clear()
+
     def cumulative_stats(self, **kwargs) -> None:
         cum_disk_usage = 0
         cum_commit_comment_count = 0
@@ -41,14 +173,7 @@ class GithubCumulative:
         cum_stargazers_count = 0
         cum_watcher_count = 0
 
-        repo_doc = self.collection_refs["widgets"].document("repositories")
-        for subcollection in repo_doc.collections():
-            doc_val = subcollection.document("repository_info").get()
-
-            if not doc_val.exists:
-                continue
-
-            data = doc_val.to_dict().get("data", None)
+        for _, data in self.get_documents("repository_info"):
             cum_disk_usage += data.get("disk_usage", 0)
             cum_commit_comment_count += data.get("commit_comment_count", 0)
 
@@ -65,7 +190,8 @@ class GithubCumulative:
             cum_stargazers_count += data.get("stargazers_count", 0)
             cum_watcher_count += data.get("watcher_count", 0)
 
-        self.collection_refs["cumulative"].document("cumulative_info").set(
+        self.write_buffer.set(
+            self.collection_refs["cumulative"].document("cumulative_info"),
             {
                 "data": {
                     "disk_usage": cum_disk_usage,
@@ -78,21 +204,13 @@ class GithubCumulative:
                     "release_count": cum_release_count,
                     "stargazers_count": cum_stargazers_count,
                     "watcher_count": cum_watcher_count,
-                }
-            }
+                },
+            },
         )
 
     def cumulative_commit_activity(self, **kwargs):
         d1 = None
-        repo_doc = self.collection_refs["widgets"].document("repositories")
-        for subcollection in repo_doc.collections():
-            doc_val = subcollection.document("commit_activity").get()
-
-            if not doc_val.exists:
-                continue
-
-            d2 = doc_val.to_dict().get("data", None)
-
+        for _, d2 in self.get_documents("commit_activity"):
             if d2 is None:
                 continue
             if d1 is None:
@@ -107,8 +225,9 @@ class GithubCumulative:
                     for d1, d2 in zip(d1, d2)
                 ]
 
-        self.collection_refs["cumulative"].document("cumulative_commit_activity").set(
-            {"data": d1}
+        self.write_buffer.set(
+            self.collection_refs["cumulative"].document("cumulative_commit_activity"),
+            {"data": d1},
         )
 
     def normalize_health_score(self, **kwargs):
@@ -134,19 +253,8 @@ class GithubCumulative:
             "E",
         ]
 
-        collection_docs = (
-            self.collection_refs["widgets"].document("repositories").collections()
-        )
-
         raw_scores = {}
-        for sub_collection in collection_docs:
-            doc_name = sub_collection.id
-            raw_health_score_doc = sub_collection.document("raw_health_score").get()
-
-            if not raw_health_score_doc.exists:
-                continue
-
-            data = raw_health_score_doc.to_dict().get("data", None)
+        for doc_name, data in self.get_documents("raw_health_score"):
             if data is None:
                 continue
             for key, value in data.items():
@@ -265,23 +373,22 @@ class GithubCumulative:
             scores["grade"] = determine_grade(scores["total"], percentile_bounds)
 
             # Update the documents in the database with the new scores and grades
-            self.collection_refs["widgets"].document("repositories").collection(
-                doc_name
-            ).document("health_score").set({"data": scores})
-            self.collection_refs["projects"].document(doc_name).set(
-                {"health_score": scores}, merge=True
+            self.write_buffer.set(
+                self.collection_refs["widgets"]
+                .document("repositories")
+                .collection(doc_name)
+                .document("health_score"),
+                {"data": scores},
+            )
+            self.write_buffer.set(
+                self.collection_refs["projects"].document(doc_name),
+                {"health_score": scores},
+                merge=True,
             )
 
     def cumulative_participation(self, **kwargs):
         d1 = None
-        repo_doc = self.collection_refs["widgets"].document("repositories")
-        for subcollection in repo_doc.collections():
-            doc_val = subcollection.document("participation").get()
-
-            if not doc_val.exists:
-                continue
-
-            d2 = doc_val.to_dict().get("data", None)
+        for _, d2 in self.get_documents("participation"):
             today_utc = (
                 datetime.datetime.utcnow()
             )  # Switch from datetime.now() to datetime.utcnow()
@@ -310,8 +417,9 @@ class GithubCumulative:
                     ],
                 }
 
-        self.collection_refs["cumulative"].document("cumulative_participation").set(
-            {"data": d1}
+        self.write_buffer.set(
+            self.collection_refs["cumulative"].document("cumulative_participation"),
+            {"data": d1},
         )
 
     def cumulative_code_frequency(self, **kwargs):
@@ -345,14 +453,7 @@ class GithubCumulative:
         # docs = self.collection_refs['widgets'].stream()
 
         d1 = None
-        repo_doc = self.collection_refs["widgets"].document("repositories")
-        for subcollection in repo_doc.collections():
-            doc_val = subcollection.document("code_frequency").get()
-
-            if not doc_val.exists:
-                continue
-
-            d2 = doc_val.to_dict().get("data", None)
+        for _, d2 in self.get_documents("code_frequency"):
             if d2 is None:
                 continue
             if d1 is None:
@@ -360,55 +461,45 @@ class GithubCumulative:
             else:
                 d1 = aggregate_sum(d1, d2)
 
-        self.collection_refs["cumulative"].document("cumulative_code_frequency").set(
-            {"data": d1}
+        self.write_buffer.set(
+            self.collection_refs["cumulative"].document("cumulative_code_frequency"),
+            {"data": d1},
         )
 
     def cumulative_punch_card(self, **kwargs):
         d1 = None
-        repo_doc = self.collection_refs["widgets"].document("repositories")
-        for subcollection in repo_doc.collections():
-            doc_val = subcollection.document("punch_card").get()
-
-            if not doc_val.exists:
-                continue
-
-            d2 = doc_val.to_dict().get("data", None)
+        for _, d2 in self.get_documents("punch_card"):
             if d2 is None:
                 continue
             if d1 is None:
-                d1 = d2
+                # copied, the swept documents are shared by all of the reducers
+                d1 = [dict(hour) for hour in d2]
             else:
                 for i in range(len(d1)):
                     d1[i]["commits"] = d1[i]["commits"] + d2[i]["commits"]
 
-        self.collection_refs["cumulative"].document("cumulative_punch_card").set(
-            {"data": d1}
+        self.write_buffer.set(
+            self.collection_refs["cumulative"].document("cumulative_punch_card"),
+            {"data": d1},
         )
 
     def cumulative_issue_count(self, **kwargs):
         cumulative_open_sum = 0
         cumulative_closed_sum = 0
 
-        repo_doc = self.collection_refs["widgets"].document("repositories")
-        for subcollection in repo_doc.collections():
-            doc_val = subcollection.document("issue_count").get()
-
-            if not doc_val.exists:
-                continue
-
-            data = doc_val.to_dict().get("data", None)
+        for _, data in self.get_documents("issue_count"):
 
             cumulative_open_sum += data["open"]
             cumulative_closed_sum += data["closed"]
 
-        self.collection_refs["cumulative"].document("cumulative_issue_count").set(
+        self.write_buffer.set(
+            self.collection_refs["cumulative"].document("cumulative_issue_count"),
             {
                 "data": {
                     "open": cumulative_open_sum,
                     "closed": cumulative_closed_sum,
-                }
-            }
+                },
+            },
         )
 
     def cumulative_most_active_issues(self, **kwargs):
@@ -417,14 +508,7 @@ class GithubCumulative:
         monthly = []
         yearly = []
 
-        repo_doc = self.collection_refs["widgets"].document("repositories")
-        for subcollection in repo_doc.collections():
-            doc_val = subcollection.document("most_active_issues").get()
-
-            if not doc_val.exists:
-                continue
-
-            data = doc_val.to_dict().get("data", None)
+        for _, data in self.get_documents("most_active_issues"):
 
             if data.get("day", None):
                 dayly.extend(data["day"])
@@ -450,57 +534,45 @@ class GithubCumulative:
                     yearly, key=lambda x: x["comments_count"], reverse=True
                 )[:10]
 
-        self.collection_refs["cumulative"].document(
-            "cumulative_most_active_issues"
-        ).set(
+        self.write_buffer.set(
+            self.collection_refs["cumulative"].document(
+                "cumulative_most_active_issues"
+            ),
             {
                 "data": {
                     "day": dayly,
                     "week": weekly,
                     "month": monthly,
                     "year": yearly,
-                }
-            }
+                },
+            },
         )
 
     def cumulative_pull_request_count(self, **kwargs):
         cumulative_open_sum = 0
         cumulative_closed_sum = 0
 
-        repo_doc = self.collection_refs["widgets"].document("repositories")
-        for subcollection in repo_doc.collections():
-            doc_val = subcollection.document("pull_request_count").get()
-
-            if not doc_val.exists:
-                continue
-
-            data = doc_val.to_dict().get("data", None)
+        for _, data in self.get_documents("pull_request_count"):
 
             cumulative_open_sum += data["open"]
             cumulative_closed_sum += data["closed"]
 
-        self.collection_refs["cumulative"].document(
-            "cumulative_pull_request_count"
-        ).set(
+        self.write_buffer.set(
+            self.collection_refs["cumulative"].document(
+                "cumulative_pull_request_count"
+            ),
             {
                 "data": {
                     "open": cumulative_open_sum,
                     "closed": cumulative_closed_sum,
-                }
-            }
+                },
+            },
         )
 
     def cumulative_language_breakdown(self, **kwargs):
         cumulative_data = {}
 
-        repo_doc = self.collection_refs["widgets"].document("repositories")
-        for subcollection in repo_doc.collections():
-            doc_val = subcollection.document("language_breakdown").get()
-
-            if not doc_val.exists:
-                continue
-
-            data = doc_val.to_dict().get("data", None)
+        for _, data in self.get_documents("language_breakdown"):
 
             for language in data:
                 if language["name"] in cumulative_data:
@@ -523,9 +595,12 @@ class GithubCumulative:
             }
             cumulative_flatten.append(flattened_language)
 
-        self.collection_refs["cumulative"].document(
-            "cumulative_language_breakdown"
-        ).set({"data": cumulative_flatten})
+        self.write_buffer.set(
+            self.collection_refs["cumulative"].document(
+                "cumulative_language_breakdown"
+            ),
+            {"data": cumulative_flatten},
+        )
 
     class CumulativeRecentIssuesOrder(Enum):
         CREATED_AT = "CREATED_AT"
@@ -541,14 +616,7 @@ class GithubCumulative:
             field_name = "recent_updated_issues"
 
         cumulative_recent_issues = []
-        repo_doc = self.collection_refs["widgets"].document("repositories")
-        for subcollection in repo_doc.collections():
-            doc_val = subcollection.document(field_name).get()
-
-            if not doc_val.exists:
-                continue
-
-            data = doc_val.to_dict().get("data", None)
+        for _, data in self.get_documents(field_name):
             cumulative_recent_issues.extend(data)
             cumulative_recent_issues = sorted(
                 cumulative_recent_issues,
@@ -556,8 +624,9 @@ class GithubCumulative:
                 reverse=True,
             )[:10]
 
-        self.collection_refs["cumulative"].document(f"cumulative_{field_name}").set(
-            {"data": cumulative_recent_issues}
+        self.write_buffer.set(
+            self.collection_refs["cumulative"].document(f"cumulative_{field_name}"),
+            {"data": cumulative_recent_issues},
         )
 
     class CumulativeRecentPullRequestsOrder(Enum):
@@ -576,14 +645,7 @@ class GithubCumulative:
             field_name = "recent_updated_pull_requests"
 
         cumulative_recent_issues = []
-        repo_doc = self.collection_refs["widgets"].document("repositories")
-        for subcollection in repo_doc.collections():
-            doc_val = subcollection.document(field_name).get()
-
-            if not doc_val.exists:
-                continue
-
-            data = doc_val.to_dict().get("data", None)
+        for _, data in self.get_documents(field_name):
 
             cumulative_recent_issues.extend(data)
             cumulative_recent_issues = sorted(
@@ -592,20 +654,14 @@ class GithubCumulative:
                 reverse=True,
             )[:10]
 
-        self.collection_refs["cumulative"].document(f"cumulative_{field_name}").set(
-            {"data": cumulative_recent_issues}
+        self.write_buffer.set(
+            self.collection_refs["cumulative"].document(f"cumulative_{field_name}"),
+            {"data": cumulative_recent_issues},
         )
 
     def cumulative_recent_commits(self, **kwargs):
         cumulative_recent_commits = []
-        repo_doc = self.collection_refs["widgets"].document("repositories")
-        for subcollection in repo_doc.collections():
-            doc_val = subcollection.document("recent_commits").get()
-
-            if not doc_val.exists:
-                continue
-
-            data = doc_val.to_dict().get("data", None)
+        for _, data in self.get_documents("recent_commits"):
 
             cumulative_recent_commits.extend(data)
             cumulative_recent_commits = sorted(
@@ -614,20 +670,14 @@ class GithubCumulative:
                 reverse=True,
             )[:10]
 
-        self.collection_refs["cumulative"].document("cumulative_recent_commits").set(
-            {"data": cumulative_recent_commits}
+        self.write_buffer.set(
+            self.collection_refs["cumulative"].document("cumulative_recent_commits"),
+            {"data": cumulative_recent_commits},
         )
 
     def cumulative_recent_releases(self, **kwargs):
         cumulative_recent_releases = []
-        repo_doc = self.collection_refs["widgets"].document("repositories")
-        for subcollection in repo_doc.collections():
-            doc_val = subcollection.document("recent_releases").get()
-
-            if not doc_val.exists:
-                continue
-
-            data = doc_val.to_dict().get("data", None)
+        for _, data in self.get_documents("recent_releases"):
             cumulative_recent_releases.extend(data)
             cumulative_recent_releases = sorted(
                 cumulative_recent_releases,
@@ -635,6 +685,7 @@ class GithubCumulative:
                 reverse=True,
             )[:10]
 
-        self.collection_refs["cumulative"].document("cumulative_recent_releases").set(
-            {"data": cumulative_recent_releases}
+        self.write_buffer.set(
+            self.collection_refs["cumulative"].document("cumulative_recent_releases"),
+            {"data": cumulative_recent_releases},
         )
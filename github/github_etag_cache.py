@@ -0,0 +1,52 @@
+import os
+import time
+import sqlite3
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class GithubEtagCache:
+    """
+    Persistent cache of the ETags of GitHub REST responses, keyed by request url and by the
+    collection the response is stored in.
+
+    Cached ETags are sent back with If-None-Match, and a 304 response, which is not counted
+    against the rate limit, tells that the stored widget is still up to date. Entries older than
+    `max_age` seconds are not used, so every resource is downloaded and written again once in a
+    while, even if it has not changed.
+    """
+
+    def __init__(self, path, max_age=7 * 24 * 60 * 60):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.path = path
+        self.max_age = max_age
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        with self.lock:
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS etags (url TEXT PRIMARY KEY, etag TEXT NOT NULL, updated_at REAL NOT NULL)"
+            )
+            self.connection.commit()
+
+    def get(self, url):
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT etag, updated_at FROM etags WHERE url = ?", (url,)
+            ).fetchone()
+
+        if row is None or row[1] < time.time() - self.max_age:
+            return None
+        return row[0]
+
+    def set(self, url, etag):
+        with self.lock:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO etags (url, etag, updated_at) VALUES (?, ?, ?)",
+                (url, etag, time.time()),
+            )
+            self.connection.commit()
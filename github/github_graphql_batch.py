@@ -0,0 +1,96 @@
+from .github_actor import GithubActor
+import asyncio
+import json
+import logging
+import tools.async_http as async_http
+
+logger = logging.getLogger(__name__)
+
+
+class GithubGraphqlBatcher:
+    """
+    Fuses `repository(owner:, name:)` selections of many repositories into aliased queries,
+    and splits the responses back per selection.
+    """
+
+    def __init__(self, actor: GithubActor, max_aliases=100, max_nodes=10000, concurrency=4):
+        self.actor = actor
+        # aliases per query, kept well under the node limit and the 10 seconds timeout of github
+        self.max_aliases = max_aliases
+        self.max_nodes = max_nodes
+        self.concurrency = concurrency
+
+    def build_query(self, batch):
+        aliases = []
+        for i, (key, owner, repo, selection, nodes) in enumerate(batch):
+            aliases.append(
+                f"r{i}: repository(owner: {json.dumps(owner)}, name: {json.dumps(repo)}) {{\n{selection}\n}}"
+            )
+        return "query {\n" + "\n".join(aliases) + "\n}"
+
+    def split(self, selections):
+        batches = []
+        batch, batch_nodes = [], 0
+        for selection in selections:
+            nodes = selection[4]
+            if batch and (len(batch) >= self.max_aliases or batch_nodes + nodes > self.max_nodes):
+                batches.append(batch)
+                batch, batch_nodes = [], 0
+            batch.append(selection)
+            batch_nodes += nodes
+        if batch:
+            batches.append(batch)
+        return batches
+
+    async def fetch_batch_async(self, batch):
+        result = await self.actor.github_graphql_make_query_async(self.build_query(batch))
+        data = result.get("data", None) if result else None
+        if not data:
+            # selections of a failed batch are left out, callers fall back to single queries
+            logger.warning(f"[!] Batched query of {len(batch)} selections failed.")
+            return {}
+
+        # error types of the aliases, a timeout or a rate limit can fail a single alias
+        alias_errors = {}
+        for error in result.get("errors", None) or []:
+            path = error.get("path", None) or []
+            if path:
+                alias_errors.setdefault(path[0], set()).add(error.get("type", None))
+
+        results = {}
+        for i, (key, *_) in enumerate(batch):
+            alias = f"r{i}"
+            errors = alias_errors.get(alias, set())
+            if data.get(alias, None) is None and errors == {"NOT_FOUND"}:
+                # an inaccessible repository resolves to None, like a single query would
+                results[key] = None
+            elif data.get(alias, None) is not None and not errors:
+                results[key] = data[alias]
+            # other failed selections are left out, callers fall back to single queries
+
+        failed = len(batch) - len(results)
+        if failed:
+            logger.warning(f"[!] {failed} of {len(batch)} selections of a batched query failed.")
+        return results
+
+    async def fetch_async(self, selections):
+        batches = self.split(selections)
+        logger.info(f"[*] Fetching {len(selections)} repository selections in {len(batches)} batched queries.")
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def run(batch):
+            async with semaphore:
+                return await self.fetch_batch_async(batch)
+
+        results = {}
+        for batch_result in await asyncio.gather(*[run(batch) for batch in batches]):
+            results.update(batch_result)
+        return results
+
+    def fetch(self, selections):
+        """
+        Fetches a list of (key, owner, repo, selection, nodes) tuples, `nodes` being the estimated
+        number of nodes the selection returns. Returns a dictionary of key -> repository data,
+        None for the repositories that do not exist. Failed selections are left out.
+        """
+        return async_http.run_sync(self.fetch_async(selections))
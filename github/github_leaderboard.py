@@ -1,13 +1,15 @@
 from .github_actor import GithubActor
 import logging
+from tools.write_buffer import WriteBuffer
 
 logger = logging.getLogger(__name__)
 
 
 class GithubLeaderboard:
-    def __init__(self, actor: GithubActor, collection_refs):
+    def __init__(self, actor: GithubActor, collection_refs, write_buffer=None):
         self.actor = actor
         self.collection_refs = collection_refs
+        self.write_buffer = write_buffer or WriteBuffer()
 
     def is_valid(self, response):
         if response is None:
@@ -63,8 +65,9 @@ class GithubLeaderboard:
             reference_list, key=lambda k: k["health_score"]["total"], reverse=True
         )[:20]
 
-        self.collection_refs["leaderboard"].document("project_leaderboard").set(
-            {"data": reference_list}
+        self.write_buffer.set(
+            self.collection_refs["leaderboard"].document("project_leaderboard"),
+            {"data": reference_list},
         )
 
     def contributor_leaderboard(self, **kwargs):
@@ -141,8 +144,9 @@ class GithubLeaderboard:
             reverse=True,
         )[:20]
 
-        self.collection_refs["leaderboard"].document("contributor_leaderboard").set(
-            {"data": leaderboard}
+        self.write_buffer.set(
+            self.collection_refs["leaderboard"].document("contributor_leaderboard"),
+            {"data": leaderboard},
         )
 
         # Return the leaderboard
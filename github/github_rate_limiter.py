@@ -0,0 +1,114 @@
+import threading
+import asyncio
+import time
+import logging
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+
+class GithubTokenPool:
+    """
+    Rate limit budget of one or more GitHub tokens, shared by every worker of the pipeline.
+
+    Budgets are tracked per (token, resource), resource being "core" for the REST API and
+    "graphql" for the GraphQL API. They are refreshed from every response, and requests are
+    paced so that the remaining budget of a token is spread evenly until its reset time.
+    """
+
+    def __init__(self, tokens, reserve=20):
+        if not tokens:
+            raise ValueError("At least one GitHub token is required.")
+
+        self.tokens = list(tokens)
+        # requests kept in hand for each token, so concurrent in flight requests don't overdraw it
+        self.reserve_count = reserve
+        self.lock = threading.Lock()
+        self.budgets = {}
+
+    def get_budget(self, token, resource):
+        budget = self.budgets.get((token, resource), None)
+        if budget is None:
+            budget = {"remaining": None, "reset": 0, "next": 0}
+            self.budgets[(token, resource)] = budget
+
+        # budget is restored after the reset time, until the next response tells otherwise
+        if budget["reset"] and budget["reset"] <= time.time():
+            budget.update({"remaining": None, "reset": 0, "next": 0})
+        return budget
+
+    def reserve(self, resource, cost=1):
+        """
+        Picks the token that can send a request the soonest and books the request on its budget.
+        Returns the token and the number of seconds to wait before sending the request. Never blocks,
+        so it can be used by threads and coroutines alike.
+        """
+        now = time.time()
+        with self.lock:
+            best_token, best_start = None, None
+            for token in self.tokens:
+                budget = self.get_budget(token, resource)
+                if budget["remaining"] is None:
+                    start = now
+                elif budget["remaining"] - cost < self.reserve_count:
+                    start = budget["reset"]
+                else:
+                    start = max(now, budget["next"])
+
+                if best_start is None or start < best_start:
+                    best_token, best_start = token, start
+
+            budget = self.get_budget(best_token, resource)
+            # an exhausted budget is left untouched, it is restored at its reset time
+            if budget["remaining"] is not None and budget["remaining"] - cost >= self.reserve_count:
+                budget["remaining"] -= cost
+                # spread the remaining budget evenly until the reset
+                interval = max(budget["reset"] - best_start, 0) / max(budget["remaining"], 1)
+                budget["next"] = best_start + interval * cost
+
+            return best_token, max(best_start - now, 0)
+
+    def acquire(self, resource, cost=1):
+        token, delay = self.reserve(resource, cost)
+        if delay > 60:
+            logger.warning(
+                f". [-] Rate limit budget of all tokens is used, waiting for {round(delay / 60, 2)} minutes."
+            )
+        if delay > 0:
+            time.sleep(delay)
+        return token
+
+    async def acquire_async(self, resource, cost=1):
+        token, delay = self.reserve(resource, cost)
+        if delay > 60:
+            logger.warning(
+                f". [-] Rate limit budget of all tokens is used, waiting for {round(delay / 60, 2)} minutes."
+            )
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return token
+
+    def update(self, token, resource, remaining, reset):
+        with self.lock:
+            budget = self.get_budget(token, resource)
+            budget["remaining"] = remaining
+            budget["reset"] = reset
+
+    def update_from_headers(self, token, headers, default_resource="core"):
+        remaining = headers.get("x-ratelimit-remaining", None)
+        reset = headers.get("x-ratelimit-reset", None)
+        if remaining is None or reset is None:
+            return
+        resource = headers.get("x-ratelimit-resource", default_resource)
+        self.update(token, resource, int(remaining), int(reset))
+
+    def update_from_graphql(self, token, rate_limit):
+        # rateLimit { cost remaining resetAt } block of a graphql response
+        if not rate_limit:
+            return
+        reset = datetime.fromisoformat(rate_limit["resetAt"].replace("Z", "+00:00")).timestamp()
+        self.update(token, "graphql", int(rate_limit["remaining"]), int(reset))
+
+    def exhausted(self, token, resource, reset):
+        logger.warning(f". [-] Token budget for {resource} is exhausted until {datetime.fromtimestamp(reset)}.")
+        self.update(token, resource, 0, int(reset))
@@ -1,5 +1,6 @@
 from .github_actor import GithubActor
 import logging
+import re
 from datetime import datetime
 from enum import Enum
 import pandas as pd
@@ -15,41 +16,19 @@ import numpy as np
 import math
 from datetime import datetime, timezone
 from sklearn.preprocessing import RobustScaler, MinMaxScaler
+import threading
+from .github_graphql_batch import GithubGraphqlBatcher
+from tools.write_buffer import WriteBuffer
+from tools.widget_graph import widget
 
 logger = logging.getLogger(__name__)
 
 
 class GithubWidgets:
-    def __init__(self, actor: GithubActor, collection_refs):
-        self.actor = actor
-        self.collection_refs = collection_refs
-
-    def get_db_ref(self, owner, repo):
-        return (
-            self.collection_refs["widgets"]
-            .document("repositories")
-            .collection(self.get_repo_hash(owner, repo))
-        )
-
-    def is_valid(self, response):
-        if response is None:
-            return False
-
-        elif isinstance(response, dict) and not response:
-            return False
-
-        elif isinstance(response, list) and not response:
-            return False
-
-        return True
-
-    def get_repo_hash(self, owner, repo):
-        return "#".join([owner, repo])
-
-    def repository_info(self, owner: str, repo: str, **kwargs):
-        query = """
-            query ($owner: String!, $name: String!) {
-                repository(owner: $owner, name: $name) {
+    # selections on the repository(owner, name) root, used by the widgets for a single repository
+    # or fused across repositories by the batcher
+    REPOSITORY_SELECTIONS = {
+        "repository_info": """
                     defaultBranchRef {
                         target {
                             ... on Commit {
@@ -63,6 +42,7 @@ class GithubWidgets:
                     stargazerCount
                     createdAt
                     updatedAt
+                    pushedAt
                     pullRequests {
                         totalCount
                     }
@@ -91,7 +71,6 @@ class GithubWidgets:
                         login
                         avatarUrl
                     }
-                    updatedAt
                     releases {
                         totalCount
                     }
@@ -103,17 +82,424 @@ class GithubWidgets:
                         totalCount
                     }
                     diskUsage
+        """,
+        "issue_count": """
+                openedIssues: issues(states: OPEN) {
+                    totalCount
                 }
-            }
+                closedIssues: issues(states: CLOSED) {
+                    totalCount
+                }
+        """,
+        "pull_request_count": """
+                openedPullRequests: pullRequests(states: OPEN) {
+                    totalCount
+                }
+                closedPullRequests: pullRequests(states: CLOSED) {
+                    totalCount
+                }
+        """,
+        "language_breakdown": """
+                languages(first: 100) {
+                    edges {
+                        size
+                        node {
+                            name
+                        }
+                    }
+                }
+        """,
+        "recent_commits": """
+                defaultBranchRef {
+                    target {
+                        ... on Commit {
+                            history(first: 10) {
+                                nodes {
+                                    author {
+                                        avatarUrl
+                                        user {
+                                            login
+                                        }
+                                    }
+                                    committer {
+                                        name
+                                    }
+                                    url
+                                    message
+                                    committedDate
+                                    repository {
+                                        name
+                                        owner {
+                                            login
+                                        }
+                                    }
+                                }
+                            }
+                        }
+                    }
+                }
+        """,
+        "recent_releases": """
+                releases(last: 100, orderBy: {field: CREATED_AT, direction: DESC}) {
+                    pageInfo {
+                        endCursor
+                        hasNextPage
+                    }
+                    nodes {
+                        name
+                        tagName
+                        publishedAt
+                        url
+                        repository {
+                            name
+                            owner {
+                                login
+                            }
+                        }
+                    }
+                }
+        """,
+        "recent_created_issues": """
+                issues(first: 10, orderBy: {field: CREATED_AT, direction: DESC}) {
+                    nodes {
+                        number
+                        author {
+                            avatarUrl
+                            login
+                        }
+                        title
+                        state
+                        comments {
+                            totalCount
+                        }
+                        url
+                        createdAt
+                        updatedAt
+                        repository {
+                            name
+                            owner {
+                                login
+                            }
+                        }
+                    }
+                }
+        """,
+        "recent_updated_issues": """
+                issues(first: 10, orderBy: {field: UPDATED_AT, direction: DESC}) {
+                    nodes {
+                        number
+                        author {
+                            avatarUrl
+                            login
+                        }
+                        title
+                        state
+                        comments {
+                            totalCount
+                        }
+                        url
+                        createdAt
+                        updatedAt
+                        repository {
+                            name
+                            owner {
+                                login
+                            }
+                        }
+                    }
+                }
+        """,
+        "recent_created_pull_requests": """
+                pullRequests(first: 10, orderBy: {field: CREATED_AT, direction: DESC}) {
+                    nodes {
+                        number
+                        author {
+                            avatarUrl
+                            login
+                        }
+                        title
+                        state
+                        comments {
+                            totalCount
+                        }
+                        url
+                        createdAt
+                        updatedAt
+                        repository {
+                            name
+                            owner {
+                                login
+                            }
+                        }
+                    }
+                }
+        """,
+        "recent_updated_pull_requests": """
+                pullRequests(first: 10, orderBy: {field: UPDATED_AT, direction: DESC}) {
+                    nodes {
+                        number
+                        author {
+                            avatarUrl
+                            login
+                        }
+                        title
+                        state
+                        comments {
+                            totalCount
+                        }
+                        url
+                        createdAt
+                        updatedAt
+                        repository {
+                            name
+                            owner {
+                                login
+                            }
+                        }
+                    }
+                }
+        """,
+    }
+
+    # estimated number of nodes returned by each selection, used to size the batched queries
+    REPOSITORY_SELECTION_NODES = {
+        "repository_info": 110,
+        "issue_count": 2,
+        "pull_request_count": 2,
+        "language_breakdown": 100,
+        "recent_commits": 20,
+        "recent_releases": 100,
+        "recent_created_issues": 20,
+        "recent_updated_issues": 20,
+        "recent_created_pull_requests": 20,
+        "recent_updated_pull_requests": 20,
+        "most_active_issues": 80,
+    }
+
+    # widgets prefetched for all repositories with batched queries before the project pipeline
+    BATCHED_WIDGETS = [
+        "repository_info",
+        "issue_count",
+        "pull_request_count",
+        "language_breakdown",
+        "recent_commits",
+        "recent_releases",
+    ]
+
+    # widgets fused into a single query for each repository, before its widgets run.
+    # repository_info is left out, it is run first to check the validity of the repository
+    FUSED_WIDGETS = [
+        "issue_count",
+        "pull_request_count",
+        "language_breakdown",
+        "recent_commits",
+        "recent_releases",
+        "recent_created_issues",
+        "recent_updated_issues",
+        "recent_created_pull_requests",
+        "recent_updated_pull_requests",
+        "most_active_issues",
+    ]
+
+    # fields of repository_info which change when a repository has any activity
+    FINGERPRINT_FIELDS = [
+        "pushed_at",
+        "updated_at",
+        "issue_count",
+        "pull_request_count",
+        "stargazers_count",
+        "release_count",
+        "default_branch_commit_count",
+    ]
+
+    # fused selections used by the widgets which still run for an unchanged repository
+    UNCHANGED_FUSED_WIDGETS = [
+        "issue_count",
+        "pull_request_count",
+        "recent_updated_issues",
+        "recent_updated_pull_requests",
+        "most_active_issues",
+    ]
+
+    # statistics computed by github in the background, 202 is returned until they are ready
+    STATS_ENDPOINTS = [
+        "stats/commit_activity",
+        "stats/contributors",
+        "stats/participation",
+        "stats/code_frequency",
+        "stats/punch_card",
+    ]
+
+    # issues and pull requests are stored in chunks of documents, and only the ones updated since
+    # the last run are fetched. All of them are fetched again once in a while, to drop the deleted
+    # and transferred ones
+    ACTIVITY_CHUNK_SIZE = 1000
+    ACTIVITY_FULL_REFRESH_DAYS = 30
+
+    def __init__(self, actor: GithubActor, collection_refs, write_buffer=None):
+        self.actor = actor
+        self.collection_refs = collection_refs
+        self.write_buffer = write_buffer or WriteBuffer()
+        self.batcher = GithubGraphqlBatcher(actor)
+        # repository hash -> widget name -> prefetched repository data
+        self.prefetched = {}
+        self.prefetched_lock = threading.Lock()
+
+    def get_db_ref(self, owner, repo):
+        return (
+            self.collection_refs["widgets"]
+            .document("repositories")
+            .collection(self.get_repo_hash(owner, repo))
+        )
+
+    def get_etag_scope(self):
+        # protocols sharing a repository store its widgets in their own collection
+        return self.collection_refs["widgets"].id
+
+    def fetch_conditional(self, owner, repo, endpoint, defer_pending=False):
+        return self.actor.github_rest_make_request(
+            f"/repos/{owner}/{repo}/{endpoint}",
+            conditional=True,
+            defer_pending=defer_pending,
+            etag_scope=self.get_etag_scope(),
+        )
+
+    def commit_etag(self, owner, repo, endpoint):
+        # the etag is sent back once the documents written from the response are committed,
+        # so a 304 never stands for documents that were lost
+        cache_key = self.actor.get_etag_key(
+            f"/repos/{owner}/{repo}/{endpoint}", etag_scope=self.get_etag_scope()
+        )
+        self.write_buffer.after_flush(lambda: self.actor.commit_etag(cache_key))
+
+    def is_valid(self, response):
+        if response is None:
+            return False
+
+        elif isinstance(response, dict) and not response:
+            return False
+
+        elif isinstance(response, list) and not response:
+            return False
+
+        return True
+
+    def get_repo_hash(self, owner, repo):
+        return "#".join([owner, repo])
+
+    def get_repository_selection(self, name):
+        # time windows of the most active issues are relative to now
+        if name == "most_active_issues":
+            return self.get_most_active_issues_selection()
+        return self.REPOSITORY_SELECTIONS[name]
+
+    def get_repository_query(self, selection):
+        return f"""
+            query ($owner: String!, $name: String!) {{
+                repository(owner: $owner, name: $name) {{
+                    {selection}
+                }}
+            }}
         """
 
-        # Flatten the response to a dictionary
-        flattened_data = {}
+    def prefetch_repositories(self, repositories, widget_names=None):
+        """
+        Fetches the given widgets of all repositories with batched queries. The widgets consume
+        the prefetched data instead of sending their own query.
+        """
+        widget_names = widget_names or self.BATCHED_WIDGETS
+        selections = [
+            (
+                (repository["owner"], repository["repo"], name),
+                repository["owner"],
+                repository["repo"],
+                self.get_repository_selection(name),
+                self.REPOSITORY_SELECTION_NODES.get(name, 100),
+            )
+            for repository in repositories
+            for name in widget_names
+        ]
+        results = self.batcher.fetch(selections)
+
+        with self.prefetched_lock:
+            for (owner, repo, name), repository in results.items():
+                self.prefetched.setdefault(self.get_repo_hash(owner, repo), {})[name] = repository
+
+        logger.info(f"[*] Prefetched {len(results)}/{len(selections)} repository selections.")
+
+    def prefetch_repository(self, owner, repo, widget_names=None):
+        """
+        Fetches the widgets of a repository that are not prefetched yet in a single fused query.
+        """
+        widget_names = widget_names or self.FUSED_WIDGETS
+        with self.prefetched_lock:
+            prefetched = self.prefetched.get(self.get_repo_hash(owner, repo), {})
+            missing = [name for name in widget_names if name not in prefetched]
+
+        if missing:
+            self.prefetch_repositories([{"owner": owner, "repo": repo}], missing)
+
+    def pop_prefetched(self, owner, repo, name):
+        with self.prefetched_lock:
+            prefetched = self.prefetched.get(self.get_repo_hash(owner, repo), {})
+            if name in prefetched:
+                return True, prefetched.pop(name)
+        return False, None
+
+    def get_fingerprint(self, repository_info):
+        return {field: repository_info.get(field, None) for field in self.FINGERPRINT_FIELDS}
+
+    def read_fingerprint(self, owner, repo):
+        doc = self.get_db_ref(owner, repo).document("fingerprint").get()
+        return doc.to_dict().get("data", None) if doc.exists else None
+
+    def write_fingerprint(self, owner, repo, fingerprint, full_run_at):
+        self.write_buffer.set(
+            self.get_db_ref(owner, repo).document("fingerprint"),
+            {"data": {"fingerprint": fingerprint, "full_run_at": full_run_at}},
+        )
+
+    def prewarm_stats(self, repositories):
+        self.actor.github_rest_prewarm(
+            [
+                f"/repos/{repository['owner']}/{repository['repo']}/{endpoint}"
+                for repository in repositories
+                for endpoint in self.STATS_ENDPOINTS
+            ],
+            etag_scope=self.get_etag_scope(),
+        )
+
+    def clear_prefetched(self, owner=None, repo=None):
+        with self.prefetched_lock:
+            if owner is None:
+                self.prefetched.clear()
+            else:
+                self.prefetched.pop(self.get_repo_hash(owner, repo), None)
+
+    def fetch_repository(self, owner, repo, name, raise_on_error=False, selection=None):
+        # prefetched data is used once, later calls fetch fresh data. A custom selection is always fetched.
+        if selection is None:
+            found, repository = self.pop_prefetched(owner, repo, name)
+            if found:
+                return repository
+            selection = self.get_repository_selection(name)
 
         result = self.actor.github_graphql_make_query(
-            query, {"owner": owner, "name": repo}
+            self.get_repository_query(selection), {"owner": owner, "name": repo}
         )
-        repository = result["data"]["repository"]
+        if not self.is_valid(result) or not result.get("data", None):
+            if raise_on_error:
+                raise Exception(f"Could not fetch {name} for {owner}/{repo}")
+            return None
+
+        return result["data"]["repository"]
+
+    @widget(outputs=["repository_info"])
+    def repository_info(self, owner: str, repo: str, **kwargs):
+        # Flatten the response to a dictionary
+        flattened_data = {}
+
+        repository = self.fetch_repository(owner, repo, "repository_info", raise_on_error=True)
         if repository is None:
             logger.warning(
                 f"[-] {owner}/{repo} is not accessible. Will be added to project metadata list, but will not be included in statistics."
@@ -138,6 +524,7 @@ class GithubWidgets:
             flattened_data["stargazers_count"] = repository["stargazerCount"]
             flattened_data["created_at"] = repository["createdAt"]
             flattened_data["updated_at"] = repository["updatedAt"]
+            flattened_data["pushed_at"] = repository["pushedAt"]
             flattened_data["pull_request_count"] = repository["pullRequests"][
                 "totalCount"
             ]
@@ -184,19 +571,16 @@ class GithubWidgets:
             else:
                 flattened_data["valid"] = True
 
-        self.get_db_ref(owner, repo).document("repository_info").set(
-            {"data": flattened_data}
+        self.write_buffer.set(
+            self.get_db_ref(owner, repo).document("repository_info"),
+            {"data": flattened_data},
         )
         return flattened_data
 
     def _calculate_time_decayed_scores(self, timestamps, commit_counts, now_timestamp):
         lambda_ = 0.05  # Decay parameter, less aggressive than before
-        decayed_scores = []
-        for week_timestamp, commit_count in zip(timestamps, commit_counts):
-            weeks_ago = (now_timestamp - week_timestamp) // (7 * 24 * 60 * 60)
-            decayed_score = commit_count * math.exp(-lambda_ * weeks_ago)
-            decayed_scores.append(decayed_score)
-        return decayed_scores
+        weeks_ago = (now_timestamp - np.asarray(timestamps)) // (7 * 24 * 60 * 60)
+        return np.asarray(commit_counts) * np.exp(-lambda_ * weeks_ago)
 
     def _calculate_consistency(self, timestamps, now_timestamp):
         # Calculate intervals between commits in weeks
@@ -215,420 +599,398 @@ class GithubWidgets:
             consistency_score = 1.0
         return consistency_score
 
-    def _score_commit_activity(self, owner, repo):
+    def read_document_data(self, owner, repo, doc_name):
         try:
             ref = (
                 self.get_db_ref(owner, repo)
-                .document("commit_activity")
+                .document(doc_name)
                 .get(field_paths=["data"])
                 .to_dict()
             )
-            default_branch_commit_count = 0
-            try:
-                ref2 = (
-                    self.get_db_ref(owner, repo)
-                    .document("repository_info")
-                    .get(field_paths=["data"])
-                    .to_dict()
-                )
-            except exceptions.NotFound:
-                # Handle case where document or collection does not exist
-                pass
-            else:
-                repository_info = ref2.get("data", None)
-                if repository_info is not None:
-                    default_branch_commit_count = repository_info.get(
-                        "default_branch_commit_count", 0
-                    )
-            if ref is None:
-                raise exceptions.NotFound("Collection or document not found")
+        except exceptions.NotFound:
+            # Handle case where document or collection does not exist
+            return None
+        return ref.get("data", None) if ref is not None else None
+
+    def read_chunked_data(self, owner, repo, doc_prefix):
+        # chunked widgets are stored as doc_prefix1, doc_prefix2, ... and the first chunk holds
+        # their count, the chunks past it are left over from a longer list and are not read
+        try:
+            first = self.get_db_ref(owner, repo).document(f"{doc_prefix}1").get().to_dict()
+        except exceptions.NotFound:
+            # Handle case where document or collection does not exist
+            return []
+        if not first:
+            return []
+        if "chunk_count" not in first:
+            return self.list_chunked_data(owner, repo, doc_prefix)
+
+        data = list(first.get("data", None) or [])
+        for i in range(2, first["chunk_count"] + 1):
+            doc = self.get_db_ref(owner, repo).document(f"{doc_prefix}{i}").get()
+            doc_dict = doc.to_dict() if doc.exists else None
+            if doc_dict and "data" in doc_dict:
+                data.extend(doc_dict["data"])
+        return data
+
+    def list_chunked_data(self, owner, repo, doc_prefix):
+        # chunks written without a count are joined in the order of their number,
+        # list_documents returns them sorted as strings
+        chunk_pattern = re.compile(rf"{re.escape(doc_prefix)}(\d+)")
+        data = []
+        try:
+            chunks = []
+            for doc in self.get_db_ref(owner, repo).list_documents():
+                match = chunk_pattern.fullmatch(doc.id)
+                if match:
+                    chunks.append((int(match.group(1)), doc))
+
+            for _, doc in sorted(chunks, key=lambda chunk: chunk[0]):
+                doc_dict = doc.get().to_dict()
+                if doc_dict and "data" in doc_dict:
+                    data.extend(doc_dict["data"])
         except exceptions.NotFound:
             # Handle case where document or collection does not exist
             pass
-        else:
-            commit_activity = ref.get("data", None)
-            if commit_activity:
-                # Current date
-                now = datetime.now(timezone.utc)
-                now_timestamp = int(now.timestamp())
-
-                # Extract commit counts and timestamps
-                commit_counts = [data["total"] for data in commit_activity]
-                commit_timestamps = [data["week"] for data in commit_activity]
-
-                # Normalizing commit counts using RobustScaler to handle outliers
-                scaler = RobustScaler()
-                normalized_commit_counts = scaler.fit_transform(
-                    np.array(commit_counts).reshape(-1, 1)
-                ).flatten()
-
-                # Calculate time decayed activity scores
-                decayed_scores = self._calculate_time_decayed_scores(
-                    commit_timestamps, normalized_commit_counts, now_timestamp
-                )
+        return data
+
+    def _score_commit_activity(
+        self, owner, repo, commit_activity=None, repository_info=None
+    ):
+        if commit_activity is None:
+            commit_activity = self.read_document_data(owner, repo, "commit_activity")
+        if repository_info is None:
+            repository_info = self.read_document_data(owner, repo, "repository_info")
+
+        default_branch_commit_count = 0
+        if repository_info is not None:
+            default_branch_commit_count = repository_info.get(
+                "default_branch_commit_count", 0
+            )
 
-                # Calculate consistency measure
-                consistency_score = self._calculate_consistency(
-                    commit_timestamps, now_timestamp
-                )
+        if commit_activity:
+            # Current date
+            now = datetime.now(timezone.utc)
+            now_timestamp = int(now.timestamp())
 
-                # Calculate a baseline score from the total commit count
-                baseline_score = np.log1p(default_branch_commit_count)
+            # Extract commit counts and timestamps
+            commit_counts = [data["total"] for data in commit_activity]
+            commit_timestamps = [data["week"] for data in commit_activity]
 
-                # Combine the baseline score, decayed scores, and consistency
-                commit_activity_score = baseline_score + np.sum(decayed_scores) * (
-                    1 - consistency_score
-                )
-                print(owner, repo, commit_activity_score)
-                return commit_activity_score
+            # Normalizing commit counts using RobustScaler to handle outliers
+            scaler = RobustScaler()
+            normalized_commit_counts = scaler.fit_transform(
+                np.array(commit_counts).reshape(-1, 1)
+            ).flatten()
+
+            # Calculate time decayed activity scores
+            decayed_scores = self._calculate_time_decayed_scores(
+                commit_timestamps, normalized_commit_counts, now_timestamp
+            )
+
+            # Calculate consistency measure
+            consistency_score = self._calculate_consistency(
+                commit_timestamps, now_timestamp
+            )
+
+            # Calculate a baseline score from the total commit count
+            baseline_score = np.log1p(default_branch_commit_count)
+
+            # Combine the baseline score, decayed scores, and consistency
+            commit_activity_score = baseline_score + np.sum(decayed_scores) * (
+                1 - consistency_score
+            )
+            print(owner, repo, commit_activity_score)
+            return commit_activity_score
         return 0
 
-    def _score_pull_request_activity(self, owner, repo):
-        try:
-            # Initialize the base reference
-            doc_base = self.get_db_ref(owner, repo)
+    def _parse_timestamps(self, values):
+        # ISO 8601 strings -> seconds since epoch, missing ones are nan
+        if all(value is None or value.endswith("Z") for value in values):
+            # github timestamps are in UTC, numpy parses them without the "Z"
+            timestamps = np.array(
+                [value[:-1] if value else "NaT" for value in values],
+                dtype="datetime64[ms]",
+            )
+            return np.where(
+                np.isnat(timestamps), np.nan, timestamps.astype("int64") / 1000
+            )
 
-            # Initialize an empty list to hold all contributors
-            pull_requests = []
+        timestamps = pd.to_datetime(pd.Series(values, dtype=object), utc=True)
+        return (
+            (timestamps - pd.Timestamp(0, tz="UTC")).dt.total_seconds().to_numpy()
+        )
 
-            # Fetch all documents that start with 'contributors' in their name
-            all_docs = doc_base.list_documents()
-            for doc in all_docs:
-                if "pull_request_activity" in doc.id:
-                    # Get 'data' field from each 'contributors' document and extend the all_contributors list
-                    doc_dict = doc.get().to_dict()
-                    if doc_dict and "data" in doc_dict:
-                        pull_requests.extend(doc_dict["data"])
+    def _calculate_activity_scores(self, items, now):
+        """Time decayed score of every issue or pull request, in the items order."""
+        # Weights for open and closed items
+        weight_closed = 1.25
+        weight_open = 1
 
-        except exceptions.NotFound:
-            # Handle case where document or collection does not exist
-            pass
+        # Decay parameter
+        lambda_ = 0.005
 
-        else:
-            pull_request_scores = []
-            if pull_requests:
-                # Weights for open and closed issues
-                weight_closed = 1.25
-                weight_open = 1
-
-                # Decay parameter
-                lambda_ = 0.005
-
-                # Comment reward factor
-                comment_reward_factor = 0.05  # for example
-
-                # Current date
-                now = datetime.now(timezone.utc)
-
-                # Time-Weighted Pull request Activity Score
-                PRAS = 0
-                for pull_request in pull_requests:
-                    days_since_created = (
-                        now - parser.isoparse(pull_request["createdAt"])
-                    ).days
-                    comment_reward = (
-                        pull_request["comment_count"] * comment_reward_factor
-                    )
-                    if pull_request["closed"]:
-                        days_since_closed = (
-                            now - parser.isoparse(pull_request["closedAt"])
-                        ).days
-                        PRAS += (weight_closed + comment_reward) * math.exp(
-                            -lambda_ * days_since_closed
-                        )
-                    else:  # issue is still open
-                        PRAS += (weight_open + comment_reward) * math.exp(
-                            -lambda_ * days_since_created
-                        )
-                    pull_request_scores.append(PRAS)
-
-                return sum(pull_request_scores)
-        return 0
+        # Comment reward factor
+        comment_reward_factor = 0.05  # for example
 
-    def _score_issue_activity(self, owner, repo):
-        try:
-            # Initialize the base reference
-            doc_base = self.get_db_ref(owner, repo)
+        closed = np.array([bool(item["closed"]) for item in items])
+        comment_reward = (
+            np.array([item["comment_count"] for item in items], dtype=float)
+            * comment_reward_factor
+        )
 
-            # Initialize an empty list to hold all contributors
-            issues = []
+        # whole days, as timedelta.days
+        now_timestamp = now.timestamp()
+        days_since_created = np.floor(
+            (now_timestamp - self._parse_timestamps([i["createdAt"] for i in items]))
+            / (24 * 60 * 60)
+        )
+        days_since_closed = np.floor(
+            (now_timestamp - self._parse_timestamps([i["closedAt"] for i in items]))
+            / (24 * 60 * 60)
+        )
 
-            # Fetch all documents that start with 'contributors' in their name
-            all_docs = doc_base.list_documents()
-            for doc in all_docs:
-                if "issue_activity" in doc.id:
-                    # Get 'data' field from each 'contributors' document and extend the all_contributors list
-                    doc_dict = doc.get().to_dict()
-                    if doc_dict and "data" in doc_dict:
-                        issues.extend(doc_dict["data"])
+        return np.where(
+            closed,
+            (weight_closed + comment_reward) * np.exp(-lambda_ * days_since_closed),
+            (weight_open + comment_reward) * np.exp(-lambda_ * days_since_created),
+        )
 
-        except exceptions.NotFound:
-            # Handle case where document or collection does not exist
-            pass
+    def _score_pull_request_activity(self, owner, repo, pull_requests=None):
+        if pull_requests is None:
+            pull_requests = self.read_chunked_data(owner, repo, "pull_request_activity")
 
-        else:
-            issue_scores = []
-            if issues:
-                # Weights for open and closed issues
-                weight_closed = 1.25
-                weight_open = 1
-
-                # Decay parameter
-                lambda_ = 0.005
-
-                # Average time to close an issue (in days)
-                # avg_days_to_close_issue = 7
-
-                # Comment reward factor
-                comment_reward_factor = 0.05  # for example
-
-                # Current date
-                now = datetime.now(timezone.utc)
-
-                # Time-Weighted Issue Activity Score
-                for issue in issues:
-                    days_since_created = (
-                        now - parser.isoparse(issue["createdAt"])
-                    ).days
-                    comment_reward = issue["comment_count"] * comment_reward_factor
-                    issue_score = 0
-                    if issue["closed"]:
-                        days_since_closed = (
-                            now - parser.isoparse(issue["closedAt"])
-                        ).days
-                        issue_score = (weight_closed + comment_reward) * math.exp(
-                            -lambda_ * days_since_closed
-                        )
-                    else:  # issue is still open
-                        issue_score = (weight_open + comment_reward) * math.exp(
-                            -lambda_ * days_since_created
-                        )
-                    # Append individual issue score to the list
-                    issue_scores.append(issue_score)
-
-                return sum(issue_scores)
+        if pull_requests:
+            pull_request_scores = self._calculate_activity_scores(
+                pull_requests, datetime.now(timezone.utc)
+            )
+
+            # Time-Weighted Pull request Activity Score. The running total is summed
+            # after every pull request, so the first ones, the newest, weigh the most
+            return float(np.sum(np.cumsum(pull_request_scores)))
         return 0
 
-    def _score_release_activity(self, owner, repo):
-        try:
-            ref = (
-                self.get_db_ref(owner, repo)
-                .document("recent_releases")
-                .get(field_paths=["data"])
-                .to_dict()
+    def _score_issue_activity(self, owner, repo, issues=None):
+        if issues is None:
+            issues = self.read_chunked_data(owner, repo, "issue_activity")
+
+        if issues:
+            # Time-Weighted Issue Activity Score
+            issue_scores = self._calculate_activity_scores(
+                issues, datetime.now(timezone.utc)
             )
+            return float(np.sum(issue_scores))
+        return 0
 
-            if ref is None:
-                raise exceptions.NotFound("Collection or document not found")
+    def _score_release_activity(self, owner, repo, releases=None):
+        if releases is None:
+            releases = self.read_document_data(owner, repo, "recent_releases")
 
-        except exceptions.NotFound:
-            # Handle case where document or collection does not exist
-            pass
+        if releases:
+            # Parse 'published_at' once and sort in descending order
+            published_at = [release["published_at"] for release in releases]
+            release_dates = -np.sort(-self._parse_timestamps(published_at))
 
-        else:
-            releases = ref.get("data", None)
-            if releases:
-                # Convert 'published_at' strings to datetime objects and sort in descending order
-                release_dates = sorted(
-                    [parser.isoparse(release["published_at"]) for release in releases],
-                    reverse=True,
+            # Decay parameter
+            lambda_ = 0.1
+
+            # Penalty parameter
+            penalty_param = 0.01
+
+            # Compute the release intervals (in whole days)
+            release_intervals = np.floor(-np.diff(release_dates) / (24 * 60 * 60))
+
+            time_since_last_release = np.floor(
+                (datetime.now(timezone.utc).timestamp() - release_dates[0])
+                / (24 * 60 * 60)
+            )
+            penalty = 1 / (1 + penalty_param * time_since_last_release)
+
+            # Compute the standard deviation of the release intervals
+            if len(release_dates) == 1:
+                RAS = penalty  # Adjust this as needed
+            else:
+                std_dev = np.std(release_intervals)
+                inverse_std_dev = 1 / (std_dev + 0.01)
+                RAS = np.sum(
+                    penalty
+                    * np.exp(-lambda_ * np.arange(len(release_dates)))
+                    * inverse_std_dev
                 )
 
-                # Decay parameter
-                lambda_ = 0.1
-
-                # Penalty parameter
-                penalty_param = 0.01
-
-                # Compute the list of release intervals (in days)
-                release_intervals = [
-                    (release_dates[i - 1] - release_dates[i]).days
-                    for i in range(1, len(release_dates))
-                ]
-
-                # Compute the standard deviation of the release intervals
-                if len(release_dates) == 1:
-                    std_dev = 0  # or some other appropriate default value
-                    time_since_last_release = (
-                        datetime.now(timezone.utc) - release_dates[0]
-                    ).days
-                    # Adjust the penalty and score computation if necessary
-                    penalty = 1 / (1 + penalty_param * time_since_last_release)
-                    RAS = penalty  # Adjust this as needed
-                else:
-                    std_dev = np.std(release_intervals)
-                    inverse_std_dev = 1 / (std_dev + 0.01)
-                    time_since_last_release = (
-                        datetime.now(timezone.utc) - release_dates[0]
-                    ).days
-                    penalty = 1 / (1 + penalty_param * time_since_last_release)
-                    RAS = 0
-                    for i in range(len(release_dates)):
-                        RAS += penalty * math.exp(-lambda_ * i) * inverse_std_dev
-
-                return RAS
+            return float(RAS)
         return 0
 
-    def _score_contributors_data(self, owner, repo, **kwargs):
+    def _score_contributors_data(self, owner, repo, data=None):
         def calculate_EMA(data, alpha=0.1):
             EMA = [data[0]]  # initialize with the first data point
             for i in range(1, len(data)):
                 EMA.append(alpha * data[i] + (1 - alpha) * EMA[i - 1])
             return EMA
 
-        try:
-            # Initialize the base reference
-            doc_base = self.get_db_ref(owner, repo)
-
-            # Initialize an empty list to hold all contributors
-            data = []
-
-            # Fetch all documents that start with 'contributors' in their name
-            all_docs = doc_base.list_documents()
-
-            for doc in all_docs:
-                if "contributors" in doc.id:
-                    # Get 'data' field from each 'contributors' document and extend the all_contributors list
-                    doc_dict = doc.get().to_dict()
-                    if doc_dict and "data" in doc_dict:
-                        data.extend(doc_dict["data"])
-
-        except exceptions.NotFound:
-            # Handle case where document or collection does not exist
-            pass
+        if data is None:
+            data = self.read_chunked_data(owner, repo, "contributors")
+
+        if data:
+            # Aggregate average additions, deletions, and commits from all contributors
+            additions, deletions, commits, commit_weeks = [], [], [], []
+            for contributor in data:
+                weeks = np.array([week["w"] for week in contributor["weeks"]])
+                num_weeks = len(weeks)
+                # Now giving higher weight to recent weeks
+                decay_weights = np.array(
+                    [i / num_weeks for i in range(1, num_weeks + 1)]
+                )
 
-        else:
-            if data:
-                # Aggregate average additions, deletions, and commits from all contributors
-                additions, deletions, commits, commit_weeks = [], [], [], []
-                for contributor in data:
-                    weeks = np.array([week["w"] for week in contributor["weeks"]])
-                    num_weeks = len(weeks)
-                    # Now giving higher weight to recent weeks
-                    decay_weights = np.array(
-                        [i / num_weeks for i in range(1, num_weeks + 1)]
-                    )
-
-                    weighted_additions = (
-                        np.array([week["a"] for week in contributor["weeks"]])
-                        * decay_weights
-                    )
-                    weighted_deletions = (
-                        np.array([week["d"] for week in contributor["weeks"]])
-                        * decay_weights
-                    )
-                    weighted_commits = (
-                        np.array([week["c"] for week in contributor["weeks"]])
-                        * decay_weights
-                    )
-
-                    additions.extend(weighted_additions)
-                    deletions.extend(weighted_deletions)
-                    commits.extend(weighted_commits)
-                    commit_weeks.extend(weeks)
-
-                # Normalize each score to be between 0 and 1
-                scaler = MinMaxScaler()
-                normalized_additions = scaler.fit_transform(
-                    np.array(additions).reshape(-1, 1)
+                weighted_additions = (
+                    np.array([week["a"] for week in contributor["weeks"]])
+                    * decay_weights
                 )
-                normalized_deletions = scaler.fit_transform(
-                    np.array(deletions).reshape(-1, 1)
+                weighted_deletions = (
+                    np.array([week["d"] for week in contributor["weeks"]])
+                    * decay_weights
                 )
-                normalized_commits = scaler.fit_transform(
-                    np.array(commits).reshape(-1, 1)
+                weighted_commits = (
+                    np.array([week["c"] for week in contributor["weeks"]])
+                    * decay_weights
                 )
 
-                # Calculate commit trend
-                EMA_commits = calculate_EMA(
-                    normalized_commits.flatten(), alpha=0.1
-                )  # calculate EMA
-                # the trend can be the difference between the last and the first EMA
-                commit_trend = EMA_commits[-1] - EMA_commits[0]
-                commit_trend = (commit_trend + 1) / 2
-
-                # Compute the new metric
-                additions_deletions_ratio = np.divide(
-                    normalized_additions,
-                    normalized_deletions,
-                    out=np.zeros_like(normalized_additions),
-                    where=normalized_deletions != 0,
-                )
-                new_metric = additions_deletions_ratio * normalized_commits
-                new_metric_average = np.mean(new_metric)
+                additions.extend(weighted_additions)
+                deletions.extend(weighted_deletions)
+                commits.extend(weighted_commits)
+                commit_weeks.extend(weeks)
 
-                # Calculate Gini coefficient for contributor equality
-                contributors = np.array([contributor["total"] for contributor in data])
-                contributors.sort()
+            # Normalize each score to be between 0 and 1
+            scaler = MinMaxScaler()
+            normalized_additions = scaler.fit_transform(
+                np.array(additions).reshape(-1, 1)
+            )
+            normalized_deletions = scaler.fit_transform(
+                np.array(deletions).reshape(-1, 1)
+            )
+            normalized_commits = scaler.fit_transform(
+                np.array(commits).reshape(-1, 1)
+            )
 
-                if len(contributors) == 1:
-                    contributor_gini_coefficient = 1
-                else:
-                    n = len(contributors)
-                    contributor_gini_coefficient = (
-                        2 * np.sum((np.arange(1, n + 1) * np.sort(contributors)))
-                    ) / (n * np.sum(contributors)) - (n + 1) / n
-
-                MAX_CONTRIBUTORS = 100
-                contributor_count = len(data) / MAX_CONTRIBUTORS
-
-                # Define the weights
-                weight_commit_trend = 0.20  # assign 25% importance to commit trend
-                # assign 25% importance to contributor gini coefficient
-                weight_contributor_gini_coefficient = 0.30
-                weight_new_metric_average = (
-                    0.20  # assign 25% importance to new metric average
-                )
-                weight_contributor_count = (
-                    0.30  # assign 25% importance to contributor count
-                )
+            # Calculate commit trend
+            EMA_commits = calculate_EMA(
+                normalized_commits.flatten(), alpha=0.1
+            )  # calculate EMA
+            # the trend can be the difference between the last and the first EMA
+            commit_trend = EMA_commits[-1] - EMA_commits[0]
+            commit_trend = (commit_trend + 1) / 2
+
+            # Compute the new metric
+            additions_deletions_ratio = np.divide(
+                normalized_additions,
+                normalized_deletions,
+                out=np.zeros_like(normalized_additions),
+                where=normalized_deletions != 0,
+            )
+            new_metric = additions_deletions_ratio * normalized_commits
+            new_metric_average = np.mean(new_metric)
 
-                # Calculate weighted sum
-                liveness_score = (
-                    weight_commit_trend * commit_trend
-                    + weight_contributor_gini_coefficient
-                    * (1 - contributor_gini_coefficient)
-                    + weight_new_metric_average * new_metric_average
-                    + weight_contributor_count * contributor_count
-                )
-                return liveness_score
+            # Calculate Gini coefficient for contributor equality
+            contributors = np.array([contributor["total"] for contributor in data])
+            contributors.sort()
+
+            if len(contributors) == 1:
+                contributor_gini_coefficient = 1
+            else:
+                n = len(contributors)
+                contributor_gini_coefficient = (
+                    2 * np.sum((np.arange(1, n + 1) * np.sort(contributors)))
+                ) / (n * np.sum(contributors)) - (n + 1) / n
+
+            MAX_CONTRIBUTORS = 100
+            contributor_count = len(data) / MAX_CONTRIBUTORS
+
+            # Define the weights
+            weight_commit_trend = 0.20  # assign 25% importance to commit trend
+            # assign 25% importance to contributor gini coefficient
+            weight_contributor_gini_coefficient = 0.30
+            weight_new_metric_average = (
+                0.20  # assign 25% importance to new metric average
+            )
+            weight_contributor_count = (
+                0.30  # assign 25% importance to contributor count
+            )
+
+            # Calculate weighted sum
+            liveness_score = (
+                weight_commit_trend * commit_trend
+                + weight_contributor_gini_coefficient
+                * (1 - contributor_gini_coefficient)
+                + weight_new_metric_average * new_metric_average
+                + weight_contributor_count * contributor_count
+            )
+            return liveness_score
 
         return 0
 
-    def health_score(self, owner, repo, **kwargs):
+    @widget(
+        inputs=[
+            "repository_info",
+            "commit_activity",
+            "contributors",
+            "issue_activity",
+            "pull_request_activity",
+            "recent_releases",
+        ],
+        outputs=["raw_health_score"],
+    )
+    def health_score(self, owner, repo, inputs=None, **kwargs):
+        inputs = inputs or {}
         raw_health_score = {
-            "commit_activity": self._score_commit_activity(owner, repo, **kwargs),
-            "issue_activity": self._score_issue_activity(owner, repo, **kwargs),
+            "commit_activity": self._score_commit_activity(
+                owner,
+                repo,
+                commit_activity=inputs.get("commit_activity"),
+                repository_info=inputs.get("repository_info"),
+            ),
+            "issue_activity": self._score_issue_activity(
+                owner, repo, issues=inputs.get("issue_activity")
+            ),
             "pull_request_activity": self._score_pull_request_activity(
-                owner, repo, **kwargs
+                owner, repo, pull_requests=inputs.get("pull_request_activity")
+            ),
+            "release_activity": self._score_release_activity(
+                owner, repo, releases=inputs.get("recent_releases")
             ),
-            "release_activity": self._score_release_activity(owner, repo, **kwargs),
             "contribution_activity": self._score_contributors_data(
-                owner, repo, **kwargs
+                owner, repo, data=inputs.get("contributors")
             ),
         }
 
-        self.get_db_ref(owner, repo).document("raw_health_score").set(
-            {"data": raw_health_score}
+        self.write_buffer.set(
+            self.get_db_ref(owner, repo).document("raw_health_score"),
+            {"data": raw_health_score},
         )
+        return raw_health_score
 
+    @widget(outputs=["commit_activity"])
     def commit_activity(self, owner, repo, **kwargs):
         # formatting will be in frontend
-        data = self.actor.github_rest_make_request(
-            f"/repos/{owner}/{repo}/stats/commit_activity"
-        )
+        data = self.fetch_conditional(owner, repo, "stats/commit_activity", defer_pending=True)
+        if data is self.actor.NOT_MODIFIED:
+            return
 
         if not self.is_valid(data) or not any(item["total"] > 0 for item in data):
             logger.warning("[!] Invalid or empty data returned")
             return
 
-        self.get_db_ref(owner, repo).document("commit_activity").set({"data": data})
+        self.write_buffer.set(
+            self.get_db_ref(owner, repo).document("commit_activity"), {"data": data}
+        )
+        self.commit_etag(owner, repo, "stats/commit_activity")
+        return data
 
+    @widget(outputs=["contributors"])
     def contributors(self, owner, repo, **kwargs):
         # formatting will be in frontend
-        data = self.actor.github_rest_make_request(
-            f"/repos/{owner}/{repo}/stats/contributors"
-        )
+        data = self.fetch_conditional(owner, repo, "stats/contributors", defer_pending=True)
+        if data is self.actor.NOT_MODIFIED:
+            return
         sorted_data = sorted(data, key=lambda x: x["total"], reverse=True)
 
         if not self.is_valid(data):
@@ -646,13 +1008,24 @@ class GithubWidgets:
 
             logger.info(f"[#db] Writing to database {owner}/{repo}/{doc_name}")
 
-            self.get_db_ref(owner, repo).document(doc_name).set({"data": chunk})
+            chunk_data = {"data": chunk}
+            if i == 0:
+                # chunks past the count are left over from a longer list, readers skip them
+                chunk_data["chunk_count"] = math.ceil(len(sorted_data) / chunk_size)
+
+            self.write_buffer.set(
+                self.get_db_ref(owner, repo).document(doc_name), chunk_data
+            )
+
+        self.commit_etag(owner, repo, "stats/contributors")
+        return sorted_data
 
+    @widget(outputs=["participation", "participation_count"])
     def participation(self, owner, repo, **kwargs):
         # formatting will be in here
-        data = self.actor.github_rest_make_request(
-            f"/repos/{owner}/{repo}/stats/participation"
-        )
+        data = self.fetch_conditional(owner, repo, "stats/participation", defer_pending=True)
+        if data is self.actor.NOT_MODIFIED:
+            return
 
         if not self.is_valid(data) or not sum(data["all"]) > 0:
             logger.warning("[!] Invalid or empty data returned")
@@ -685,17 +1058,22 @@ class GithubWidgets:
             {"name": "Others", "data": others, "type": "line"},
         ]
 
-        self.get_db_ref(owner, repo).document("participation").set({"data": chart_data})
+        self.write_buffer.set(
+            self.get_db_ref(owner, repo).document("participation"), {"data": chart_data}
+        )
 
-        self.get_db_ref(owner, repo).document("participation_count").set(
-            {"data": {"owner": owner_sum, "others": others_sum}}
+        self.write_buffer.set(
+            self.get_db_ref(owner, repo).document("participation_count"),
+            {"data": {"owner": owner_sum, "others": others_sum}},
         )
+        self.commit_etag(owner, repo, "stats/participation")
 
+    @widget(outputs=["code_frequency"])
     def code_frequency(self, owner, repo, **kwargs):
         # formatting will be in here
-        data = self.actor.github_rest_make_request(
-            f"/repos/{owner}/{repo}/stats/code_frequency"
-        )
+        data = self.fetch_conditional(owner, repo, "stats/code_frequency", defer_pending=True)
+        if data is self.actor.NOT_MODIFIED:
+            return
 
         if not self.is_valid(data) and not any(item[1] or item[2] for item in data):
             logger.warning("[!] Invalid or empty data returned")
@@ -715,27 +1093,34 @@ class GithubWidgets:
         chart_data["series"][0]["data"] = [item[1] for item in data]
         chart_data["series"][1]["data"] = [item[2] for item in data]
 
-        self.get_db_ref(owner, repo).document("code_frequency").set(
-            {"data": chart_data}
+        self.write_buffer.set(
+            self.get_db_ref(owner, repo).document("code_frequency"),
+            {"data": chart_data},
         )
+        self.commit_etag(owner, repo, "stats/code_frequency")
 
+    @widget(outputs=["community_profile"])
     def community_profile(self, owner, repo, **kwargs):
         # formatting will be in frontend
-        data = self.actor.github_rest_make_request(
-            f"/repos/{owner}/{repo}/community/profile"
-        )
+        data = self.fetch_conditional(owner, repo, "community/profile")
+        if data is self.actor.NOT_MODIFIED:
+            return
 
         if not self.is_valid(data):
             logger.warning("[!] Invalid or empty data returned")
             return
 
-        self.get_db_ref(owner, repo).document("community_profile").set({"data": data})
+        self.write_buffer.set(
+            self.get_db_ref(owner, repo).document("community_profile"), {"data": data}
+        )
+        self.commit_etag(owner, repo, "community/profile")
 
+    @widget(outputs=["punch_card"])
     def punch_card(self, owner, repo, **kwargs):
         # formatting will be in frontend
-        data = self.actor.github_rest_make_request(
-            f"/repos/{owner}/{repo}/stats/punch_card"
-        )
+        data = self.fetch_conditional(owner, repo, "stats/punch_card", defer_pending=True)
+        if data is self.actor.NOT_MODIFIED:
+            return
 
         if not self.is_valid(data) or not any(item[2] for item in data):
             logger.warning("[!] Invalid or empty data returned")
@@ -748,117 +1133,199 @@ class GithubWidgets:
                 "commits": data[i][2],
             }
 
-        self.get_db_ref(owner, repo).document("punch_card").set({"data": data})
+        self.write_buffer.set(
+            self.get_db_ref(owner, repo).document("punch_card"), {"data": data}
+        )
+        self.commit_etag(owner, repo, "stats/punch_card")
 
+    @widget(outputs=["issue_count"])
     def issue_count(self, owner, repo, **kwargs):
         # formatting will be in api
-        query = """
-        query ($owner: String!, $name: String!) {
-            repository(owner: $owner, name: $name) {
-                openedIssues: issues(states: OPEN) {
-                totalCount
-                }
-                closedIssues: issues(states: CLOSED) {
-                totalCount
-                }
-            }
-        }
-        """
-        data = self.actor.github_graphql_make_query(
-            query, {"owner": owner, "name": repo}
-        )
+        repository = self.fetch_repository(owner, repo, "issue_count")
 
-        if not self.is_valid(data):
+        if not self.is_valid(repository):
             logger.warning("[!] Invalid or empty data returned")
             return
 
-        self.get_db_ref(owner, repo).document("issue_count").set(
+        self.write_buffer.set(
+            self.get_db_ref(owner, repo).document("issue_count"),
             {
                 "data": {
-                    "open": data["data"]["repository"]["openedIssues"]["totalCount"],
-                    "closed": data["data"]["repository"]["closedIssues"]["totalCount"],
-                }
-            }
+                    "open": repository["openedIssues"]["totalCount"],
+                    "closed": repository["closedIssues"]["totalCount"],
+                },
+            },
         )
 
-    def issue_activity(self, owner, repo, **kwargs):
-        # formatting will be in api
-        query = """
-            query ($owner: String!, $name: String!, $cursor: String, $orderBy: IssueOrderField!) {
-                repository(owner: $owner, name: $name) {
-                    issues(first: 100, after: $cursor, orderBy: {field: $orderBy, direction: DESC}) {
-                        pageInfo {
+    def get_activity_query(self, connection, incremental=False):
+        # issues can be filtered by update time, pull requests are only ordered by it
+        arguments = "first: 100, after: $cursor, orderBy: {field: $orderBy, direction: DESC}"
+        variables = "$owner: String!, $name: String!, $cursor: String, $orderBy: IssueOrderField!"
+        if incremental and connection == "issues":
+            arguments += ", filterBy: {since: $since}"
+            variables += ", $since: DateTime"
+
+        return f"""
+            query ({variables}) {{
+                repository(owner: $owner, name: $name) {{
+                    {connection}({arguments}) {{
+                        pageInfo {{
                             endCursor
                             hasNextPage
-                        }
+                        }}
                         totalCount
-                        nodes {
+                        nodes {{
+                            number
                             createdAt
+                            updatedAt
                             closedAt
                             closed
-                            comments {
-								totalCount
-							}
-
-                        }
-                    }
-                }
-            }
+                            comments {{
+                                totalCount
+                            }}
+                        }}
+                    }}
+                }}
+            }}
         """
 
-        # List to store the data points
-        issues = []
+    def fetch_activity(self, owner, repo, connection, since=None):
+        """
+        Pages through the issues or pull requests of a repository, newest first. With `since`, only
+        the ones updated since then are fetched. Returns the nodes and whether all of them were
+        fetched.
+        """
+        query = self.get_activity_query(connection, since is not None)
+        variables = {
+            "owner": owner,
+            "name": repo,
+            "cursor": None,
+            "orderBy": "CREATED_AT" if since is None else "UPDATED_AT",
+        }
+        if since is not None and connection == "issues":
+            variables["since"] = since
 
-        # Execute the GraphQL query with pagination
+        nodes = []
         has_next_page = True
-        cursor = None
         while has_next_page:
-            # Send the GraphQL request
-            result = self.actor.github_graphql_make_query(
-                query,
-                {
-                    "owner": owner,
-                    "name": repo,
-                    "cursor": cursor,
-                    "orderBy": "CREATED_AT",
-                },
+            result = self.actor.github_graphql_make_query(query, variables)
+
+            if not self.is_valid(result):
+                logger.info("[!] Invalid or empty data returned")
+                return nodes, False
+
+            data = result["data"]["repository"][connection]
+            for node in data["nodes"]:
+                # timestamps of github have the same format, so they sort as strings
+                if since is not None and node["updatedAt"] < since:
+                    return nodes, True
+                nodes.append(node)
+
+            has_next_page = data["pageInfo"]["hasNextPage"]
+            variables["cursor"] = data["pageInfo"]["endCursor"]
+
+        return nodes, True
+
+    def format_activity_node(self, node):
+        created_at = node["createdAt"]
+        closed_at = node["closedAt"]
+        closed = node["closed"]
+        return {
+            "number": node["number"],
+            "createdAt": created_at,
+            "updatedAt": node["updatedAt"],
+            "closedAt": closed_at,
+            "closed": closed,
+            "closed_interval": str(
+                datetime.strptime(closed_at, "%Y-%m-%dT%H:%M:%SZ")
+                - datetime.strptime(created_at, "%Y-%m-%dT%H:%M:%SZ")
             )
+            if closed
+            else None,
+            "comment_count": node["comments"]["totalCount"],
+        }
+
+    def load_activity(self, owner, repo, doc_prefix, chunk_count):
+        items = []
+        for i in range(chunk_count):
+            doc = self.get_db_ref(owner, repo).document(f"{doc_prefix}{i + 1}").get()
+            if not doc.exists:
+                return None
+            items.extend(doc.to_dict().get("data", None) or [])
 
-            if not self.is_valid(result):
-                logger.info("[!] Invalid or empty data returned")
-                if issues:
-                    break
-                else:
-                    return
+        # chunks written before the incremental fetch can't be merged into
+        if any("number" not in item or "updatedAt" not in item for item in items):
+            return None
+        return items
 
-            nodes = result["data"]["repository"]["issues"]["nodes"]
-            end_cursor = result["data"]["repository"]["issues"]["pageInfo"]["endCursor"]
-            has_next_page = result["data"]["repository"]["issues"]["pageInfo"][
-                "hasNextPage"
+    def get_activity(self, owner, repo, connection, doc_prefix):
+        """
+        Returns every issue or pull request of a repository, newest first, and the sync state to
+        store once they are written. Stored items are merged with the ones updated since the
+        last run when possible. Returns (None, None) if nothing should be written.
+        """
+        sync_doc = self.get_db_ref(owner, repo).document("activity_sync").get()
+        sync_data = (sync_doc.to_dict().get("data", None) if sync_doc.exists else None) or {}
+        state = sync_data.get(connection, None)
+
+        now = datetime.now(timezone.utc)
+        items = None
+        if state and now - parser.isoparse(state["full_at"]) < timedelta(
+            days=self.ACTIVITY_FULL_REFRESH_DAYS
+        ):
+            items = self.load_activity(owner, repo, doc_prefix, state["chunk_count"])
+
+        if items is not None:
+            nodes, complete = self.fetch_activity(owner, repo, connection, state["updated_at"])
+            if not complete:
+                # stored items are kept as they are, the next run starts from the same mark
+                return None, None
+
+            # the items updated at the mark itself are fetched again, since includes it
+            merged = {item["number"]: item for item in items}
+            nodes = [
+                node
+                for node in nodes
+                if merged.get(node["number"], {}).get("updatedAt", None) != node["updatedAt"]
             ]
 
-            # Extract relevant data points
+            logger.info(f"[*] {len(nodes)} {connection} of {owner}/{repo} are updated since {state['updated_at']}")
+            if not nodes:
+                # stored items, charts and averages are all up to date
+                return None, None
+
             for node in nodes:
-                created_at = node["createdAt"]
-                closed_at = node["closedAt"]
-                closed = node["closed"]
-                issues.append(
-                    {
-                        "createdAt": created_at,
-                        "closedAt": closed_at,
-                        "closed": closed,
-                        "closed_interval": str(
-                            datetime.strptime(closed_at, "%Y-%m-%dT%H:%M:%SZ")
-                            - datetime.strptime(created_at, "%Y-%m-%dT%H:%M:%SZ")
-                        )
-                        if closed
-                        else None,
-                        "comment_count": node["comments"]["totalCount"],
-                    }
-                )
+                merged[node["number"]] = self.format_activity_node(node)
+            items = sorted(merged.values(), key=lambda x: x["createdAt"], reverse=True)
+            full_at = state["full_at"]
+
+        else:
+            nodes, complete = self.fetch_activity(owner, repo, connection)
+            if not nodes and not complete:
+                return None, None
+
+            # a partial fetch is written, but the next run fetches everything again
+            items = [self.format_activity_node(node) for node in nodes]
+            full_at = now.isoformat()
+
+        if not complete:
+            return items, None
+
+        return items, {
+            "updated_at": max(
+                (item["updatedAt"] for item in items),
+                default=now.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            ),
+            "full_at": full_at,
+            "chunk_count": math.ceil(len(items) / self.ACTIVITY_CHUNK_SIZE),
+        }
 
-            # Set the next cursor for pagination
-            cursor = end_cursor
+    @widget(outputs=["issue_activity", "issue_chart", "average_days_to_close_issue"])
+    def issue_activity(self, owner, repo, **kwargs):
+        # formatting will be in api
+        issues, activity_state = self.get_activity(owner, repo, "issues", "issue_activity")
+        if issues is None:
+            return
 
         # Calculate the average days to close an issue
         total_days = 0
@@ -883,7 +1350,7 @@ class GithubWidgets:
                 closed_issue_count += 1
 
         # Chunk size
-        chunk_size = 1000
+        chunk_size = self.ACTIVITY_CHUNK_SIZE
 
         # Splitting the data into chunks of size `chunk_size`
         for i in range(0, len(issues), chunk_size):
@@ -894,14 +1361,22 @@ class GithubWidgets:
 
             logger.info(f"[#db] Writing to database {owner}/{repo}/{doc_name}")
 
-            self.get_db_ref(owner, repo).document(doc_name).set({"data": chunk})
+            chunk_data = {"data": chunk}
+            if i == 0:
+                # chunks past the count are left over from a longer list, readers skip them
+                chunk_data["chunk_count"] = math.ceil(len(issues) / chunk_size)
+
+            self.write_buffer.set(
+                self.get_db_ref(owner, repo).document(doc_name), chunk_data
+            )
 
-        self.get_db_ref(owner, repo).document("average_days_to_close_issue").set(
+        self.write_buffer.set(
+            self.get_db_ref(owner, repo).document("average_days_to_close_issue"),
             {
                 "data": round(total_days / closed_issue_count, 2)
                 if closed_issue_count > 0
-                else 0
-            }
+                else 0,
+            },
         )
 
         # process here
@@ -956,91 +1431,35 @@ class GithubWidgets:
                 ],
             }
 
-            self.get_db_ref(owner, repo).document(f"issue_chart_{interval}").set(
-                {"data": echart_data}
+            self.write_buffer.set(
+                self.get_db_ref(owner, repo).document(f"issue_chart_{interval}"),
+                {"data": echart_data},
             )
 
-    def pull_request_activity(self, owner, repo, **kwargs):
-        # formatting will be in api
-        query = """
-            query ($owner: String!, $name: String!, $cursor: String, $orderBy: IssueOrderField!) {
-                repository(owner: $owner, name: $name) {
-                    pullRequests(first: 100, after: $cursor, orderBy: {field: $orderBy, direction: DESC}) {
-                        pageInfo {
-                            endCursor
-                            hasNextPage
-                        }
-                        totalCount
-                        nodes {
-                            createdAt
-                            closedAt
-                            closed
-                            comments {
-								totalCount
-							}
-                        }
-                    }
-                }
-            }
-        """
-
-        # List to store the data points
-        pull_requests = []
-
-        # Execute the GraphQL query with pagination
-        has_next_page = True
-        cursor = None
-        while has_next_page:
-            # Send the GraphQL request
-            result = self.actor.github_graphql_make_query(
-                query,
-                {
-                    "owner": owner,
-                    "name": repo,
-                    "cursor": cursor,
-                    "orderBy": "CREATED_AT",
-                },
+        # high-water mark is moved only after the issues are written
+        if activity_state is not None:
+            self.write_buffer.set(
+                self.get_db_ref(owner, repo).document("activity_sync"),
+                {"data": {"issues": activity_state}},
+                merge=True,
             )
 
-            if not self.is_valid(result):
-                logger.info("[!] Invalid or empty data returned")
-                if pull_requests:
-                    break
-                else:
-                    return
-
-            nodes = result["data"]["repository"]["pullRequests"]["nodes"]
-            end_cursor = result["data"]["repository"]["pullRequests"]["pageInfo"][
-                "endCursor"
-            ]
-            has_next_page = result["data"]["repository"]["pullRequests"]["pageInfo"][
-                "hasNextPage"
-            ]
-
-            # Extract relevant data points
-            for node in nodes:
-                created_at = node["createdAt"]
-                closed_at = node["closedAt"]
-                closed = node["closed"]
-                pull_requests.append(
-                    {
-                        "createdAt": created_at,
-                        "closed_interval": str(
-                            (
-                                datetime.strptime(closed_at, "%Y-%m-%dT%H:%M:%SZ")
-                                - datetime.strptime(created_at, "%Y-%m-%dT%H:%M:%SZ")
-                            )
-                        )
-                        if closed
-                        else None,
-                        "closedAt": closed_at,
-                        "closed": closed,
-                        "comment_count": node["comments"]["totalCount"],
-                    }
-                )
+        return {"issue_activity": issues}
 
-            # Set the next cursor for pagination
-            cursor = end_cursor
+    @widget(
+        outputs=[
+            "pull_request_activity",
+            "pull_request_chart",
+            "average_days_to_close_pull_request",
+        ]
+    )
+    def pull_request_activity(self, owner, repo, **kwargs):
+        # formatting will be in api
+        pull_requests, activity_state = self.get_activity(
+            owner, repo, "pullRequests", "pull_request_activity"
+        )
+        if pull_requests is None:
+            return
 
         # Calculate the average days to close an pull request
         total_days = 0
@@ -1065,7 +1484,7 @@ class GithubWidgets:
                 closed_pull_request_count += 1
 
         # Chunk size
-        chunk_size = 1000
+        chunk_size = self.ACTIVITY_CHUNK_SIZE
 
         # Splitting the data into chunks of size `chunk_size`
         for i in range(0, len(pull_requests), chunk_size):
@@ -1076,14 +1495,22 @@ class GithubWidgets:
 
             logger.info(f"[#db] Writing to database {owner}/{repo}/{doc_name}")
 
-            self.get_db_ref(owner, repo).document(doc_name).set({"data": chunk})
+            chunk_data = {"data": chunk}
+            if i == 0:
+                # chunks past the count are left over from a longer list, readers skip them
+                chunk_data["chunk_count"] = math.ceil(len(pull_requests) / chunk_size)
+
+            self.write_buffer.set(
+                self.get_db_ref(owner, repo).document(doc_name), chunk_data
+            )
 
-        self.get_db_ref(owner, repo).document("average_days_to_close_pull_request").set(
+        self.write_buffer.set(
+            self.get_db_ref(owner, repo).document("average_days_to_close_pull_request"),
             {
                 "data": round(total_days / closed_pull_request_count, 2)
                 if closed_pull_request_count > 0
-                else 0
-            }
+                else 0,
+            },
         )
 
         # interval_chart
@@ -1137,94 +1564,93 @@ class GithubWidgets:
                 ],
             }
 
-            self.get_db_ref(owner, repo).document(f"pull_request_chart_{interval}").set(
-                {"data": echart_data}
+            self.write_buffer.set(
+                self.get_db_ref(owner, repo).document(f"pull_request_chart_{interval}"),
+                {"data": echart_data},
             )
 
-    def most_active_issues(self, owner, repo, **kwargs):
-        # formatting will be in frontend
-
-        count = kwargs.get("count", 10)
-        flattened_data = {}
-
-        for interval in ["day", "week", "month", "year"]:
-            flattened_data[interval] = []
-            if interval == "day":
-                current_time = datetime.now(timezone.utc)
-                since = current_time - timedelta(days=1)
-
-            elif interval == "week":
-                current_time = datetime.now(timezone.utc)
-                since = current_time - timedelta(days=7)
-
-            elif interval == "month":
-                current_time = datetime.now(timezone.utc)
-                since = current_time - timedelta(days=30)
+        # high-water mark is moved only after the pull requests are written
+        if activity_state is not None:
+            self.write_buffer.set(
+                self.get_db_ref(owner, repo).document("activity_sync"),
+                {"data": {"pullRequests": activity_state}},
+                merge=True,
+            )
 
-            elif interval == "year":
-                current_time = datetime.now(timezone.utc)
-                since = current_time - timedelta(days=365)
+        return {"pull_request_activity": pull_requests}
 
-            query = """
-                query ($owner: String!, $name: String!, $since: DateTime!, $count: Int) {
-                repository(owner: $owner, name: $name) {
-                    issues(first: $count, orderBy: {field: COMMENTS, direction: DESC}, filterBy: {since: $since}) {
-                    nodes {
+    def get_most_active_issues_selection(self, count=10):
+        intervals = []
+        for interval, days in [("day", 1), ("week", 7), ("month", 30), ("year", 365)]:
+            since = datetime.now(timezone.utc) - timedelta(days=days)
+            intervals.append(
+                f"""
+                {interval}: issues(first: {count}, orderBy: {{field: COMMENTS, direction: DESC}}, filterBy: {{since: "{since.isoformat()}"}}) {{
+                    nodes {{
                         number
-                        author {
-                        avatarUrl
-                        login
-                        }
+                        author {{
+                            avatarUrl
+                            login
+                        }}
                         title
                         state
-                        repository {
-							name
-							owner {
-								login
-							}
-						}
+                        repository {{
+                            name
+                            owner {{
+                                login
+                            }}
+                        }}
                         url
-                        comments {
-                        totalCount
-                        }
+                        comments {{
+                            totalCount
+                        }}
                         createdAt
                         updatedAt
                         closed
-						closedAt
+                        closedAt
+                    }}
+                }}
+                """
+            )
+        return "".join(intervals)
 
-                    }
-                    }
-                }
-            }
-            """
-            data = self.actor.github_graphql_make_query(
-                query,
-                {
-                    "owner": owner,
-                    "name": repo,
-                    "since": since.isoformat(),
-                    "count": count,
-                },
+    @widget(outputs=["most_active_issues"])
+    def most_active_issues(self, owner, repo, **kwargs):
+        # formatting will be in frontend
+
+        count = kwargs.get("count", 10)
+        flattened_data = {"day": [], "week": [], "month": [], "year": []}
+
+        # prefetched data is fetched with the default count
+        repository = self.fetch_repository(
+            owner,
+            repo,
+            "most_active_issues",
+            selection=None if count == 10 else self.get_most_active_issues_selection(count),
+        )
+
+        if not self.is_valid(repository):
+            logger.info(
+                f"[#invalid] No most active issues for repository {owner}/{repo}"
             )
+            repository = {}
 
-            if not self.is_valid(data):
-                logger.info(
-                    f"[#invalid] No most active issues for repository {owner}/{repo}"
-                )
+        for interval in flattened_data.keys():
+            if not repository.get(interval, None):
                 continue
 
             # Extract the issues from the response
-            issues = data["data"]["repository"]["issues"]["nodes"]
+            issues = repository[interval]["nodes"]
 
             # Iterate through the issues and flatten the data
             for issue in issues:
                 flattened_issue = {
                     "number": issue["number"],
                     "author_avatar_url": None
-                    if issue.get("author", {}).get("avatarUrl", None) is None
+                    if (issue.get("author", None) or {}).get("avatarUrl", None) is None
                     else issue["author"]["avatarUrl"],
                     "author_login": None
-                    if issue.get("author", {}).get("login", None) is None
+                    if (issue.get("author", None) or {}).get("login", None) is None
                     else issue["author"]["login"],
                     "title": issue["title"],
                     "state": issue["state"],
@@ -1239,73 +1665,43 @@ class GithubWidgets:
                 }
                 flattened_data[interval].append(flattened_issue)
 
-        self.get_db_ref(owner, repo).document("most_active_issues").set(
-            {"data": flattened_data}
+        self.write_buffer.set(
+            self.get_db_ref(owner, repo).document("most_active_issues"),
+            {"data": flattened_data},
         )
 
+    @widget(outputs=["pull_request_count"])
     def pull_request_count(self, owner, repo, **kwargs):
         # formatting will be in api
-        query = """
-        query ($owner: String!, $name: String!) {
-            repository(owner: $owner, name: $name) {
-                openedPullRequests: pullRequests(states: OPEN) {
-                totalCount
-                }
-                closedPullRequests: pullRequests(states: CLOSED) {
-                totalCount
-                }
-            }
-        }
-        """
-        data = self.actor.github_graphql_make_query(
-            query, {"owner": owner, "name": repo}
-        )
+        repository = self.fetch_repository(owner, repo, "pull_request_count")
 
-        if not self.is_valid(data):
+        if not self.is_valid(repository):
             logger.warning("[!] Invalid or empty data returned")
             return
 
-        self.get_db_ref(owner, repo).document("pull_request_count").set(
+        self.write_buffer.set(
+            self.get_db_ref(owner, repo).document("pull_request_count"),
             {
                 "data": {
-                    "open": data["data"]["repository"]["openedPullRequests"][
-                        "totalCount"
-                    ],
-                    "closed": data["data"]["repository"]["closedPullRequests"][
-                        "totalCount"
-                    ],
-                }
-            }
+                    "open": repository["openedPullRequests"]["totalCount"],
+                    "closed": repository["closedPullRequests"]["totalCount"],
+                },
+            },
         )
 
+    @widget(outputs=["language_breakdown"])
     def language_breakdown(self, owner, repo, **kwargs):
         # formatting will be in api
-        query = """
-        query ($owner: String!, $name: String!) {
-            repository(owner: $owner, name: $name) {
-                languages(first: 100) {
-                    edges {
-                        size
-                        node {
-                            name
-                        }
-                    }
-                }
-            }
-        }
-        """
-        data = self.actor.github_graphql_make_query(
-            query, {"owner": owner, "name": repo}
-        )
+        repository = self.fetch_repository(owner, repo, "language_breakdown")
 
-        if not self.is_valid(data):
+        if not self.is_valid(repository):
             logger.warning("[!] Invalid or empty data returned")
             return
 
         flattened_data = []
 
         # Extract the languages from the response
-        languages = data["data"]["repository"]["languages"]["edges"]
+        languages = repository["languages"]["edges"]
 
         # Calculate the total size of the codebase
         total_size = sum(language["size"] for language in languages)
@@ -1320,8 +1716,9 @@ class GithubWidgets:
             }
             flattened_data.append(flattened_language)
 
-        self.get_db_ref(owner, repo).document("language_breakdown").set(
-            {"data": flattened_data}
+        self.write_buffer.set(
+            self.get_db_ref(owner, repo).document("language_breakdown"),
+            {"data": flattened_data},
         )
 
     class RecentIssuesOrder(Enum):
@@ -1332,52 +1729,24 @@ class GithubWidgets:
         CREATED_AT = "CREATED_AT"
         UPDATED_AT = "UPDATED_AT"
 
+    @widget(outputs=["recent_created_issues", "recent_updated_issues"])
     def recent_issues(self, owner, repo, **kwargs):
         # formatting will be in frontend
 
         order_by = kwargs.get("order_by", self.RecentIssuesOrder.CREATED_AT)
 
-        query = """
-        query ($owner: String!, $name: String!, $order_by: IssueOrderField!) {
-            repository(owner: $owner, name: $name) {
-                issues(first: 10, orderBy: {field: $order_by, direction: DESC}) {
-                    nodes {
-                        number
-                        author {
-                            avatarUrl
-                            login
-                        }
-                        title
-                        state
-                        comments {
-                            totalCount
-                        }
-                        url
-                        createdAt
-                        updatedAt
-                        repository {
-							name
-							owner {
-								login
-							}
-						}
-                    }
-                }
-            }
-        }
-        """
-        data = self.actor.github_graphql_make_query(
-            query, {"owner": owner, "name": repo, "order_by": order_by.value}
+        repository = self.fetch_repository(
+            owner, repo, f"recent_{order_by.value.split('_')[0].lower()}_issues"
         )
 
-        if not self.is_valid(data):
+        if not self.is_valid(repository):
             logger.warning("[!] Invalid or empty data returned")
             return
 
         flattened_data = []
 
         # Extract the issues from the response
-        issues = data["data"]["repository"]["issues"]["nodes"]
+        issues = repository["issues"]["nodes"]
 
         # Iterate through the issues and flatten the data
         for issue in issues:
@@ -1401,62 +1770,35 @@ class GithubWidgets:
             flattened_data.append(flattened_issue)
 
         if order_by == self.RecentIssuesOrder.CREATED_AT:
-            self.get_db_ref(owner, repo).document("recent_created_issues").set(
-                {"data": flattened_data}
+            self.write_buffer.set(
+                self.get_db_ref(owner, repo).document("recent_created_issues"),
+                {"data": flattened_data},
             )
 
         elif order_by == self.RecentIssuesOrder.UPDATED_AT:
-            self.get_db_ref(owner, repo).document("recent_updated_issues").set(
-                {"data": flattened_data}
+            self.write_buffer.set(
+                self.get_db_ref(owner, repo).document("recent_updated_issues"),
+                {"data": flattened_data},
             )
 
+    @widget(outputs=["recent_created_pull_requests", "recent_updated_pull_requests"])
     def recent_pull_requests(self, owner, repo, **kwargs):
         # formatting will be in frontend
 
         order_by = kwargs.get("order_by", self.RecentPullRequestsOrder.CREATED_AT)
-        query = f"""
-            query ($owner: String!, $name: String!) {{
-                repository(owner: $owner, name: $name) {{
-                    pullRequests(first: 10, orderBy: {{field: {order_by.value}, direction: DESC}}) {{
-                        nodes {{
-                            number
-                            author {{
-                                avatarUrl
-                                login
-                            }}
-                            title
-                            state
-                            comments {{
-                                totalCount
-                            }}
-                            createdAt
-                            updatedAt
-                            url
-                            repository {{
-							name
-							owner {{
-								login
-							}}
-						}}
-
-                        }}
-                    }}
-                }}
-            }}
-        """
 
-        data = self.actor.github_graphql_make_query(
-            query, {"owner": owner, "name": repo, "order_by": order_by.value}
+        repository = self.fetch_repository(
+            owner, repo, f"recent_{order_by.value.split('_')[0].lower()}_pull_requests"
         )
 
-        if not self.is_valid(data):
+        if not self.is_valid(repository):
             logger.warning("[!] Invalid or empty data returned")
             return
 
         flattened_data = []
 
         # Extract the pull requests from the response
-        pull_requests = data["data"]["repository"]["pullRequests"]["nodes"]
+        pull_requests = repository["pullRequests"]["nodes"]
 
         # Iterate through the pull requests and flatten the data
         for pull_request in pull_requests:
@@ -1480,15 +1822,18 @@ class GithubWidgets:
             flattened_data.append(flattened_pull_request)
 
         if order_by == self.RecentPullRequestsOrder.CREATED_AT:
-            self.get_db_ref(owner, repo).document("recent_created_pull_requests").set(
-                {"data": flattened_data}
+            self.write_buffer.set(
+                self.get_db_ref(owner, repo).document("recent_created_pull_requests"),
+                {"data": flattened_data},
             )
 
         elif order_by == self.RecentPullRequestsOrder.UPDATED_AT:
-            self.get_db_ref(owner, repo).document("recent_updated_pull_requests").set(
-                {"data": flattened_data}
+            self.write_buffer.set(
+                self.get_db_ref(owner, repo).document("recent_updated_pull_requests"),
+                {"data": flattened_data},
             )
 
+    @widget(outputs=["recent_stargazing_activity"])
     def recent_stargazing_activity(self, owner, repo, **kwargs):
         # formatting will be in here
 
@@ -1578,55 +1923,17 @@ class GithubWidgets:
             ],
         }
 
-        self.get_db_ref(owner, repo).document("recent_stargazing_activity").set(
-            {"data": chart_data}
+        self.write_buffer.set(
+            self.get_db_ref(owner, repo).document("recent_stargazing_activity"),
+            {"data": chart_data},
         )
 
+    @widget(outputs=["recent_commits"])
     def recent_commits(self, owner, repo, **kwargs):
         # formatting will be in frontend
-        query = """
-        query ($owner: String!, $name: String!, $count: Int!) {
-            repository(owner: $owner, name: $name) {
-                defaultBranchRef {
-                    target {
-                        ... on Commit {
-                            history(first: $count) {
-                                nodes {
-                                    author {
-                                        avatarUrl
-                                        user {
-                                            login
-                                        }
-                                    }
-                                    committer {
-                                        name
-                                    }
-
-									committer {
-										name
-									}
-									url
-                                    message
-                                    committedDate
-                                    repository {
-                                        name
-                                        owner {
-                                            login
-                                        }
-                                    }                                    
-                                }
-                            }
-                        }
-                    }
-                }
-            }
-        }
-        """
-        data = self.actor.github_graphql_make_query(
-            query, {"owner": owner, "name": repo, "count": 10}
-        )
+        repository = self.fetch_repository(owner, repo, "recent_commits")
 
-        if not self.is_valid(data):
+        if not self.is_valid(repository):
             logger.warning("[!] Invalid or empty data returned")
             return
 
@@ -1634,8 +1941,8 @@ class GithubWidgets:
 
         # Extract the commits from the response
         commits = (
-            data["data"]["repository"]["defaultBranchRef"]["target"]["history"]["nodes"]
-            if data["data"]["repository"]["defaultBranchRef"] is not None
+            repository["defaultBranchRef"]["target"]["history"]["nodes"]
+            if repository["defaultBranchRef"] is not None
             else []
         )
 
@@ -1658,10 +1965,12 @@ class GithubWidgets:
             }
             flattened_data.append(flattened_commit)
 
-        self.get_db_ref(owner, repo).document("recent_commits").set(
-            {"data": flattened_data}
+        self.write_buffer.set(
+            self.get_db_ref(owner, repo).document("recent_commits"),
+            {"data": flattened_data},
         )
 
+    @widget(outputs=["recent_releases"])
     def recent_releases(self, owner, repo, **kwargs):
         # formatting will be in frontend
 
@@ -1692,26 +2001,17 @@ class GithubWidgets:
             }
             """
 
-        has_next_page = True
-        while has_next_page:
-            data = self.actor.github_graphql_make_query(
-                query,
-                {
-                    "owner": owner,
-                    "name": repo,
-                    "cursor": cursor,
-                    "orderBy": "CREATED_AT",
-                },
-            )
-
-            if not self.is_valid(data):
+        # first page may have been fetched in a batched query
+        repository = self.fetch_repository(owner, repo, "recent_releases")
+        while True:
+            if not self.is_valid(repository):
                 logger.info(
                     f"[#invalid] No recent releases for repository {owner}/{repo}"
                 )
                 break
 
             # Extract the releases from the response
-            releases = data["data"]["repository"]["releases"]["nodes"]
+            releases = repository["releases"]["nodes"]
 
             # Iterate through the releases and flatten the data
             for release in releases:
@@ -1726,15 +2026,26 @@ class GithubWidgets:
                 flattened_data.append(flattened_release)
 
             # Check if there is another page of data to fetch
-            has_next_page = data["data"]["repository"]["releases"]["pageInfo"][
-                "hasNextPage"
-            ]
+            has_next_page = repository["releases"]["pageInfo"]["hasNextPage"]
             if not has_next_page:
                 break
 
             # Update the cursor
-            cursor = data["data"]["repository"]["releases"]["pageInfo"]["endCursor"]
+            cursor = repository["releases"]["pageInfo"]["endCursor"]
+
+            data = self.actor.github_graphql_make_query(
+                query,
+                {
+                    "owner": owner,
+                    "name": repo,
+                    "cursor": cursor,
+                    "orderBy": "CREATED_AT",
+                },
+            )
+            repository = data["data"]["repository"] if self.is_valid(data) else None
 
-        self.get_db_ref(owner, repo).document("recent_releases").set(
-            {"data": flattened_data}
+        self.write_buffer.set(
+            self.get_db_ref(owner, repo).document("recent_releases"),
+            {"data": flattened_data},
         )
+        return flattened_data
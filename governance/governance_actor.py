@@ -1,20 +1,13 @@
-from socket import timeout
-import requests
 import os
-import time
-import time
+import asyncio
 import logging
-from requests.adapters import HTTPAdapter
+import tools.async_http as async_http
 
 logger = logging.getLogger(__name__)
 
 
 class GovernanceActor:
-    @property
-    def get_session(self):
-        return self.session
-
-    def __init__(self, session=None):
+    def __init__(self, client=None):
         self.governance_graphql_endpoint = "https://api.tally.xyz/query"
         self.governance_graphql_headers = {"Api-Key": os.environ["TALLY_API_KEY"]}
 
@@ -24,12 +17,21 @@ class GovernanceActor:
             "Api-Key": os.environ["TALLY_API_KEY"],
         }
 
-        self.session = session
-        if not self.session:
-            self.session = requests.Session()
+        # shared pooled client of the running event loop is used when no client is given
+        self.client = client
+
+    def get_client(self):
+        return self.client or async_http.get_client()
 
     def governance_rest_make_request(
         self, url, variables=None, max_page_fetch=float("inf")
+    ):
+        return async_http.run_sync(
+            self.governance_rest_make_request_async(url, variables, max_page_fetch)
+        )
+
+    async def governance_rest_make_request_async(
+        self, url, variables=None, max_page_fetch=float("inf")
     ):
         url = f"{self.governance_rest_endpoint}{url}"
         result = []
@@ -38,8 +40,9 @@ class GovernanceActor:
         logger.info(f". [=] Fetching data from REST API from {url}")
         while url and (current_fetch_count < max_page_fetch):
             logger.info(f". page {current_fetch_count + 1}/{max_page_fetch} of {url}")
-            self.session.headers.update(self.governance_rest_headers)
-            response = self.session.get(url, params=variables)
+            response = await self.get_client().get(
+                url, params=variables, headers=self.governance_rest_headers
+            )
 
             if response.status_code == 200:
                 json_response = response.json()
@@ -47,12 +50,12 @@ class GovernanceActor:
 
             elif response.status_code == 429:
                 logger.warning(". [!] Rate limit exceeded. Waiting for 10 seconds.")
-                time.sleep(10)
+                await asyncio.sleep(10)
                 continue
 
             elif response.status_code == 502:
                 logger.warning(". [-] Bad gateway.")
-                time.sleep(30)
+                await asyncio.sleep(30)
                 continue
 
             else:
@@ -65,20 +68,26 @@ class GovernanceActor:
         return result
 
     def governance_graphql_make_query(self, _query, variables=None):
+        return async_http.run_sync(
+            self.governance_graphql_make_query_async(_query, variables)
+        )
+
+    async def governance_graphql_make_query_async(self, _query, variables=None):
         logger.info(
             f". [=] Fetching data from Graphql API from {self.governance_graphql_endpoint}"
         )
-        self.session.headers.update(self.governance_graphql_headers)
-        response = self.session.post(
+        response = await self.get_client().post(
             self.governance_graphql_endpoint,
             json={"query": _query, "variables": variables},
-            timeout=120
+            headers=self.governance_graphql_headers,
+            timeout=120,
         )
 
         if response.status_code in (301, 302):
-            response = self.session.post(
+            response = await self.get_client().post(
                 response.headers["location"],
                 json={"query": _query, "variables": variables},
+                headers=self.governance_graphql_headers,
             )
 
         if response.status_code == 200:
@@ -87,13 +96,13 @@ class GovernanceActor:
 
         elif response.status_code == 429:
             logger.warning(". [!] Rate limit exceeded. Waiting for 10 seconds.")
-            time.sleep(10)
-            return self.governance_graphql_make_query(_query, variables)
+            await asyncio.sleep(10)
+            return await self.governance_graphql_make_query_async(_query, variables)
 
         elif response.status_code == 502:
             logger.warning(". [-] Bad gateway.")
-            time.sleep(30)
-            return self.governance_graphql_make_query(_query, variables)
+            await asyncio.sleep(30)
+            return await self.governance_graphql_make_query_async(_query, variables)
 
         else:
             logger.error(
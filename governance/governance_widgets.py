@@ -1,6 +1,7 @@
 import logging
 from enum import Enum
 from .governance_actor import GovernanceActor
+from tools.write_buffer import WriteBuffer
 
 logger = logging.getLogger(__name__)
 
@@ -14,9 +15,11 @@ class GovernanceWidgets:
         organization_id,
         chain_id,
         slug,
+        write_buffer=None,
     ):
         self.actor = actor
         self.collection_refs = collection_refs
+        self.write_buffer = write_buffer or WriteBuffer()
         self.governance_id = governance_id
         self.organization_id = organization_id
         self.chain_id = chain_id
@@ -132,9 +135,12 @@ class GovernanceWidgets:
                 # Append series data to chart data
                 chart_data["series"].append(series_data)
 
-            self.collection_refs["governance"].document(
-                f"voting_power_chart_{interval.value.lower()}"
-            ).set({"data": chart_data})
+            self.write_buffer.set(
+                self.collection_refs["governance"].document(
+                    f"voting_power_chart_{interval.value.lower()}"
+                ),
+                {"data": chart_data},
+            )
 
     class DelegateSortField(Enum):
         CREATED = "CREATED"
@@ -262,9 +268,12 @@ class GovernanceWidgets:
 
                 flatted_delegates.append(delegate)
 
-            self.collection_refs["governance"].document(
-                f"delegates_{order_by.value.lower()}"
-            ).set({"data": flatted_delegates})
+            self.write_buffer.set(
+                self.collection_refs["governance"].document(
+                    f"delegates_{order_by.value.lower()}"
+                ),
+                {"data": flatted_delegates},
+            )
 
     def proposals(self, **kwargs):
         query = """
@@ -400,8 +409,9 @@ class GovernanceWidgets:
 
             flattened_proposals.append(proposal)
 
-        self.collection_refs["governance"].document("proposals").set(
-            {"data": flattened_proposals}
+        self.write_buffer.set(
+            self.collection_refs["governance"].document("proposals"),
+            {"data": flattened_proposals},
         )
 
     def governance_info(self, **kwargs):
@@ -498,13 +508,15 @@ class GovernanceWidgets:
                     "tally_url"
                 ] = f"https://www.tally.xyz/gov/{self.slug}"
             except:
-                self.collection_refs["governance"].document("governance_info").set(
-                    {"data": None}
+                self.write_buffer.set(
+                    self.collection_refs["governance"].document("governance_info"),
+                    {"data": None},
                 )
                 return
 
-        self.collection_refs["governance"].document("governance_info").set(
-            {"data": governance_info}
+        self.write_buffer.set(
+            self.collection_refs["governance"].document("governance_info"),
+            {"data": governance_info},
         )
 
     def safes(self, **kwargs):
@@ -523,4 +535,6 @@ class GovernanceWidgets:
                     "tally_url"
                 ] = f"https://www.tally.xyz/profile/{owner['address']}?governanceId={self.governance_id}"
 
-        self.collection_refs["governance"].document("safes").set({"data": data})
+        self.write_buffer.set(
+            self.collection_refs["governance"].document("safes"), {"data": data}
+        )
@@ -1,18 +1,14 @@
-import requests
 import os
-import time
+import asyncio
 import logging
+import tools.async_http as async_http
 import tools.log_config as log_config
 
 logger = logging.getLogger(__name__)
 
 
 class MessariActor:
-    @property
-    def get_session(self):
-        return self.session
-
-    def __init__(self, session=None):
+    def __init__(self, client=None):
         self.messari_api_endpoint = "https://data.messari.io/api"
 
         api_key = os.environ.get("MESSARI_API_KEY", None)
@@ -23,11 +19,20 @@ class MessariActor:
             "Accept": "application/json",
             "x-messari-api-key": api_key,
         }
-        self.session = session
-        if not self.session:
-            self.session = requests.Session()
+        # shared pooled client of the running event loop is used when no client is given
+        self.client = client
+
+    def get_client(self):
+        return self.client or async_http.get_client()
 
     def messari_rest_make_request(self, url, variables=None, max_page_fetch=float("inf"), server_fail_max_try=3):
+        return async_http.run_sync(
+            self.messari_rest_make_request_async(url, variables, max_page_fetch, server_fail_max_try)
+        )
+
+    async def messari_rest_make_request_async(
+        self, url, variables=None, max_page_fetch=float("inf"), server_fail_max_try=3
+    ):
         url = f"{self.messari_api_endpoint}{url}"
         result = []
 
@@ -36,8 +41,7 @@ class MessariActor:
         logger.info(f". [=] Fetching data from REST API from {url}")
         while url and (current_fetch_count < max_page_fetch):
             logger.info(f". page {current_fetch_count + 1}/{max_page_fetch} of {url}")
-            self.session.headers.update(self.messari_rest_headers)
-            response = self.session.get(url, params=variables)
+            response = await self.get_client().get(url, params=variables, headers=self.messari_rest_headers)
 
             if response.status_code == 200:
                 json_response = response.json()
@@ -45,14 +49,14 @@ class MessariActor:
 
             elif response.status_code == 429:
                 logger.info(". [...] Rate limit exceeded. Waiting for 1 minute.")
-                time.sleep(1 * 60)
+                await asyncio.sleep(1 * 60)
                 continue  # fetch again!
 
             elif response.status_code == 500:
                 logger.info(". [!] Server error. Let's try again.")
                 server_fail_current_try += 1
                 if server_fail_current_try < server_fail_max_try:
-                    time.sleep(1.1)
+                    await asyncio.sleep(1.1)
                     continue
                 else:
                     logger.error(f" [-] Server error. Tried {server_fail_max_try} times. Giving up.")
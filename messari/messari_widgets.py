@@ -2,14 +2,18 @@ from .messari_actor import MessariActor
 import logging
 import tools.log_config as log_config
 import datetime
+from tools.write_buffer import WriteBuffer
 
 logger = logging.getLogger(__name__)
 
 
 class MessariWidgets:
-    def __init__(self, actor: MessariActor, collection_refs, asset_key):
+    def __init__(
+        self, actor: MessariActor, collection_refs, asset_key, write_buffer=None
+    ):
         self.actor = actor
         self.collection_refs = collection_refs
+        self.write_buffer = write_buffer or WriteBuffer()
         self.asset_key = asset_key
 
     def is_valid(self, response):
@@ -31,7 +35,9 @@ class MessariWidgets:
             logger.warning("[!] Invalid or empty data returned")
             return
 
-        self.collection_refs["messari"].document("asset").set({"data": data})
+        self.write_buffer.set(
+            self.collection_refs["messari"].document("asset"), {"data": data}
+        )
 
     def asset_profile(self, **kwargs):
         data = self.actor.messari_rest_make_request(url=f"/v2/assets/{self.asset_key}/profile", max_page_fetch=1)
@@ -40,7 +46,9 @@ class MessariWidgets:
             logger.warning("[!] Invalid or empty data returned")
             return
 
-        self.collection_refs["messari"].document("asset_profile").set({"data": data})
+        self.write_buffer.set(
+            self.collection_refs["messari"].document("asset_profile"), {"data": data}
+        )
 
     def asset_metrics(self, **kwargs):
         data = self.actor.messari_rest_make_request(url=f"/v1/assets/{self.asset_key}/metrics", max_page_fetch=1)
@@ -49,7 +57,9 @@ class MessariWidgets:
             logger.warning("[!] Invalid or empty data returned")
             return
 
-        self.collection_refs["messari"].document("asset_metrics").set({"data": data})
+        self.write_buffer.set(
+            self.collection_refs["messari"].document("asset_metrics"), {"data": data}
+        )
 
     def asset_metrics(self, **kwargs):
         data = self.actor.messari_rest_make_request(url=f"/v1/assets/{self.asset_key}/metrics", max_page_fetch=1)
@@ -58,7 +68,9 @@ class MessariWidgets:
             logger.warning("[!] Invalid or empty data returned")
             return
 
-        self.collection_refs["messari"].document("asset_metrics").set({"data": data})
+        self.write_buffer.set(
+            self.collection_refs["messari"].document("asset_metrics"), {"data": data}
+        )
 
     def asset_timeseries(self, **kwargs):
         data = self.actor.messari_rest_make_request(url=f"/v1/assets/metrics", max_page_fetch=1)
@@ -91,14 +103,23 @@ class MessariWidgets:
                     data["data"]["values"] = [
                         dict(zip(data["data"]["parameters"]["columns"], v)) for v in data["data"]["values"]
                     ]
-                    self.collection_refs["messari"].document(f"asset_timeseries_{metric_id}_{interval}").set(
-                        {"data": data}
+                    self.write_buffer.set(
+                        self.collection_refs["messari"].document(
+                            f"asset_timeseries_{metric_id}_{interval}"
+                        ),
+                        {"data": data},
                     )
 
+        # timeseries documents written above are listed back from the database
+        self.write_buffer.flush()
+
         indexed_timeseries_list = []
         ref = self.collection_refs["messari"].stream()
         for doc in ref:
             if str(doc.id).startswith("asset_timeseries"):
                 indexed_timeseries_list.append(doc.id)
 
-        self.collection_refs["messari"].document("indexed_timeseries_list").set({"data": indexed_timeseries_list})
+        self.write_buffer.set(
+            self.collection_refs["messari"].document("indexed_timeseries_list"),
+            {"data": indexed_timeseries_list},
+        )
@@ -10,17 +10,25 @@ from governance.governance_widgets import GovernanceWidgets
 from messari.messari_actor import MessariActor
 from messari.messari_widgets import MessariWidgets
 from github.github_leaderboard import GithubLeaderboard
+from github.github_actor import GithubStatsPending
 import traceback
 import tools.log_config as log_config
 import tools.helpers as helpers
+from tools.write_buffer import WriteBuffer
+from tools.stage_scheduler import StageScheduler
+from tools.widget_graph import WidgetGraph
 from enum import Enum
 import time
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 logger = logging.getLogger(__name__)
 
 
 class Pipeline:
-    def __init__(self, app, db, github_actor):
+    def __init__(self, app, db, github_actor, journal):
         self.app = app
         self.db = db
         self.repositories = []
@@ -33,13 +41,45 @@ class Pipeline:
         self.protocol_messari_functions = []
         self.protocol_github_functions = []
         self.protocol_leaderboard_functions = []
+        self.project_unchanged_functions = []
+
+        # number of repositories processed at the same time, and number of
+        # independent widgets run in parallel for each of those repositories
+        self.repository_workers = int(os.environ.get("PIPELINE_REPOSITORY_WORKERS", 4))
+        self.widget_workers = int(os.environ.get("PIPELINE_WIDGET_WORKERS", 4))
+        # number of batched database commits in flight at the same time
+        self.write_workers = int(os.environ.get("PIPELINE_WRITE_WORKERS", 4))
+        self.write_buffer = None
+
+        # widgets waiting for github to compute repository statistics are retried with backoff
+        self.prewarm_stats = os.environ.get("PIPELINE_PREWARM_STATS", "true").lower() == "true"
+        self.stats_retry_delay = int(os.environ.get("PIPELINE_STATS_RETRY_DELAY", 30))
+        self.stats_max_retry_delay = int(os.environ.get("PIPELINE_STATS_MAX_RETRY_DELAY", 600))
+        self.stats_retries = int(os.environ.get("PIPELINE_STATS_RETRIES", 6))
+        self.parked_repositories = []
+        self.parked_lock = threading.Lock()
+
+        # repositories whose fingerprint has not changed run a reduced set of widgets, all of
+        # the widgets are run again after this many days
+        self.full_run_days = int(os.environ.get("PIPELINE_FULL_RUN_DAYS", 14))
+        # fingerprints to store once the full run of the repository is finished
+        self.full_run_fingerprints = {}
+        self.full_run_fingerprints_lock = threading.Lock()
+
+        # completed units of the update run, shared by the pipelines of all protocols
+        self.journal = journal
+        # units are recorded in the journal once their writes are flushed to the database
+        self.journal_pending = []
+        self.journal_pending_lock = threading.Lock()
 
     def build_discourse_pipeline(self, protocol):
         if protocol.get("forum", None):
             logger.info(f"Found forum configuration for protocol {self.protocol_name}.")
             forum_base_url = protocol["forum"][:-1] if protocol["forum"].endswith("/") else protocol["forum"]
             self.discourse_actor = DiscourseActor(forum_base_url)
-            self.discourse_widgets = DiscourseWidgets(self.discourse_actor, self.collection_refs)
+            self.discourse_widgets = DiscourseWidgets(
+                self.discourse_actor, self.collection_refs, self.write_buffer
+            )
             self.protocol_discourse_functions = [
                 self.discourse_widgets.topics,
                 self.discourse_widgets.users,
@@ -71,6 +111,7 @@ class Pipeline:
                 organization_id,
                 chain_id,
                 slug,
+                self.write_buffer,
             )
 
             self.protocol_governance_functions = [
@@ -92,7 +133,9 @@ class Pipeline:
                 return
 
             self.messari_actor = MessariActor()
-            self.messari_widgets = MessariWidgets(self.messari_actor, self.collection_refs, asset_key)
+            self.messari_widgets = MessariWidgets(
+                self.messari_actor, self.collection_refs, asset_key, self.write_buffer
+            )
             self.protocol_messari_functions = [
                 self.messari_widgets.asset,
                 self.messari_widgets.asset_profile,
@@ -105,7 +148,10 @@ class Pipeline:
             logger.info(f"Found dev reports configuration for protocol {self.protocol_name}.")
             self.developers_actor = DevelopersActor()
             self.developers_widget = DevelopersWidget(
-                self.developers_actor, self.collection_refs, protocol["developers"]
+                self.developers_actor,
+                self.collection_refs,
+                protocol["developers"],
+                self.write_buffer,
             )
             self.protocol_developers_functions = [
                 self.developers_widget.full_time,
@@ -120,15 +166,18 @@ class Pipeline:
             ]
 
     def build_github_pipeline(self):
-        self.github_widgets = GithubWidgets(self.github_actor, self.collection_refs)
-        self.github_cumulative = GithubCumulative(self.github_actor, self.collection_refs)
-        self.github_leaderboard = GithubLeaderboard(self.github_actor, self.collection_refs)
+        self.github_widgets = GithubWidgets(self.github_actor, self.collection_refs, self.write_buffer)
+        self.github_cumulative = GithubCumulative(
+            self.github_actor, self.collection_refs, self.write_buffer, self.db
+        )
+        # cumulative widgets are fed with the repository documents as they are written
+        self.write_buffer.add_listener(self.github_cumulative.observe)
+        self.github_leaderboard = GithubLeaderboard(self.github_actor, self.collection_refs, self.write_buffer)
 
         self.project_pipeline_functions = [
             self.github_widgets.commit_activity,
             self.github_widgets.code_frequency,
             self.github_widgets.participation,
-            self.github_widgets.code_frequency,
             self.github_widgets.community_profile,
             self.github_widgets.punch_card,
             self.github_widgets.issue_count,
@@ -157,6 +206,33 @@ class Pipeline:
             self.github_widgets.contributors,  # paginated
             self.github_widgets.issue_activity,  # paginated
             self.github_widgets.pull_request_activity,  # paginated
+            # runs once the widgets it reads are completed, see the widget declarations
+            self.github_widgets.health_score,
+        ]
+
+        # run instead of the project functions for the repositories which have not changed
+        # since their last full run. issue and pull request activity is not reflected in the
+        # fingerprint, the incremental widgets below catch it. the statistics are windows of the
+        # last weeks which move without the repository changing, their conditional requests
+        # cost nothing while github has not recomputed them
+        self.project_unchanged_functions = [
+            self.github_widgets.commit_activity,
+            self.github_widgets.participation,
+            self.github_widgets.code_frequency,
+            self.github_widgets.punch_card,
+            self.github_widgets.issue_count,
+            self.github_widgets.pull_request_count,
+            (
+                self.github_widgets.recent_issues,
+                {"order_by": self.github_widgets.RecentIssuesOrder.UPDATED_AT},
+            ),
+            (
+                self.github_widgets.recent_pull_requests,
+                {"order_by": self.github_widgets.RecentPullRequestsOrder.UPDATED_AT},
+            ),
+            self.github_widgets.most_active_issues,
+            self.github_widgets.issue_activity,
+            self.github_widgets.pull_request_activity,
             self.github_widgets.health_score,
         ]
 
@@ -207,6 +283,17 @@ class Pipeline:
         self.protocol_messari_functions.clear()
         self.protocol_github_functions.clear()
         self.protocol_leaderboard_functions.clear()
+        self.project_unchanged_functions.clear()
+        self.parked_repositories.clear()
+        self.full_run_fingerprints.clear()
+
+        updater_config = protocol.get("updater", {})
+        self.protocol_repository_workers = updater_config.get("repository_workers", self.repository_workers)
+        self.protocol_widget_workers = updater_config.get("widget_workers", self.widget_workers)
+        self.protocol_full_run_days = updater_config.get("full_run_days", self.full_run_days)
+
+        # widget writes of the protocol are committed to the database in batches
+        self.write_buffer = WriteBuffer(self.db, self.write_workers)
 
         self.build_github_pipeline()
 
@@ -228,108 +315,428 @@ class Pipeline:
             f"[*] {len(self.repositories)} indexed repositories for protocol {self.protocol_name} will be updated."
         )
 
-    def run_pipelines(self):
-        self.run_protocol_pipeline(helpers.PipelineType.GOVERNANCE, self.protocol_governance_functions)
-        self.run_protocol_pipeline(helpers.PipelineType.DISCOURSE, self.protocol_discourse_functions)
-        self.run_protocol_pipeline(helpers.PipelineType.DEVELOPERS, self.protocol_developers_functions)
-        # self.run_protocol_pipeline(helpers.PipelineType.MESSARI, self.protocol_messari_functions) # will implement later
-        self.run_project_pipeline(helpers.PipelineType.GITHUB_PROJECTS, self.project_pipeline_functions)
+    def get_item_name(self, item):
+        if isinstance(item, tuple) or isinstance(item, list):
+            func, kwargs = item[0], item[1] if len(item) > 1 else {}
+        else:
+            func, kwargs = item, {}
+
+        if not kwargs:
+            return func.__name__
+        args = ",".join(f"{key}={getattr(value, 'value', value)}" for key, value in kwargs.items())
+        return f"{func.__name__}({args})"
+
+    def is_completed(self, pipeline_type, repository="", widget=""):
+        return self.journal.is_completed(self.protocol_name, pipeline_type.value, repository, widget)
+
+    def mark_completed(self, pipeline_type, repository="", widget=""):
+        with self.journal_pending_lock:
+            self.journal_pending.append((self.protocol_name, pipeline_type.value, repository, widget))
+
+    def add_stages(self, scheduler):
+        """
+        Adds the stages of the protocol to the scheduler. The stages hitting other upstreams than
+        github run alongside the github ones, only projects -> cumulative -> leaderboard are ordered.
+        """
+
+        def get_stage_name(pipeline_type):
+            return f"{self.protocol_name}/{pipeline_type.value}"
+
+        scheduler.add_stage(
+            get_stage_name(helpers.PipelineType.GOVERNANCE),
+            lambda: self.run_protocol_pipeline(helpers.PipelineType.GOVERNANCE, self.protocol_governance_functions),
+            "tally",
+        )
+        scheduler.add_stage(
+            get_stage_name(helpers.PipelineType.DISCOURSE),
+            lambda: self.run_protocol_pipeline(helpers.PipelineType.DISCOURSE, self.protocol_discourse_functions),
+            "discourse",
+        )
+        scheduler.add_stage(
+            get_stage_name(helpers.PipelineType.DEVELOPERS),
+            lambda: self.run_protocol_pipeline(helpers.PipelineType.DEVELOPERS, self.protocol_developers_functions),
+            "developers",
+        )
+        # messari pipeline will be implemented later, it would run on the "messari" upstream
+        scheduler.add_stage(
+            get_stage_name(helpers.PipelineType.GITHUB_PROJECTS),
+            lambda: self.run_project_pipeline(
+                helpers.PipelineType.GITHUB_PROJECTS,
+                self.project_pipeline_functions,
+                self.project_unchanged_functions,
+            ),
+            "github",
+        )
+        # cumulative and leaderboard widgets only read the database
+        scheduler.add_stage(
+            get_stage_name(helpers.PipelineType.GITHUB_CUMULATIVE),
+            self.run_cumulative_pipeline,
+            "firestore",
+            after=[get_stage_name(helpers.PipelineType.GITHUB_PROJECTS)],
+        )
+        scheduler.add_stage(
+            get_stage_name(helpers.PipelineType.GITHUB_LEADERBOARD),
+            lambda: self.run_protocol_pipeline(
+                helpers.PipelineType.GITHUB_LEADERBOARD, self.protocol_leaderboard_functions
+            ),
+            "firestore",
+            after=[get_stage_name(helpers.PipelineType.GITHUB_CUMULATIVE)],
+        )
+
+    def run_cumulative_pipeline(self):
         self.run_protocol_pipeline(helpers.PipelineType.GITHUB_CUMULATIVE, self.protocol_github_functions)
-        self.run_protocol_pipeline(helpers.PipelineType.GITHUB_LEADERBOARD, self.protocol_leaderboard_functions)
+        self.github_cumulative.clear_sweep()
+
+    def run_pipelines(self):
+        scheduler = StageScheduler()
+        self.add_stages(scheduler)
+        scheduler.run()
 
     def function_executer(self, f, *args, **kwargs):
         logging.info(f"[...] Running function: {f.__name__}")
         try:
             if len(args) and len(kwargs):
-                f(*args, **kwargs)
+                result = f(*args, **kwargs)
 
             elif len(args):
-                f(*args)
+                result = f(*args)
 
             elif len(kwargs):
-                f(**kwargs)
+                result = f(**kwargs)
 
             else:
-                f()
+                result = f()
+
+        except GithubStatsPending:
+            # handled by the project pipeline, which retries the function later
+            raise
 
         except Exception as e:
             logging.info(f"[#ERR] Error running function: {f.__name__} error: {e}")
             # log traceback
             logging.error(traceback.format_exc())
-            return
+            return False, None
 
         else:
             logging.info(f"[*] Completed running function: {f.__name__}")
+            return True, result
+
+    def flush_journaled_writes(self):
+        # units taken before the flush have all of their writes in it
+        with self.journal_pending_lock:
+            units, self.journal_pending = self.journal_pending, []
+
+        # on error their writes may be lost, they are not completed and the next run runs them again,
+        # even if a later flush succeeds
+        self.write_buffer.flush()
+        self.journal.complete(units)
+
+    def flush_writes(self):
+        try:
+            self.flush_journaled_writes()
+        except Exception as e:
+            logging.info(f"[#ERR] Error writing buffered widgets to database error: {e}")
+            logging.error(traceback.format_exc())
+            return False
+        return True
 
     def run_protocol_pipeline(self, pipeline_type, protocol_pipeline):
+        if self.is_completed(pipeline_type):
+            logger.info(f"[*] {self.protocol_name.upper()}/{pipeline_type} was completed by this run, skipping it.")
+            return
+
         is_cumulative = False
         if pipeline_type == helpers.PipelineType.GITHUB_CUMULATIVE:
             is_cumulative = True
         for i, item in enumerate(protocol_pipeline):
             logger.info(f"[===] {self.protocol_name.upper()}/{pipeline_type} - [{i + 1}/{len(protocol_pipeline)}]")
+            item_name = self.get_item_name(item)
+            if self.is_completed(pipeline_type, widget=item_name):
+                logger.info(f"[*] {item_name} was completed by this run, skipping it.")
+                continue
+
             if isinstance(item, tuple) or isinstance(item, list):
                 if len(item) == 1:
-                    self.function_executer(item[0], is_cumulative=is_cumulative)
+                    completed, _ = self.function_executer(item[0], is_cumulative=is_cumulative)
                 else:
-                    self.function_executer(item[0], is_cumulative=is_cumulative, **item[1])
+                    completed, _ = self.function_executer(item[0], is_cumulative=is_cumulative, **item[1])
             else:
-                self.function_executer(item, is_cumulative=is_cumulative)
+                completed, _ = self.function_executer(item, is_cumulative=is_cumulative)
+
+            if completed:
+                self.mark_completed(pipeline_type, widget=item_name)
 
             # sleep for 3 hours after the function execution
             # if is_cumulative:
             #     logging.info(f"[*] Sleeping for 2 hours after running function: {f.__name__}")
             #     time.sleep(60 * 60 * 2)
 
-        helpers.write_last_updated(self.collection_refs["last_updated"], pipeline_type.value)
+        # following pipelines read what this one wrote
+        # readers are told there is new data only once it is written
+        if self.flush_writes():
+            helpers.write_last_updated(self.collection_refs["last_updated"], pipeline_type.value)
+            self.journal.complete([(self.protocol_name, pipeline_type.value, "", "")])
+
+    def run_project_item(self, item, owner, repo, **extra):
+        if isinstance(item, tuple) or isinstance(item, list):
+            if len(item) == 1:
+                func = item[0]
+                return self.function_executer(func, owner, repo, **extra)
+            else:
+                func, args = item
+                return self.function_executer(func, owner, repo, **args, **extra)
+        else:
+            return self.function_executer(item, owner, repo, **extra)
 
-    def run_project_pipeline(self, pipeline_type, project_pipeline):
-        # sleep every two hours after processing 100 projects
-        for i, repository in enumerate(self.repositories):
-            if not repository:
-                continue
+    def is_repository_unchanged(self, repository, fingerprint):
+        stored = self.github_widgets.read_fingerprint(repository["owner"], repository["repo"])
+        if not stored or stored.get("fingerprint", None) != fingerprint:
+            return False
 
-            repo_data = self.github_widgets.repository_info(repository["owner"], repository["repo"])
-            if repo_data["valid"] is False:
-                logger.warning(f'Passing on invalid repository {repository["owner"]}/{repository["repo"]}')
-                continue
+        full_run_at = datetime.fromisoformat(stored["full_run_at"])
+        return datetime.now(timezone.utc) - full_run_at < timedelta(days=self.protocol_full_run_days)
 
-            docs = (
-                self.collection_refs["widgets"]
-                .document("repositories")
-                .collection(f"{repository['owner']}#{repository['repo']}")
-                .get()
+    def run_repository_pipeline(self, pipeline_type, i, repository, project_pipeline, unchanged_pipeline=None):
+        repo_data = self.github_widgets.repository_info(repository["owner"], repository["repo"])
+        if repo_data["valid"] is False:
+            logger.warning(f'Passing on invalid repository {repository["owner"]}/{repository["repo"]}')
+            return
+
+        docs = (
+            self.collection_refs["widgets"]
+            .document("repositories")
+            .collection(f"{repository['owner']}#{repository['repo']}")
+            .limit(1)
+            .get()
+        )
+
+        # Check if the collection is empty
+        if not docs:
+            logger.info(
+                f'Repository {repository["owner"]}/{repository["repo"]} does not exist in database. Creating it now.'
+            )
+            self.collection_refs["widgets"].document("repositories").collection(
+                f"{repository['owner']}#{repository['repo']}"
+            ).document("dummy").set({})
+
+        fused_widgets = None
+        fingerprint = self.github_widgets.get_fingerprint(repo_data)
+        if unchanged_pipeline is not None and self.is_repository_unchanged(repository, fingerprint):
+            logger.info(
+                f'Repository {repository["owner"]}/{repository["repo"]} has not changed since its last full run, running {len(unchanged_pipeline)} widgets.'
             )
+            project_pipeline = unchanged_pipeline
+            fused_widgets = self.github_widgets.UNCHANGED_FUSED_WIDGETS
+        else:
+            with self.full_run_fingerprints_lock:
+                self.full_run_fingerprints[(repository["owner"], repository["repo"])] = fingerprint
+
+        # widgets completed before the run was interrupted are not run again
+        repository_name = f"{repository['owner']}#{repository['repo']}"
+        project_pipeline = [
+            item
+            for item in project_pipeline
+            if not self.is_completed(pipeline_type, repository_name, self.get_item_name(item))
+        ]
 
-            # Check if the collection is empty
-            if not docs:
-                logger.info(
-                    f'Repository {repository["owner"]}/{repository["repo"]} does not exist in database. Creating it now.'
-                )
-                self.collection_refs["widgets"].document("repositories").collection(
-                    f"{repository['owner']}#{repository['repo']}"
-                ).document("dummy").set({})
+        logger.info(f'Running pipeline for repository {repository["owner"]}/{repository["repo"]}')
+
+        # graphql widgets that are not prefetched yet are fetched with a single fused query
+        try:
+            self.github_widgets.prefetch_repository(repository["owner"], repository["repo"], fused_widgets)
+        except Exception as e:
+            logging.info(f"[#ERR] Error prefetching repository, widgets will fetch it one by one. error: {e}")
+
+        # widgets run as soon as the widgets they read are completed, and get their results in memory
+        graph = WidgetGraph(project_pipeline, self.get_item_name, {"repository_info": repo_data})
+        with ThreadPoolExecutor(max_workers=self.protocol_widget_workers) as executor:
+            self.run_widget_graph(pipeline_type, i, repository, graph, executor)
+
+        if graph.get_pending():
+            # the widgets reading them run once github has computed the statistics
+            self.park_repository(pipeline_type, i, repository, graph)
+            return
+
+        self.finish_repository_pipeline(pipeline_type, i, repository, graph)
+
+    def run_widget_graph(self, pipeline_type, i, repository, graph, executor):
+        positions = {name: j for j, name in enumerate(graph.items)}
+
+        def run_item(item, inputs):
+            j = positions[self.get_item_name(item)]
+            return self.run_repository_item(pipeline_type, i, repository, j, len(positions), item, inputs)
 
-            logger.info(f'Running pipeline for repository {repository["owner"]}/{repository["repo"]}')
+        graph.run(executor, run_item)
 
-            for j, item in enumerate(project_pipeline):
-                logger.info(
-                    f"[===] {self.protocol_name.upper()}/{pipeline_type} - [{i+1}/{len(self.repositories)}] {repository['owner']}#{repository['repo']} - [{j + 1}/{len(project_pipeline)}]"
+    def run_repository_item(self, pipeline_type, i, repository, j, total, item, inputs=None):
+        """
+        Runs a widget of a repository, returns its state and result. Widgets with inputs get the
+        results of the widgets they read, the missing ones are read from the database.
+        """
+        logger.info(
+            f"[===] {self.protocol_name.upper()}/{pipeline_type} - [{i+1}/{len(self.repositories)}] {repository['owner']}#{repository['repo']} - [{j + 1}/{total}]"
+        )
+        # inputs missing were not written by this run, they are read from the database
+        extra = {"inputs": inputs} if inputs is not None else {}
+        try:
+            completed, result = self.run_project_item(item, repository["owner"], repository["repo"], **extra)
+        except GithubStatsPending as e:
+            logger.info(f"[...] {e}, retrying later.")
+            return WidgetGraph.PENDING, None
+
+        if not completed:
+            return WidgetGraph.FAILED, None
+
+        self.mark_completed(pipeline_type, f"{repository['owner']}#{repository['repo']}", self.get_item_name(item))
+        return WidgetGraph.COMPLETED, result
+
+    def finish_repository_pipeline(self, pipeline_type, i, repository, graph):
+        self.github_widgets.clear_prefetched(repository["owner"], repository["repo"])
+
+        with self.full_run_fingerprints_lock:
+            fingerprint = self.full_run_fingerprints.pop((repository["owner"], repository["repo"]), None)
+
+        # failed and skipped widgets are run again by the next full run, not the reduced one
+        failed = [name for name, state in graph.states.items() if state != WidgetGraph.COMPLETED]
+        if failed and fingerprint is not None:
+            logger.info(
+                f'[!] {len(failed)} widgets of {repository["owner"]}/{repository["repo"]} did not complete, the next run is a full run.'
+            )
+        elif fingerprint is not None:
+            self.github_widgets.write_fingerprint(
+                repository["owner"], repository["repo"], fingerprint, datetime.now(timezone.utc).isoformat()
+            )
+
+        self.mark_completed(pipeline_type, f"{repository['owner']}#{repository['repo']}")
+        logger.info(f'Finished running pipeline for repository {repository["owner"]}/{repository["repo"]}')
+
+        # the repository is resumed from here if the run is interrupted, a failed flush is retried
+        # by the next repository or the end of the stage
+        self.flush_writes()
+
+    def park_repository(self, pipeline_type, i, repository, graph, attempt=0):
+        delay = min(self.stats_retry_delay * 2**attempt, self.stats_max_retry_delay)
+        logger.info(
+            f"[...] {len(graph.get_pending())} widgets of {repository['owner']}/{repository['repo']} are parked for {delay} seconds."
+        )
+        with self.parked_lock:
+            self.parked_repositories.append(
+                {
+                    "i": i,
+                    "repository": repository,
+                    "graph": graph,
+                    "attempt": attempt,
+                    "retry_at": time.time() + delay,
+                }
+            )
+
+        # the widgets completed so far are not run again if the run is interrupted while it is parked
+        self.flush_writes()
+
+    def retry_parked_repository(self, pipeline_type, parked):
+        repository = parked["repository"]
+        graph = parked["graph"]
+        graph.retry_pending()
+        with ThreadPoolExecutor(max_workers=self.protocol_widget_workers) as executor:
+            self.run_widget_graph(pipeline_type, parked["i"], repository, graph, executor)
+
+            pending_items = graph.get_pending()
+            if pending_items and parked["attempt"] + 1 < self.stats_retries:
+                self.park_repository(pipeline_type, parked["i"], repository, graph, parked["attempt"] + 1)
+                return
+
+            if pending_items:
+                logger.warning(
+                    f"[!] Statistics of {repository['owner']}/{repository['repo']} are still not ready after {self.stats_retries} tries, giving up on {len(pending_items)} widgets."
                 )
-                if isinstance(item, tuple) or isinstance(item, list):
-                    if len(item) == 1:
-                        func = item[0]
-                        self.function_executer(func, repository["owner"], repository["repo"])
-                    else:
-                        func, args = item
-                        self.function_executer(func, repository["owner"], repository["repo"], **args)
-                else:
-                    self.function_executer(item, repository["owner"], repository["repo"])
+                # the widgets reading them are skipped
+                graph.give_up_pending()
+                self.run_widget_graph(pipeline_type, parked["i"], repository, graph, executor)
+
+        self.finish_repository_pipeline(pipeline_type, parked["i"], repository, graph)
+
+    def retry_parked_repositories(self, pipeline_type, executor):
+        while True:
+            with self.parked_lock:
+                if not self.parked_repositories:
+                    return
+                retry_at = min(parked["retry_at"] for parked in self.parked_repositories)
+
+            delay = retry_at - time.time()
+            if delay > 0:
+                time.sleep(delay)
+
+            with self.parked_lock:
+                due = [parked for parked in self.parked_repositories if parked["retry_at"] <= time.time()]
+                self.parked_repositories = [parked for parked in self.parked_repositories if parked not in due]
+
+            futures = [executor.submit(self.run_parked_repository, pipeline_type, parked) for parked in due]
+            for future in as_completed(futures):
+                future.result()
+
+    def run_parked_repository(self, pipeline_type, parked):
+        repository = parked["repository"]
+        try:
+            self.retry_parked_repository(pipeline_type, parked)
+        except Exception as e:
+            logging.info(f"[#ERR] Error running pipeline for repository {repository['owner']}/{repository['repo']} error: {e}")
+            logging.error(traceback.format_exc())
+
+    def run_project_pipeline(self, pipeline_type, project_pipeline, unchanged_pipeline=None):
+        if self.is_completed(pipeline_type):
+            logger.info(f"[*] {self.protocol_name.upper()}/{pipeline_type} was completed by this run, skipping it.")
+            return
+
+        logger.info(
+            f"[*] Running {pipeline_type} pipeline with {self.protocol_repository_workers} repository workers and {self.protocol_widget_workers} widget workers."
+        )
+
+        def run_repository(i, repository):
+            try:
+                self.run_repository_pipeline(pipeline_type, i, repository, project_pipeline, unchanged_pipeline)
+            except Exception as e:
+                logging.info(f"[#ERR] Error running pipeline for repository {repository['owner']}/{repository['repo']} error: {e}")
+                logging.error(traceback.format_exc())
+
+        # repositories completed before the run was interrupted are not run again
+        def is_left(repository):
+            return repository and not self.is_completed(
+                pipeline_type, f"{repository['owner']}#{repository['repo']}"
+            )
 
-            logger.info(f'Finished running pipeline for repository {repository["owner"]}/{repository["repo"]}')
+        repositories = [repository for repository in self.repositories if is_left(repository)]
+        logger.info(f"[*] {len(repositories)} repositories are left to run in this run.")
+
+        # github computes the statistics of all repositories while the pipeline runs
+        if self.prewarm_stats:
+            try:
+                self.github_widgets.prewarm_stats(repositories)
+            except Exception as e:
+                logging.info(f"[#ERR] Error prewarming repository statistics. error: {e}")
+                logging.error(traceback.format_exc())
+
+        # scalar widgets of all repositories are fetched with a few batched queries up front
+        try:
+            self.github_widgets.prefetch_repositories(repositories)
+        except Exception as e:
+            logging.info(f"[#ERR] Error prefetching repositories, widgets will fetch them one by one. error: {e}")
+            logging.error(traceback.format_exc())
+
+        # all repository workers share the same github actor, hence the same rate limit budget
+        with ThreadPoolExecutor(max_workers=self.protocol_repository_workers) as executor:
+            futures = [
+                executor.submit(run_repository, i, repository)
+                for i, repository in enumerate(self.repositories)
+                if is_left(repository)
+            ]
+            for future in as_completed(futures):
+                future.result()
 
-            # sleep every two hours after processing 100 projects
-            # if i % 100 == 0 and i != 0:
-            #     logger.info(f"[*] Sleeping for 1 hour after processing 100 projects.")
-            #     time.sleep(60 * 60 * 1)
+            # widgets parked on 202 responses are retried once the other repositories are done
+            self.retry_parked_repositories(pipeline_type, executor)
 
-        helpers.write_last_updated(self.collection_refs["last_updated"], pipeline_type.value)
+        self.github_widgets.clear_prefetched()
+        # readers are told there is new data only once it is written
+        if self.flush_writes():
+            helpers.write_last_updated(self.collection_refs["last_updated"], pipeline_type.value)
+            self.journal.complete([(self.protocol_name, pipeline_type.value, "", "")])
@@ -0,0 +1,35 @@
+import pytest
+
+
+class FakeBatch:
+    def __init__(self, db):
+        self.db = db
+        self.writes = []
+
+    def set(self, doc_ref, document_data, merge=False):
+        self.writes.append((doc_ref, document_data, merge))
+
+    def commit(self):
+        if self.db.fail:
+            raise RuntimeError("commit failed")
+        self.db.commits.append(self.writes)
+
+
+class FakeDb:
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.commits = []
+
+    def batch(self):
+        return FakeBatch(self)
+
+
+@pytest.fixture
+def db():
+    """Firestore client keeping the batches it committed."""
+    return FakeDb()
+
+
+@pytest.fixture
+def journal_path(tmp_path):
+    return str(tmp_path / "journal.db")
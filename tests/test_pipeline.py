@@ -0,0 +1,37 @@
+from pipeline import Pipeline
+from tools import helpers
+from tools.run_journal import RunJournal
+from tools.widget_graph import WidgetGraph, widget
+from tools.write_buffer import WriteBuffer
+
+
+class FakeWidgets:
+    def clear_prefetched(self, owner=None, repo=None):
+        pass
+
+
+@widget(outputs=["a"])
+def produce_a(owner, repo, **kwargs):
+    return "a"
+
+
+def test_finished_repository_is_resumed_before_the_stage_ends(db, journal_path):
+    journal = RunJournal(journal_path)
+    journal.start_run()
+    pipeline = Pipeline(None, db, None, journal)
+    pipeline.protocol_name = "protocol"
+    pipeline.write_buffer = WriteBuffer(db)
+    pipeline.github_widgets = FakeWidgets()
+
+    pipeline_type = helpers.PipelineType.GITHUB_PROJECTS
+    repository = {"owner": "owner", "repo": "repo"}
+    graph = WidgetGraph([produce_a], pipeline.get_item_name)
+    graph.states["produce_a"] = pipeline.run_repository_item(pipeline_type, 0, repository, 0, 1, produce_a)[0]
+    pipeline.finish_repository_pipeline(pipeline_type, 0, repository, graph)
+
+    # the process dies before the end of the stage, the restarted run skips the repository
+    resumed = RunJournal(journal_path)
+    resumed.start_run()
+    assert resumed.is_completed("protocol", pipeline_type.value, "owner#repo", "produce_a")
+    assert resumed.is_completed("protocol", pipeline_type.value, "owner#repo")
+    assert not resumed.is_completed("protocol", pipeline_type.value)
@@ -0,0 +1,166 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from tools.run_journal import RunJournal
+from tools.widget_graph import WidgetGraph, widget
+from tools.write_buffer import WriteBuffer
+
+
+def test_journal_resumes_completed_units(journal_path):
+    journal = RunJournal(journal_path)
+    run_id = journal.start_run()
+    journal.complete([("protocol", "github_projects", "owner#repo", "contributors")])
+    journal.complete([("protocol", "github_projects", "owner#repo", "")])
+
+    # a restarted process resumes the unfinished run
+    resumed = RunJournal(journal_path)
+    assert resumed.start_run() == run_id
+    assert resumed.is_completed("protocol", "github_projects", "owner#repo", "contributors")
+    assert resumed.is_completed("protocol", "github_projects", "owner#repo")
+    assert not resumed.is_completed("protocol", "github_projects", "owner#other")
+
+
+def test_journal_starts_new_run_when_finished_or_forced(journal_path):
+    journal = RunJournal(journal_path)
+    run_id = journal.start_run()
+    journal.complete([("protocol", "github_projects", "", "")])
+    journal.finish_run()
+
+    assert journal.start_run() != run_id
+    assert not journal.is_completed("protocol", "github_projects")
+
+    journal.complete([("protocol", "github_projects", "", "")])
+    forced = RunJournal(journal_path)
+    forced.start_run(force_full_run=True)
+    assert not forced.is_completed("protocol", "github_projects")
+
+
+def test_journal_does_not_resume_expired_run(journal_path):
+    journal = RunJournal(journal_path, max_age=60)
+    run_id = journal.start_run()
+    journal.complete([("protocol", "github_projects", "", "")])
+    journal.connection.execute("UPDATE runs SET started_at = ?", (time.time() - 120,))
+    journal.connection.commit()
+
+    expired = RunJournal(journal_path, max_age=60)
+    assert expired.start_run() != run_id
+    assert not expired.is_completed("protocol", "github_projects")
+
+
+@widget(outputs=["a"])
+def produce_a(owner, repo, **kwargs):
+    pass
+
+
+@widget(inputs=["a"], outputs=["b"])
+def read_a(owner, repo, inputs=None, **kwargs):
+    pass
+
+
+@widget(inputs=["b"], outputs=["c"])
+def read_b(owner, repo, inputs=None, **kwargs):
+    pass
+
+
+def run_graph(graph, states):
+    """Runs the graph with the widget states of `states`, returns the widgets run in order."""
+    ran = []
+
+    def run_item(item, inputs):
+        name = item.__name__
+        ran.append((name, inputs))
+        state = states.get(name, WidgetGraph.COMPLETED)
+        return state, name if state == WidgetGraph.COMPLETED else None
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        graph.run(executor, run_item)
+    return ran
+
+
+def test_widget_graph_hands_results_to_dependents():
+    graph = WidgetGraph([read_b, read_a, produce_a], lambda item: item.__name__)
+    ran = run_graph(graph, {})
+
+    assert ran == [("produce_a", None), ("read_a", {"a": "produce_a"}), ("read_b", {"b": "read_a"})]
+    assert set(graph.states.values()) == {WidgetGraph.COMPLETED}
+
+
+def test_widget_graph_skips_dependents_of_failed_widget():
+    graph = WidgetGraph([produce_a, read_a, read_b], lambda item: item.__name__)
+    ran = run_graph(graph, {"produce_a": WidgetGraph.FAILED})
+
+    assert [name for name, _ in ran] == ["produce_a"]
+    assert graph.states == {
+        "produce_a": WidgetGraph.FAILED,
+        "read_a": WidgetGraph.SKIPPED,
+        "read_b": WidgetGraph.SKIPPED,
+    }
+
+
+def test_widget_graph_retries_pending_widget():
+    graph = WidgetGraph([produce_a, read_a, read_b], lambda item: item.__name__)
+    run_graph(graph, {"read_a": WidgetGraph.PENDING})
+
+    # dependents wait for the pending widget instead of being skipped
+    assert graph.get_pending() == [read_a]
+    assert graph.states["read_b"] == WidgetGraph.WAITING
+
+    graph.retry_pending()
+    ran = run_graph(graph, {})
+    assert [name for name, _ in ran] == ["read_a", "read_b"]
+    assert set(graph.states.values()) == {WidgetGraph.COMPLETED}
+
+
+def test_widget_graph_gives_up_pending_widget():
+    graph = WidgetGraph([produce_a, read_a, read_b], lambda item: item.__name__)
+    run_graph(graph, {"read_a": WidgetGraph.PENDING})
+
+    graph.give_up_pending()
+    assert run_graph(graph, {}) == []
+    assert graph.states["read_a"] == WidgetGraph.FAILED
+    assert graph.states["read_b"] == WidgetGraph.SKIPPED
+
+
+def test_write_buffer_splits_batches_at_max_writes(db):
+    buffer = WriteBuffer(db)
+    for i in range(WriteBuffer.MAX_BATCH_WRITES * 2 + 1):
+        buffer.set(f"doc{i}", {"data": i})
+    buffer.flush()
+
+    assert sorted(len(writes) for writes in db.commits) == [1, 500, 500]
+
+
+def test_write_buffer_splits_batches_at_max_bytes(db):
+    buffer = WriteBuffer(db)
+    data = {"data": "x" * (3 * 1024 * 1024)}
+    for i in range(3):
+        buffer.set(f"doc{i}", data)
+    buffer.flush()
+
+    # two documents of 3 MiB fit in a batch of 8 MiB, the third one doesn't
+    assert sorted(len(writes) for writes in db.commits) == [1, 2]
+
+
+def test_write_buffer_calls_after_flush_callbacks_once_committed(db):
+    buffer = WriteBuffer(db)
+    called = []
+    buffer.set("doc", {"data": 1})
+    buffer.after_flush(lambda: called.append(len(db.commits)))
+    assert called == []
+
+    buffer.flush()
+    assert called == [1]
+
+
+def test_write_buffer_drops_after_flush_callbacks_on_error(db):
+    db.fail = True
+    buffer = WriteBuffer(db)
+    called = []
+    buffer.set("doc", {"data": 1})
+    buffer.after_flush(lambda: called.append(True))
+
+    with pytest.raises(RuntimeError):
+        buffer.flush()
+    assert called == []
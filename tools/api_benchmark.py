@@ -0,0 +1,114 @@
+"""
+Load benchmark of the api.
+
+Sends a fixed number of GET requests with a fixed number of them in flight, and reports the
+throughput and the latency percentiles of every target. To compare two versions of the api,
+serve each of them on its own port and pass both as targets:
+
+    python -m tools.api_benchmark --token $TOKEN \\
+        --target "before=http://localhost:8000/misc/flow/last-updated" \\
+        --target "after=http://localhost:8001/misc/flow/last-updated"
+
+The sync api is the tree before the async Firestore client, check it out in a worktree and
+serve both versions against the same database, the Firestore emulator works too:
+
+    git worktree add ../flowana-sync "$(git log -1 --format=%h --grep='^\\[user-017\\] Serve')^"
+    export FIRESTORE_EMULATOR_HOST=localhost:8080
+    (cd ../flowana-sync && uvicorn api.api:app --port 8000 --workers 1) &
+    uvicorn api.api:app --port 8001 --workers 1 &
+
+Both need the same documents and a user, the numbers only compare within one machine.
+"""
+import time
+import asyncio
+import argparse
+from collections import Counter
+
+import httpx
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0
+    index = min(len(sorted_values) - 1, int(len(sorted_values) * fraction))
+    return sorted_values[index]
+
+
+async def run_target(url, token, requests, concurrency):
+    headers = {"Authorization": f"Bearer {token}"} if token else {}
+    limits = httpx.Limits(
+        max_connections=concurrency, max_keepalive_connections=concurrency
+    )
+    latencies = []
+    statuses = Counter()
+    queue = iter(range(requests))
+
+    async with httpx.AsyncClient(headers=headers, limits=limits, timeout=60) as client:
+
+        async def worker():
+            for _ in queue:
+                start = time.perf_counter()
+                try:
+                    response = await client.get(url)
+                    statuses[response.status_code] += 1
+                except httpx.HTTPError as e:
+                    statuses[type(e).__name__] += 1
+                latencies.append(time.perf_counter() - start)
+
+        # one warm up request, so connection setup and cold caches are not measured
+        await client.get(url)
+
+        start = time.perf_counter()
+        await asyncio.gather(*[worker() for _ in range(concurrency)])
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "requests/s": requests / elapsed,
+        "p50 ms": percentile(latencies, 0.50) * 1000,
+        "p95 ms": percentile(latencies, 0.95) * 1000,
+        "p99 ms": percentile(latencies, 0.99) * 1000,
+        "statuses": dict(statuses),
+    }
+
+
+async def main(targets, token, requests, concurrency):
+    results = {}
+    for label, url in targets:
+        print(f"[...] {label}: {requests} requests, {concurrency} concurrent -> {url}")
+        results[label] = await run_target(url, token, requests, concurrency)
+
+    print()
+    print(
+        f"{'target':<16}{'requests/s':>12}{'p50 ms':>10}{'p95 ms':>10}"
+        f"{'p99 ms':>10}  statuses"
+    )
+    for label, result in results.items():
+        print(
+            f"{label:<16}{result['requests/s']:>12.1f}{result['p50 ms']:>10.1f}"
+            f"{result['p95 ms']:>10.1f}{result['p99 ms']:>10.1f}  {result['statuses']}"
+        )
+
+
+def parse_target(value):
+    label, separator, url = value.partition("=")
+    if not separator or not url.startswith("http"):
+        raise argparse.ArgumentTypeError("targets are given as label=url")
+    return label, url
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load benchmark of the api.")
+    parser.add_argument(
+        "--target",
+        type=parse_target,
+        action="append",
+        required=True,
+        help="label=url of an endpoint, can be given several times",
+    )
+    parser.add_argument("--token", default=None, help="bearer token of an api user")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    args = parser.parse_args()
+
+    asyncio.run(main(args.target, args.token, args.requests, args.concurrency))
@@ -0,0 +1,58 @@
+import asyncio
+import threading
+import weakref
+import logging
+import httpx
+
+logger = logging.getLogger(__name__)
+
+try:
+    import h2  # noqa: F401
+
+    HTTP2_ENABLED = True
+except ImportError:
+    HTTP2_ENABLED = False
+
+# connections are pooled and kept alive, so one process can keep hundreds of requests in flight
+CLIENT_LIMITS = httpx.Limits(max_connections=256, max_keepalive_connections=64, keepalive_expiry=30)
+CLIENT_TIMEOUT = httpx.Timeout(120, connect=30)
+
+# an async client can only be used by the event loop it was created in
+_clients = weakref.WeakKeyDictionary()
+
+_background_loop = None
+_background_loop_lock = threading.Lock()
+
+
+def get_client():
+    """Returns the pooled http client of the running event loop."""
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop, None)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            http2=HTTP2_ENABLED,
+            limits=CLIENT_LIMITS,
+            timeout=CLIENT_TIMEOUT,
+            follow_redirects=True,
+        )
+        _clients[loop] = client
+    return client
+
+
+def get_background_loop():
+    """Event loop running in a daemon thread, which serves the sync api of the actors."""
+    global _background_loop
+    with _background_loop_lock:
+        if _background_loop is None:
+            _background_loop = asyncio.new_event_loop()
+            thread = threading.Thread(
+                target=_background_loop.run_forever, name="async-http", daemon=True
+            )
+            thread.start()
+            logger.info(f"[*] Async http loop started. HTTP/2 enabled: {HTTP2_ENABLED}")
+    return _background_loop
+
+
+def run_sync(coroutine):
+    """Runs the coroutine in the background loop and blocks the calling thread until it is done."""
+    return asyncio.run_coroutine_threadsafe(coroutine, get_background_loop()).result()
@@ -0,0 +1,152 @@
+"""
+Micro benchmark of the health score kernels.
+
+Scores synthetic repositories with the per item loops the scorers used before and with the
+vectorized kernels of GithubWidgets, and reports the time of both and the speedup. It imports
+the github package, so it is run as a module from the repository root:
+
+    python -m tools.health_score_benchmark --issues 50000
+
+Running the file directly, `python tools/health_score_benchmark.py`, fails to import github.
+"""
+import math
+import time
+import random
+import argparse
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+from dateutil import parser
+
+from github.github_widgets import GithubWidgets
+
+
+def legacy_activity_score(items, running_sum=False):
+    # per item loop of _score_issue_activity and _score_pull_request_activity
+    now = datetime.now(timezone.utc)
+    scores = []
+    total = 0
+    for item in items:
+        days_since_created = (now - parser.isoparse(item["createdAt"])).days
+        comment_reward = item["comment_count"] * 0.05
+        if item["closed"]:
+            days_since_closed = (now - parser.isoparse(item["closedAt"])).days
+            score = (1.25 + comment_reward) * math.exp(-0.005 * days_since_closed)
+        else:
+            score = (1 + comment_reward) * math.exp(-0.005 * days_since_created)
+        total += score
+        scores.append(total if running_sum else score)
+    return sum(scores)
+
+
+def legacy_release_score(releases):
+    release_dates = sorted(
+        [parser.isoparse(release["published_at"]) for release in releases], reverse=True
+    )
+    intervals = [
+        (release_dates[i - 1] - release_dates[i]).days
+        for i in range(1, len(release_dates))
+    ]
+    inverse_std_dev = 1 / (np.std(intervals) + 0.01)
+    penalty = 1 / (1 + 0.01 * (datetime.now(timezone.utc) - release_dates[0]).days)
+    return sum(
+        penalty * math.exp(-0.1 * i) * inverse_std_dev for i in range(len(release_dates))
+    )
+
+
+def legacy_decayed_scores(timestamps, commit_counts, now_timestamp):
+    return [
+        commit_count * math.exp(-0.05 * ((now_timestamp - week) // (7 * 24 * 60 * 60)))
+        for week, commit_count in zip(timestamps, commit_counts)
+    ]
+
+
+def generate_items(count, seed):
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    items = []
+    for _ in range(count):
+        created_at = now - timedelta(seconds=rng.randint(0, 10 * 365 * 24 * 60 * 60))
+        closed = rng.random() < 0.7
+        closed_at = created_at + timedelta(seconds=rng.randint(0, 90 * 24 * 60 * 60))
+        items.append(
+            {
+                "createdAt": created_at.strftime("%Y-%m-%dT%H:%M:%SZ"),
+                "closedAt": closed_at.strftime("%Y-%m-%dT%H:%M:%SZ") if closed else None,
+                "closed": closed,
+                "comment_count": rng.randint(0, 50),
+            }
+        )
+    # widgets store them newest first
+    return sorted(items, key=lambda x: x["createdAt"], reverse=True)
+
+
+def measure(func, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main(issues, releases, weeks, repeat):
+    widgets = GithubWidgets(None, {})
+    items = generate_items(issues, seed=1)
+    release_items = [
+        {"published_at": item["createdAt"]} for item in generate_items(releases, seed=2)
+    ]
+    now_timestamp = int(datetime.now(timezone.utc).timestamp())
+    week_timestamps = [now_timestamp - week * 7 * 24 * 60 * 60 for week in range(weeks)]
+    commit_counts = np.random.default_rng(3).random(weeks)
+
+    kernels = [
+        (
+            f"issues ({issues})",
+            lambda: legacy_activity_score(items),
+            lambda: widgets._score_issue_activity(None, None, issues=items),
+        ),
+        (
+            f"pull requests ({issues})",
+            lambda: legacy_activity_score(items, running_sum=True),
+            lambda: widgets._score_pull_request_activity(None, None, pull_requests=items),
+        ),
+        (
+            f"releases ({releases})",
+            lambda: legacy_release_score(release_items),
+            lambda: widgets._score_release_activity(None, None, releases=release_items),
+        ),
+        (
+            f"commit decay ({weeks})",
+            lambda: sum(legacy_decayed_scores(week_timestamps, commit_counts, now_timestamp)),
+            lambda: np.sum(
+                widgets._calculate_time_decayed_scores(
+                    week_timestamps, commit_counts, now_timestamp
+                )
+            ),
+        ),
+    ]
+
+    print(f"{'kernel':<24}{'loop ms':>10}{'vector ms':>12}{'speedup':>10}  same score")
+    for label, legacy, vectorized in kernels:
+        legacy_time, legacy_result = measure(legacy, repeat)
+        vectorized_time, vectorized_result = measure(vectorized, repeat)
+        print(
+            f"{label:<24}{legacy_time * 1000:>10.1f}{vectorized_time * 1000:>12.1f}"
+            f"{legacy_time / vectorized_time:>9.1f}x  "
+            f"{math.isclose(legacy_result, vectorized_result, rel_tol=1e-9)}"
+        )
+
+
+if __name__ == "__main__":
+    argument_parser = argparse.ArgumentParser(
+        description="Micro benchmark of the health score."
+    )
+    argument_parser.add_argument("--issues", type=int, default=50000)
+    argument_parser.add_argument("--releases", type=int, default=500)
+    argument_parser.add_argument("--weeks", type=int, default=52)
+    argument_parser.add_argument("--repeat", type=int, default=3)
+    args = argument_parser.parse_args()
+
+    main(args.issues, args.releases, args.weeks, args.repeat)
@@ -0,0 +1,104 @@
+import os
+import time
+import uuid
+import sqlite3
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class RunJournal:
+    """
+    Durable journal of the units completed by an update run, a unit being a
+    (protocol, stage, repository, widget) tuple. An empty repository or widget stands for
+    the whole stage or repository.
+
+    A run that was not finished, because the process died or was restarted, is resumed by
+    the next run, which skips the units that were already completed. Runs started more than
+    `max_age` seconds ago are not resumed, their data is too old to be kept.
+    """
+
+    def __init__(self, path, max_age=2 * 24 * 60 * 60):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.path = path
+        self.max_age = max_age
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.run_id = None
+        self.completed = set()
+        with self.lock:
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS runs (run_id TEXT PRIMARY KEY, started_at REAL NOT NULL, finished_at REAL)"
+            )
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS units (run_id TEXT NOT NULL, protocol TEXT NOT NULL, stage TEXT NOT NULL, "
+                "repository TEXT NOT NULL, widget TEXT NOT NULL, completed_at REAL NOT NULL, "
+                "PRIMARY KEY (run_id, protocol, stage, repository, widget))"
+            )
+            self.connection.commit()
+
+    def start_run(self, force_full_run=False):
+        """Resumes the last unfinished run, or starts a new one. Returns the run id."""
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT run_id, started_at FROM runs WHERE finished_at IS NULL ORDER BY started_at DESC LIMIT 1"
+            ).fetchone()
+
+            if row is not None and row[1] >= time.time() - self.max_age and not force_full_run:
+                self.run_id = row[0]
+                self.completed = {
+                    tuple(unit)
+                    for unit in self.connection.execute(
+                        "SELECT protocol, stage, repository, widget FROM units WHERE run_id = ?",
+                        (self.run_id,),
+                    )
+                }
+                logger.info(f"[*] Resuming run {self.run_id}, {len(self.completed)} units are already completed.")
+                return self.run_id
+
+            # unfinished runs are abandoned, and the units of old runs are not needed anymore
+            self.connection.execute("UPDATE runs SET finished_at = ? WHERE finished_at IS NULL", (time.time(),))
+            self.connection.execute("DELETE FROM units")
+            self.run_id = uuid.uuid4().hex
+            self.completed = set()
+            self.connection.execute("INSERT INTO runs (run_id, started_at) VALUES (?, ?)", (self.run_id, time.time()))
+            self.connection.commit()
+
+        logger.info(f"[*] Starting run {self.run_id}.")
+        return self.run_id
+
+    def finish_run(self):
+        with self.lock:
+            if self.run_id is None:
+                return
+            self.connection.execute("UPDATE runs SET finished_at = ? WHERE run_id = ?", (time.time(), self.run_id))
+            self.connection.commit()
+            logger.info(f"[*] Finished run {self.run_id}.")
+            self.run_id = None
+            self.completed = set()
+
+    def is_completed(self, protocol, stage, repository="", widget=""):
+        with self.lock:
+            return (protocol, stage, repository, widget) in self.completed
+
+    def complete(self, units):
+        """Records (protocol, stage, repository, widget) units as completed."""
+        units = [tuple(unit) for unit in units]
+        if not units:
+            return
+
+        now = time.time()
+        with self.lock:
+            if self.run_id is None:
+                return
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO units (run_id, protocol, stage, repository, widget, completed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [(self.run_id, *unit, now) for unit in units],
+            )
+            self.connection.commit()
+            self.completed.update(units)
@@ -0,0 +1,86 @@
+import os
+import logging
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+logger = logging.getLogger(__name__)
+
+# number of stages hitting the same upstream at the same time. github stages of all
+# protocols share the rate limit budget of the github actor, so they run one at a time
+DEFAULT_UPSTREAM_LIMITS = {
+    "github": 1,
+    "discourse": 4,
+    "tally": 2,
+    "developers": 2,
+    "messari": 2,
+    "firestore": 4,
+}
+
+
+def get_upstream_limits():
+    """Default limits, overridden by PIPELINE_UPSTREAM_LIMITS, e.g. "github=2,tally=1"."""
+    limits = dict(DEFAULT_UPSTREAM_LIMITS)
+    for entry in os.environ.get("PIPELINE_UPSTREAM_LIMITS", "").split(","):
+        upstream, separator, limit = entry.partition("=")
+        if separator:
+            limits[upstream.strip()] = int(limit)
+    return limits
+
+
+class StageScheduler:
+    """
+    Runs the stages of the update as soon as the stages they depend on are finished, with at
+    most as many stages of the same upstream at once as its limit allows.
+
+    A failing stage is logged and counts as finished, the stages after it still run, as they
+    did when the stages were run one after the other.
+    """
+
+    def __init__(self, upstream_limits=None, default_limit=1):
+        self.upstream_limits = upstream_limits if upstream_limits is not None else get_upstream_limits()
+        self.default_limit = default_limit
+        self.stages = {}
+
+    def add_stage(self, name, func, upstream, after=()):
+        if name in self.stages:
+            raise ValueError(f"Stage {name} is already scheduled.")
+        self.stages[name] = (func, upstream, tuple(after))
+
+    def run_stage(self, name, semaphores):
+        func, upstream, _ = self.stages[name]
+        with semaphores[upstream]:
+            logger.info(f"[*] Starting stage {name}.")
+            try:
+                func()
+            except Exception as e:
+                logging.info(f"[#ERR] Error running stage: {name} error: {e}")
+                logging.error(traceback.format_exc())
+                return
+            logger.info(f"[*] Finished stage {name}.")
+
+    def run(self):
+        semaphores = {
+            upstream: threading.BoundedSemaphore(self.upstream_limits.get(upstream, self.default_limit))
+            for _, upstream, _ in self.stages.values()
+        }
+        pending = dict(self.stages)
+        finished = set()
+        running = {}
+
+        # every stage has its own thread, waiting stages only hold their semaphore
+        with ThreadPoolExecutor(max_workers=max(len(self.stages), 1)) as executor:
+            while pending or running:
+                ready = [name for name, (_, _, after) in pending.items() if all(stage in finished for stage in after)]
+                for name in ready:
+                    del pending[name]
+                    running[executor.submit(self.run_stage, name, semaphores)] = name
+
+                if not running:
+                    raise ValueError(f"Stages {list(pending)} depend on stages that are not scheduled.")
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    finished.add(running.pop(future))
+
+        self.stages.clear()
@@ -0,0 +1,154 @@
+import logging
+from concurrent.futures import wait, FIRST_COMPLETED
+
+logger = logging.getLogger(__name__)
+
+
+def widget(inputs=(), outputs=()):
+    """
+    Declares the documents a widget reads and writes.
+
+    A widget with inputs is called with `inputs`, a dictionary of the inputs produced by the
+    widgets that ran before it, the missing ones have to be read from the database. A widget
+    with a single output returns its data, one with several outputs returns a dictionary of
+    output -> data. None means nothing was produced, e.g. the data has not changed.
+    """
+
+    def decorator(func):
+        func.widget_inputs = tuple(inputs)
+        func.widget_outputs = tuple(outputs)
+        return func
+
+    return decorator
+
+
+class WidgetGraph:
+    """
+    Runs the widgets of a repository in the order of their declared inputs and outputs.
+
+    Widgets are deduplicated by name, the independent ones run in parallel, and the results are
+    handed to the dependent widgets in memory. The dependents of a failed widget are skipped.
+    A widget that has to be retried later is pending, its dependents wait for it.
+    """
+
+    WAITING = "waiting"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    PENDING = "pending"
+    SKIPPED = "skipped"
+
+    def __init__(self, items, get_name, results=None):
+        self.items = {}
+        for item in items:
+            name = get_name(item)
+            if name in self.items:
+                logger.warning(f"[!] Widget {name} is declared twice, running it once.")
+                continue
+            self.items[name] = item
+
+        self.results = dict(results or {})
+        self.states = {name: self.WAITING for name in self.items}
+
+        producers = {}
+        for name, item in self.items.items():
+            for output in self.get_outputs(item):
+                producers.setdefault(output, []).append(name)
+
+        self.dependencies = {
+            name: {
+                producer
+                for widget_input in self.get_inputs(item)
+                for producer in producers.get(widget_input, [])
+                if producer != name
+            }
+            for name, item in self.items.items()
+        }
+
+    @staticmethod
+    def get_func(item):
+        func = item[0] if isinstance(item, tuple) or isinstance(item, list) else item
+        return getattr(func, "__func__", func)
+
+    def get_inputs(self, item):
+        return getattr(self.get_func(item), "widget_inputs", ())
+
+    def get_outputs(self, item):
+        return getattr(self.get_func(item), "widget_outputs", ())
+
+    def get_item_inputs(self, name):
+        """Returns None for widgets without inputs, the available inputs otherwise."""
+        inputs = self.get_inputs(self.items[name])
+        if not inputs:
+            return None
+        return {key: self.results[key] for key in inputs if key in self.results}
+
+    def store_result(self, name, result):
+        outputs = self.get_outputs(self.items[name])
+        if result is None or not outputs:
+            return
+        if len(outputs) == 1:
+            self.results[outputs[0]] = result
+            return
+        for output in outputs:
+            if result.get(output, None) is not None:
+                self.results[output] = result[output]
+
+    def get_pending(self):
+        return [self.items[name] for name, state in self.states.items() if state == self.PENDING]
+
+    def retry_pending(self):
+        for name, state in self.states.items():
+            if state == self.PENDING:
+                self.states[name] = self.WAITING
+
+    def give_up_pending(self):
+        for name, state in self.states.items():
+            if state == self.PENDING:
+                self.states[name] = self.FAILED
+
+    def skip_blocked(self):
+        # skipping a widget may block the ones after it, until nothing changes
+        changed = True
+        while changed:
+            changed = False
+            for name, state in self.states.items():
+                if state != self.WAITING:
+                    continue
+                if any(self.states[dependency] in (self.FAILED, self.SKIPPED) for dependency in self.dependencies[name]):
+                    logger.info(f"[!] Skipping widget {name}, a widget it depends on failed.")
+                    self.states[name] = self.SKIPPED
+                    changed = True
+
+    def run(self, executor, run_item):
+        """
+        Runs every widget whose dependencies are completed. `run_item(item, inputs)` returns
+        (state, result), state being COMPLETED, FAILED or PENDING. Returns once no widget can be
+        run, the widgets waiting on pending ones are left waiting.
+        """
+        running = {}
+        while True:
+            self.skip_blocked()
+            for name, state in self.states.items():
+                if state == self.WAITING and all(
+                    self.states[dependency] == self.COMPLETED for dependency in self.dependencies[name]
+                ):
+                    self.states[name] = self.RUNNING
+                    future = executor.submit(run_item, self.items[name], self.get_item_inputs(name))
+                    running[future] = name
+
+            if not running:
+                return
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                try:
+                    state, result = future.result()
+                except Exception as e:
+                    logger.info(f"[#ERR] Error running widget: {name} error: {e}")
+                    state, result = self.FAILED, None
+
+                self.states[name] = state
+                if state == self.COMPLETED:
+                    self.store_result(name, result)
@@ -0,0 +1,112 @@
+import json
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBuffer:
+    """
+    Coalesces Firestore document writes into batched commits.
+
+    Writes are buffered until a batch is full, then committed in the background by a bounded
+    number of workers. `flush` commits what is left and waits for every pending commit, it must be
+    called before the written documents are read back. Without a database client, writes go
+    straight to the document references.
+
+    Listeners are called with every write as it is made, so written documents can be consumed
+    without reading them back. Callbacks given to `after_flush` are called once the writes made
+    before them are committed.
+    """
+
+    # firestore accepts at most 500 writes and 10 MiB per commit
+    MAX_BATCH_WRITES = 500
+    MAX_BATCH_BYTES = 8 * 1024 * 1024
+
+    def __init__(self, db=None, max_parallel_commits=4):
+        self.db = db
+        self.lock = threading.Lock()
+        self.pending = []
+        self.pending_bytes = 0
+        self.futures = []
+        self.listeners = []
+        self.flush_callbacks = []
+        self.executor = (
+            ThreadPoolExecutor(max_workers=max_parallel_commits, thread_name_prefix="write-buffer")
+            if db is not None
+            else None
+        )
+
+    def add_listener(self, listener):
+        # listener(doc_ref, document_data, merge) is called by the writing thread
+        self.listeners.append(listener)
+
+    def after_flush(self, callback):
+        if self.db is None:
+            # writes are already made
+            callback()
+            return
+
+        with self.lock:
+            self.flush_callbacks.append(callback)
+
+    def set(self, doc_ref, document_data, merge=False):
+        for listener in self.listeners:
+            listener(doc_ref, document_data, merge)
+
+        if self.db is None:
+            doc_ref.set(document_data, merge=merge)
+            return
+
+        size = len(json.dumps(document_data, default=str))
+        with self.lock:
+            if self.pending and (
+                len(self.pending) >= self.MAX_BATCH_WRITES or self.pending_bytes + size > self.MAX_BATCH_BYTES
+            ):
+                self.commit_pending()
+            self.pending.append((doc_ref, document_data, merge))
+            self.pending_bytes += size
+
+    def commit_pending(self):
+        # called with the lock held
+        writes = self.pending
+        self.pending = []
+        self.pending_bytes = 0
+        self.futures.append(self.executor.submit(self.commit, writes))
+
+    def commit(self, writes):
+        batch = self.db.batch()
+        for doc_ref, document_data, merge in writes:
+            batch.set(doc_ref, document_data, merge=merge)
+        batch.commit()
+        logger.info(f"[#db] Committed {len(writes)} buffered writes to database")
+
+    def flush(self):
+        if self.db is None:
+            return
+
+        # waits for every commit in flight, including the ones of other threads sharing the buffer
+        with self.lock:
+            if self.pending:
+                self.commit_pending()
+            futures = list(self.futures)
+            callbacks, self.flush_callbacks = self.flush_callbacks, []
+
+        errors = []
+        for future in futures:
+            try:
+                future.result()
+            except Exception as e:
+                errors.append(e)
+
+        with self.lock:
+            self.futures = [future for future in self.futures if future not in futures]
+
+        if errors:
+            # the writes of the callbacks may be lost, they are not called
+            logger.error(f"[#ERR] Error committing {len(errors)} buffered write batches: {errors[0]}")
+            raise errors[0]
+
+        for callback in callbacks:
+            callback()